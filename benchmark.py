@@ -0,0 +1,423 @@
+# Author: Daniel Glauber
+# File: benchmark.py
+# Description: This file contains the benchmark suite for the hot paths of the simple genetic algorithm (SGA).
+# It times each phase of a generation and full runs over a grid of string and population sizes,
+# saves the results as a JSON baseline and compares later runs against a baseline.
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+from config import SGAConfig, SettingsError
+from population import Population
+from selection import TOURNAMENT_SELECTION
+
+# The string and population sizes of the experiments in readme.txt
+README_EXPERIMENT_POINTS = [
+    (20, 7), (30, 8), (40, 24), (50, 34), (60, 40), (70, 42), (80, 46), (90, 47), (100, 49),
+    (110, 54), (120, 59), (130, 63), (140, 66), (150, 68), (160, 74), (170, 77), (180, 78),
+    (190, 79), (200, 86), (210, 94), (220, 96), (230, 99), (240, 101), (250, 105), (260, 108),
+    (270, 109), (280, 110), (290, 113), (300, 119), (310, 121), (320, 122), (330, 124), (340, 127),
+    (350, 129), (360, 130), (370, 133), (380, 135), (390, 136), (400, 138), (410, 142), (420, 147),
+    (430, 148), (440, 149), (450, 155), (460, 156), (470, 160), (480, 162),
+]
+DEFAULT_STRING_SIZES = [50, 200, 1000]
+DEFAULT_POPULATION_SIZES = [50, 200, 1000]
+PHASES = [
+    "initialize",
+    "selection",
+    "uniform_crossover",
+    "attempt_mutation",
+    "replace_current_population",
+    "run",
+]
+BASELINE_FORMAT_VERSION = 2
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+# A phase counts as a regression only if it is also slower by this many seconds, so timer noise
+# on phases that take microseconds is never reported
+DEFAULT_MINIMUM_SLOWDOWN = 0.00001
+# Each timing of a phase loops over it until the loop takes at least this long
+MINIMUM_TIMING_SECONDS = 0.02
+
+
+def grid_points(grid, string_sizes=None, population_sizes=None):
+    """
+    Get the (stringSizeN, populationSizeN) points of a benchmark grid.
+
+    Args:
+        grid (str): "readme" for the readme.txt experiment points, "sizes" for every combination
+            of the string and population sizes, or "all" for both.
+        string_sizes (list, optional): The string sizes of the "sizes" grid.
+        population_sizes (list, optional): The population sizes of the "sizes" grid.
+
+    Returns:
+        list: The points of the grid without duplicates, in order.
+    """
+    if grid not in ("readme", "sizes", "all"):
+        raise ValueError(f"Unknown benchmark grid {grid}")
+    points = []
+    if grid in ("readme", "all"):
+        points.extend(README_EXPERIMENT_POINTS)
+    if grid in ("sizes", "all"):
+        points.extend(
+            (string_size, population_size)
+            for string_size in string_sizes or DEFAULT_STRING_SIZES
+            for population_size in population_sizes or DEFAULT_POPULATION_SIZES
+        )
+    return list(dict.fromkeys(points))
+
+
+def point_name(string_size, population_size):
+    """
+    Get the key a grid point is stored under in a baseline.
+
+    Args:
+        string_size (int): The stringSizeN of the point.
+        population_size (int): The populationSizeN of the point.
+
+    Returns:
+        str: The name of the point.
+    """
+    return f"L={string_size},N={population_size}"
+
+
+def point_config(string_size, population_size, overrides):
+    """
+    Get the settings of a grid point: the defaults, the overrides and the size of the point.
+
+    Args:
+        string_size (int): The stringSizeN of the point.
+        population_size (int): The populationSizeN of the point.
+        overrides (dict): Settings that replace the default values.
+
+    Returns:
+        SGAConfig: The settings of the point.
+    """
+    return SGAConfig.from_dict(overrides).replace(
+        fullDebug=False, limitedDebug=False, stringSizeN=string_size, populationSizeN=population_size
+    )
+
+
+def summarize(samples, loops=1):
+    """
+    Summarize the timings of a phase.
+
+    Args:
+        samples (list): The time of one call in every repeat in seconds.
+        loops (int, optional): The number of calls every repeat was averaged over.
+
+    Returns:
+        dict: The minimum, median, mean and maximum time, the number of repeats and the number of loops.
+    """
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "max": max(samples),
+        "repeats": len(samples),
+        "loops": loops,
+    }
+
+
+def time_call(function, *args):
+    """
+    Time a single call.
+
+    Args:
+        function (callable): The function to call.
+        *args: The arguments of the call.
+
+    Returns:
+        float: The time the call took in seconds.
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def loop_count(timer):
+    """
+    Get the number of calls a timing must loop over to take at least MINIMUM_TIMING_SECONDS,
+    so phases that take microseconds are not lost in the resolution and noise of the timer.
+
+    Args:
+        timer (timeit.Timer): The timer of the function.
+
+    Returns:
+        int: The number of calls.
+    """
+    # The number of calls grows 1, 2, 5, 10, 20, 50, ... as with timeit.Timer.autorange
+    loops = 1
+    while True:
+        for number in (loops, 2 * loops, 5 * loops):
+            if timer.timeit(number) >= MINIMUM_TIMING_SECONDS:
+                return number
+        loops *= 10
+
+
+def select_parents(population):
+    """
+    Select the parents of a whole generation the way select_mating_parents does.
+
+    Args:
+        population (Population): The population to select from.
+
+    Returns:
+        list: The parent pairs.
+    """
+    pairs = population.population_size // 2
+    if population.config.batchedSelection or population.selection_method != TOURNAMENT_SELECTION:
+        parents = population.batched_selection(2 * pairs)
+        generation = population.current_generation
+        return [(generation[parents[2 * pair]], generation[parents[2 * pair + 1]]) for pair in range(pairs)]
+    return [population.single_tournament_selection() for pair in range(pairs)]
+
+
+def benchmark_phases(config, repeat, phases):
+    """
+    Time the phases of a generation of a Population with the given settings.
+    Every phase is called over and over on the same initialized population, so each call does about the same work,
+    and every timing loops over enough calls to take at least MINIMUM_TIMING_SECONDS.
+
+    Args:
+        config (SGAConfig): The settings of the population.
+        repeat (int): The number of times each phase is timed.
+        phases (list): The phases to time.
+
+    Returns:
+        dict: The summary of every timed phase.
+    """
+    population = Population(config)
+    try:
+        population.initialize_random_starting_population()
+        parent_pairs = select_parents(population)
+        children = [population.uniform_crossover(parents) for parents in parent_pairs]
+        population.select_mating_parents()
+
+        def crossover():
+            for parents, pair in zip(parent_pairs, children):
+                population.uniform_crossover(parents, pair)
+
+        def mutation():
+            for pair in children:
+                for child in pair:
+                    population.attempt_mutation(child)
+
+        phase_functions = {
+            "initialize": population.initialize_random_starting_population,
+            "selection": lambda: select_parents(population),
+            "uniform_crossover": crossover,
+            "attempt_mutation": mutation,
+            "replace_current_population": population.replace_current_population,
+        }
+        timers = {phase: timeit.Timer(function) for phase, function in phase_functions.items() if phase in phases}
+        loops = {phase: loop_count(timer) for phase, timer in timers.items()}
+        samples = {phase: [] for phase in timers}
+        # The phases take turns, so a slow spell of the machine does not hit every repeat of one phase
+        for i in range(repeat):
+            for phase, timer in timers.items():
+                samples[phase].append(timer.timeit(loops[phase]) / loops[phase])
+    finally:
+        population.close()
+    return {phase: summarize(samples[phase], loops[phase]) for phase in samples}
+
+
+def benchmark_run(config, repeat):
+    """
+    Time full runs of the SGAController with the given settings, discarding their output.
+
+    Args:
+        config (SGAConfig): The settings of the runs.
+        repeat (int): The number of runs.
+
+    Returns:
+        dict: The summary of the run times and the number of generations of the last run.
+    """
+    # Imported here because sga imports every population engine
+    from sga import SGAController
+    samples = []
+    generations = 0
+    for i in range(repeat):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            controller = SGAController(config)
+            samples.append(time_call(controller.run))
+        generations = controller.generation_number - 1
+    summary = summarize(samples)
+    summary["generations"] = generations
+    return summary
+
+
+def run_benchmarks(points, repeat, phases, overrides):
+    """
+    Benchmark every grid point.
+
+    Args:
+        points (list): The (stringSizeN, populationSizeN) points to benchmark.
+        repeat (int): The number of times each phase is timed.
+        phases (list): The phases to time.
+        overrides (dict): Settings that replace the default values.
+
+    Returns:
+        dict: The benchmark results, ready to be saved as a baseline.
+    """
+    results = {}
+    for string_size, population_size in points:
+        config = point_config(string_size, population_size, overrides)
+        name = point_name(string_size, population_size)
+        results[name] = benchmark_phases(config, repeat, phases) if any(phase != "run" for phase in phases) else {}
+        if "run" in phases:
+            results[name]["run"] = benchmark_run(config, repeat)
+        print(f"{name}: " + ", ".join(
+            f"{phase} {results[name][phase]['min']:.6f}s" for phase in phases
+        ))
+    return {
+        "version": BASELINE_FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "settings": overrides,
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD,
+                    minimum_slowdown=DEFAULT_MINIMUM_SLOWDOWN):
+    """
+    Compare the minimum time of every phase and point found in both a baseline and a new run.
+    The minimum is compared because noise from the rest of the machine only ever adds time.
+
+    Args:
+        baseline (dict): The baseline results.
+        current (dict): The new results.
+        threshold (float): The fraction a minimum time may grow by before it counts as a regression.
+        minimum_slowdown (float): The seconds a minimum time must also grow by before it counts as a regression.
+
+    Returns:
+        list: One dictionary per compared phase with the point, phase, both minimums, the ratio
+            of the new minimum to the baseline minimum, and whether it is a regression.
+    """
+    if baseline.get("version") != BASELINE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported baseline version {baseline.get('version')}")
+    comparisons = []
+    for name, phases in current["results"].items():
+        baseline_phases = baseline["results"].get(name, {})
+        for phase, summary in phases.items():
+            if phase not in baseline_phases:
+                continue
+            baseline_minimum = baseline_phases[phase]["min"]
+            ratio = summary["min"] / baseline_minimum if baseline_minimum > 0 else float("inf")
+            comparisons.append({
+                "point": name,
+                "phase": phase,
+                "baseline": baseline_minimum,
+                "current": summary["min"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold and summary["min"] - baseline_minimum > minimum_slowdown,
+            })
+    return comparisons
+
+
+def print_comparison(comparisons):
+    """
+    Print a comparison table.
+
+    Args:
+        comparisons (list): The comparisons returned by compare_results.
+    """
+    print(f"{'Point':<16} {'Phase':<28} {'Baseline':>12} {'Current':>12} {'Change':>9}")
+    for comparison in comparisons:
+        print(' '.join([
+            f"{comparison['point']:<16}",
+            f"{comparison['phase']:<28}",
+            f"{comparison['baseline']:>12.6f}",
+            f"{comparison['current']:>12.6f}",
+            f"{comparison['ratio'] - 1:>+8.1%}",
+            "REGRESSION" if comparison["regression"] else "",
+        ]).rstrip())
+
+
+def parse_setting_override(text):
+    """
+    Parse a key=value setting override given on the command line.
+
+    Args:
+        text (str): The override.
+
+    Returns:
+        tuple: The setting name and its value, as an int or float when possible.
+    """
+    key, separator, value = text.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError(f"Setting {text} must be given as key=value")
+    for convert in (int, float):
+        try:
+            return key, convert(value)
+        except ValueError:
+            pass
+    return key, value
+
+
+def main(argv=None):
+    """
+    Run the benchmark suite from the command line.
+
+    Args:
+        argv (list, optional): The command line arguments, without the program name.
+
+    Returns:
+        int: 1 if a regression was found when comparing against a baseline, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of the simple genetic algorithm.")
+    parser.add_argument("--grid", choices=["readme", "sizes", "all"], default="readme",
+                        help="the grid points to benchmark (default: readme)")
+    parser.add_argument("--string-sizes", type=int, nargs="+", help="the stringSizeN values of the sizes grid")
+    parser.add_argument("--population-sizes", type=int, nargs="+", help="the populationSizeN values of the sizes grid")
+    parser.add_argument("--phases", nargs="+", choices=PHASES, default=PHASES, help="the phases to time")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of times each phase is timed (default: 3)")
+    parser.add_argument("--set", type=parse_setting_override, action="append", default=[], metavar="KEY=VALUE",
+                        help="override a setting, for example --set genomeRepresentation=1")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="the slowdown that counts as a regression (default: 0.10 for 10%%)")
+    parser.add_argument("--min-slowdown", type=float, default=DEFAULT_MINIMUM_SLOWDOWN,
+                        help="the seconds a phase must also be slower by to count as a regression "
+                             f"(default: {DEFAULT_MINIMUM_SLOWDOWN})")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    points = grid_points(args.grid, args.string_sizes, args.population_sizes)
+    try:
+        for string_size, population_size in points:
+            point_config(string_size, population_size, dict(args.set))
+    except SettingsError as e:
+        parser.error(str(e))
+    results = run_benchmarks(points, args.repeat, args.phases, dict(args.set))
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("settings") != results["settings"]:
+            print(f"Warning: the baseline was made with settings {baseline.get('settings')}, not {results['settings']}")
+        comparisons = compare_results(baseline, results, args.threshold, args.min_slowdown)
+        print_comparison(comparisons)
+        regressions = sum(comparison["regression"] for comparison in comparisons)
+        if regressions:
+            print(f"{regressions} regression(s) slower than the baseline by more than {args.threshold:.0%} "
+                  f"and {args.min_slowdown}s")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+# Author: Daniel Glauber
+# File: checkpoint.py
+# Description: This file contains the binary checkpoint format that saves the full state of a run,
+# and the reader that memory-maps a checkpoint so a run can be resumed without loading it all at once.
+#
+# A checkpoint file holds, in order:
+#   the 8 byte magic number CHECKPOINT_MAGIC,
+#   the length of the header as an unsigned 64-bit little-endian integer,
+#   the header as UTF-8 JSON, padded with spaces to a multiple of 8 bytes,
+#   the fitness of every individual as 64-bit little-endian integers or floats,
+#   the genome of every individual packed into genome_stride bytes each,
+#   the best and then the worst genome of every generation in the stagnation window, packed the same way.
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from genome import genome_from_bytes
+
+CHECKPOINT_MAGIC = b"SGACKPT1"
+CHECKPOINT_VERSION = 1
+HEADER_LENGTH_FORMAT = "<Q"
+INTEGER_FITNESS = "q"
+FLOAT_FITNESS = "d"
+# Settings that change the course of a run, which must match when a run is resumed
+RUN_SETTINGS = [
+    "randSeed",
+    "populationSizeN",
+    "stringSizeN",
+    "probApplyCrossover",
+    "probApplyMutation",
+    "selectionMethod",
+    "tournamentSizeK",
+    "truncationSizeT",
+    "fitnessFunction",
+    "genomeRepresentation",
+    "populationEngine",
+    "mutationSampler",
+    "batchedSelection",
+    "bitMutationRate",
+    "crossoverOperator",
+    "crossoverMaskSampler",
+    "randomStreams",
+    "replacementStrategy",
+    "steadyStateChildren",
+]
+
+
+def random_state_to_json(state):
+    """
+    Convert the state of a random.Random into JSON-compatible values.
+
+    Args:
+        state (tuple): The state returned by getstate.
+
+    Returns:
+        list: The version, the internal state as a list, and the next Gaussian value.
+    """
+    version, internal_state, gauss_next = state
+    return [version, list(internal_state), gauss_next]
+
+
+def random_state_from_json(values):
+    """
+    Convert the values saved by random_state_to_json back into a random.Random state.
+
+    Args:
+        values (list): The saved values.
+
+    Returns:
+        tuple: The state to pass to setstate.
+    """
+    version, internal_state, gauss_next = values
+    return version, tuple(internal_state), gauss_next
+
+
+def fitness_type(fitness_values):
+    """
+    Choose how the fitness values are stored.
+
+    Args:
+        fitness_values (list): The fitness values.
+
+    Returns:
+        str: INTEGER_FITNESS if every value is an integer that fits in 64 bits, FLOAT_FITNESS otherwise.
+    """
+    if all(type(value) is int and -(1 << 63) <= value < (1 << 63) for value in fitness_values):
+        return INTEGER_FITNESS
+    return FLOAT_FITNESS
+
+
+def write_checkpoint(path, header, fitness_values, genomes, window_genomes):
+    """
+    Write a checkpoint, replacing the file only once it is complete so a crash never leaves a broken checkpoint.
+
+    Args:
+        path (str): The path of the checkpoint file.
+        header (dict): The state of the run that is not stored as binary data.
+        fitness_values (list): The fitness of every individual.
+        genomes (iterable): The genome of every individual.
+        window_genomes (list): The best and then the worst genome of every generation in the stagnation window.
+    """
+    header = dict(header)
+    header["version"] = CHECKPOINT_VERSION
+    header["fitness_type"] = fitness_type(fitness_values)
+    header["genome_stride"] = (header["string_size"] + 7) // 8
+    header["byteorder"] = "little"
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    header_bytes += b" " * (-len(header_bytes) % 8)
+    fitness_array = array(header["fitness_type"], fitness_values)
+    if sys.byteorder != "little":
+        fitness_array.byteswap()
+    stride = header["genome_stride"]
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as checkpoint_file:
+        checkpoint_file.write(CHECKPOINT_MAGIC)
+        checkpoint_file.write(struct.pack(HEADER_LENGTH_FORMAT, len(header_bytes)))
+        checkpoint_file.write(header_bytes)
+        fitness_array.tofile(checkpoint_file)
+        for genome in genomes:
+            checkpoint_file.write(genome.to_bytes().ljust(stride, b"\0"))
+        for genome in window_genomes:
+            checkpoint_file.write(genome.to_bytes().ljust(stride, b"\0"))
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+class CheckpointReader:
+    """
+    Memory-maps a checkpoint so its header is read up front and each genome is only read when it is needed.
+    """
+    def __init__(self, path):
+        """
+        Open a checkpoint and read its header.
+
+        Args:
+            path (str): The path of the checkpoint file.
+        """
+        self._path = path
+        with open(path, "rb") as checkpoint_file:
+            self._mmap = mmap.mmap(checkpoint_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic_end = len(CHECKPOINT_MAGIC)
+        header_start = magic_end + struct.calcsize(HEADER_LENGTH_FORMAT)
+        if bytes(self._view[:magic_end]) != CHECKPOINT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a checkpoint file")
+        (header_length,) = struct.unpack(HEADER_LENGTH_FORMAT, self._view[magic_end:header_start])
+        self._header = json.loads(bytes(self._view[header_start:header_start + header_length]))
+        if self._header.get("version") != CHECKPOINT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported checkpoint version {self._header.get('version')}")
+        self._population_size = self._header["population_size"]
+        self._string_size = self._header["string_size"]
+        self._stride = self._header["genome_stride"]
+        self._fitness_start = header_start + header_length
+        self._genomes_start = self._fitness_start + 8 * self._population_size
+        self._window_start = self._genomes_start + self._stride * self._population_size
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def header(self):
+        return self._header
+
+    @property
+    def population_size(self):
+        return self._population_size
+
+    @property
+    def string_size(self):
+        return self._string_size
+
+    def fitness_values(self):
+        """
+        Read the fitness of every individual.
+
+        Returns:
+            list: The fitness values.
+        """
+        fitness_array = array(self._header["fitness_type"])
+        fitness_array.frombytes(self._view[self._fitness_start:self._genomes_start])
+        if sys.byteorder != "little":
+            fitness_array.byteswap()
+        return fitness_array.tolist()
+
+    def genome(self, index, genome_representation):
+        """
+        Read the genome of an individual.
+
+        Args:
+            index (int): The index of the individual.
+            genome_representation (int): The representation of the genome to create.
+
+        Returns:
+            ListGenome or PackedGenome: The genome.
+        """
+        start = self._genomes_start + index * self._stride
+        return genome_from_bytes(self._view[start:start + self._stride], self._string_size, genome_representation)
+
+    def window_genome(self, index, genome_representation):
+        """
+        Read a genome of the stagnation window.
+
+        Args:
+            index (int): The index of the genome, the best genomes of the window coming before the worst.
+            genome_representation (int): The representation of the genome to create.
+
+        Returns:
+            ListGenome or PackedGenome: The genome.
+        """
+        start = self._window_start + index * self._stride
+        return genome_from_bytes(self._view[start:start + self._stride], self._string_size, genome_representation)
+
+    def check_settings(self, settings):
+        """
+        Check that the settings of a resumed run match the settings the checkpoint was made with.
+
+        Args:
+            settings (dict): The settings of the resumed run.
+        """
+        saved_settings = self._header["settings"]
+        mismatched = [key for key in RUN_SETTINGS if saved_settings.get(key) != settings.get(key)]
+        if mismatched:
+            raise ValueError(
+                f"Checkpoint {self._path} was made with different settings: " +
+                ", ".join(f"{key} {saved_settings.get(key)} instead of {settings.get(key)}" for key in mismatched)
+            )
+
+    def close(self):
+        """
+        Release the memory map.
+        """
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._mmap = None
+
+
+class LazyGeneration:
+    """
+    A generation read from a checkpoint that only creates an Individual the first time it is accessed.
+    It supports the list operations the Population uses on its current generation.
+    """
+    def __init__(self, reader, create_individual):
+        """
+        Initialize the LazyGeneration.
+
+        Args:
+            reader (CheckpointReader): The checkpoint to read the individuals from.
+            create_individual (callable): Called with the reader, the index and the fitness of an individual
+                to create the Individual.
+        """
+        self._reader = reader
+        self._create_individual = create_individual
+        self._fitness = reader.fitness_values()
+        self._individuals = {}
+
+    @property
+    def reader(self):
+        return self._reader
+
+    def __len__(self):
+        return len(self._fitness)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self._fitness)
+        individual = self._individuals.get(index)
+        if individual is None:
+            if not 0 <= index < len(self._fitness):
+                raise IndexError("Generation index out of range")
+            individual = self._create_individual(self._reader, index, self._fitness[index])
+            self._individuals[index] = individual
+        return individual
+
+    def __iter__(self):
+        for index in range(len(self._fitness)):
+            yield self[index]
+
+    def copy(self):
+        return list(self)
+
+    def fitness_values(self):
+        """
+        Get the fitness of every individual without creating the individuals.
+
+        Returns:
+            list: The fitness values.
+        """
+        values = list(self._fitness)
+        for index, individual in self._individuals.items():
+            values[index] = individual.solution_fitness
+        return values
+
+    def close(self):
+        """
+        Release the checkpoint once the generation is no longer needed.
+        """
+        self._individuals = {}
+        self._reader.close()
@@ -0,0 +1,296 @@
+# Author: Daniel Glauber
+# File: config.py
+# Description: This file contains the immutable configuration of a run of the simple genetic algorithm (SGA).
+# A configuration is built from a dictionary, a settings file or command line arguments and is validated strictly:
+# bad values raise a SettingsError instead of asking the user, and nothing is ever written to disk.
+# Every component reads its settings from the configuration it is given, so runs with different
+# configurations can coexist in one process.
+import re
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Dict, List, Optional, Union
+
+SETTINGS_THAT_MUST_BE_ONE_OR_LESS = [
+    "probApplyCrossover",
+    "probApplyMutation",
+    "bitMutationRate",
+    "minimumDiversity",
+]
+SETTINGS_THAT_MUST_BE_TWO_OR_MORE = [
+    "populationSizeN"
+]
+SETTINGS_THAT_MUST_BE_ONE_OR_MORE = [
+    "stringSizeN",
+    "tournamentSizeK",
+    "islandCount",
+    "traceGenerationInterval",
+    "traceIndividualInterval",
+    "printInterval",
+    "steadyStateChildren",
+]
+SETTINGS_THAT_MAY_BE_TEXT = [
+    "fitnessFunction",
+    "profileFile",
+    "traceFile",
+    "historyFile",
+    "checkpointFile",
+]
+# The values accepted by settings that choose between a fixed set of options
+SETTING_CHOICES = {
+    "selectionMethod": (0, 1, 2, 3),
+    "terminateOnFailure": (0, 1),
+    "genomeRepresentation": (0, 1),
+    "populationEngine": (0, 1, 2),
+    "mutationSampler": (0, 1),
+    "batchedSelection": (0, 1),
+    "crossoverOperator": (0, 1, 2),
+    "crossoverMaskSampler": (0, 1),
+    "randomStreams": (0, 1),
+    "replacementStrategy": (0, 1),
+    "diversityStatistics": (0, 1),
+    "migrationTopology": (0, 1),
+    "profilePhases": (0, 1, 2),
+    "traceEvents": (0, 1, 2),
+    "writeHistory": (0, 1, 2),
+}
+# Settings set by command line options rather than by the settings file
+COMMAND_LINE_SETTINGS = ["fullDebug", "limitedDebug", "resume"]
+
+
+class SettingsError(ValueError):
+    """
+    Raised when a configuration has an unknown setting or a value of the wrong type or out of range.
+    """
+
+
+@dataclass(frozen=True)
+class SGAConfig:
+    """
+    The settings of a run. The attributes have the names of the settings in the settings file.
+    """
+    randSeed: int = 123
+    populationSizeN: int = 100
+    stringSizeN: int = 50
+    probApplyCrossover: float = 0.6
+    probApplyMutation: float = 1.0
+    selectionMethod: int = 0
+    tournamentSizeK: int = 2
+    truncationSizeT: int = 0
+    fitnessFunction: Union[int, str] = 0
+    terminateOnFailure: int = 1
+    failuresBeforeTermination: int = 0
+    diversityStatistics: int = 0
+    minimumDiversity: float = 0.0
+    genomeRepresentation: int = 0
+    populationEngine: int = 0
+    mutationSampler: int = 1
+    batchedSelection: int = 1
+    crossoverOperator: int = 0
+    crossoverMaskSampler: int = 1
+    randomStreams: int = 1
+    replacementStrategy: int = 0
+    steadyStateChildren: int = 2
+    bitMutationRate: float = 0.0
+    fitnessCacheSize: int = 0
+    fitnessWorkers: int = 0
+    fitnessChunkSize: int = 0
+    islandCount: int = 4
+    migrationInterval: int = 5
+    migrationSize: int = 2
+    migrationTopology: int = 0
+    profilePhases: int = 0
+    profileFile: Union[int, str] = "sga_profile.json"
+    traceEvents: int = 0
+    traceFile: Union[int, str] = "sga_trace.jsonl"
+    traceGenerationInterval: int = 1
+    traceIndividualInterval: int = 1
+    printInterval: int = 1
+    writeHistory: int = 0
+    historyFile: Union[int, str] = "sga_history.jsonl"
+    checkpointInterval: int = 0
+    checkpointFile: Union[int, str] = "sga_checkpoint.bin"
+    fullDebug: bool = False
+    limitedDebug: bool = False
+    resume: bool = False
+
+    def __post_init__(self):
+        """
+        Check the type and range of every setting, converting integers given for probabilities to floats.
+        """
+        for field in fields(self):
+            name = field.name
+            value = getattr(self, name)
+            if name in COMMAND_LINE_SETTINGS:
+                if not isinstance(value, bool):
+                    raise SettingsError(f"The value for {name} must be True or False, not {value!r}")
+            elif name in SETTINGS_THAT_MUST_BE_ONE_OR_LESS:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise SettingsError(f"The value for {name} must be a number, not {value!r}")
+                if not 0.0 <= value <= 1.0:
+                    raise SettingsError(f"The value for {name} must be between 0.0 and 1.0, not {value}")
+                object.__setattr__(self, name, float(value))
+            elif name in SETTINGS_THAT_MAY_BE_TEXT:
+                if isinstance(value, bool) or not isinstance(value, (int, str)):
+                    raise SettingsError(f"The value for {name} must be an integer or text, not {value!r}")
+            else:
+                if isinstance(value, bool) or not isinstance(value, int):
+                    raise SettingsError(f"The value for {name} must be an integer, not {value!r}")
+                if name in SETTINGS_THAT_MUST_BE_TWO_OR_MORE and value < 2:
+                    raise SettingsError(f"The value for {name} must be at least 2, not {value}")
+                if name in SETTINGS_THAT_MUST_BE_ONE_OR_MORE and value < 1:
+                    raise SettingsError(f"The value for {name} must be at least 1, not {value}")
+                if name in SETTING_CHOICES and value not in SETTING_CHOICES[name]:
+                    raise SettingsError(
+                        f"Unknown {name} {value}, expected one of {', '.join(map(str, SETTING_CHOICES[name]))}"
+                    )
+                if name != "randSeed" and value < 0:
+                    raise SettingsError(f"The value for {name} cannot be negative, not {value}")
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any], strict: bool = True) -> "SGAConfig":
+        """
+        Build a configuration from a dictionary of settings. Missing settings keep their default values.
+
+        Args:
+            values (dict): The settings.
+            strict (bool, optional): Whether an unknown setting raises a SettingsError instead of being ignored.
+
+        Returns:
+            SGAConfig: The configuration.
+        """
+        unknown = [key for key in values if key not in SETTING_NAMES]
+        if unknown and strict:
+            raise SettingsError(f"Unknown settings: {', '.join(unknown)}")
+        return cls(**{key: value for key, value in values.items() if key in SETTING_NAMES})
+
+    @classmethod
+    def from_file(cls, path: str, base: Optional["SGAConfig"] = None) -> "SGAConfig":
+        """
+        Build a configuration from a settings file of "name value" lines. Blank lines are skipped,
+        the first value of a setting wins like in the settings loader, and missing settings are taken from base.
+
+        Args:
+            path (str): The path of the settings file.
+            base (SGAConfig, optional): The configuration that provides the missing settings (default: the defaults).
+
+        Returns:
+            SGAConfig: The configuration.
+        """
+        names = setting_names()
+        values = {}
+        with open(path) as settings_file:
+            for line_number, line in enumerate(settings_file, 1):
+                split_line = line.split()
+                if not split_line:
+                    continue
+                if len(split_line) != 2:
+                    raise SettingsError(f"{path} line {line_number}: expected a setting name and a value")
+                name, text = split_line
+                if name not in names:
+                    raise SettingsError(f"{path} line {line_number}: unknown setting {name}")
+                if name not in values:
+                    values[name] = parse_setting_value(name, text, f"{path} line {line_number}")
+        return (base or cls()).replace(**values)
+
+    @classmethod
+    def from_args(cls, argv: List[str], base: Optional["SGAConfig"] = None) -> "SGAConfig":
+        """
+        Build a configuration from command line arguments like the ones of sga.py: the options -g, -G
+        and --resume, and an optional settings file as the last argument.
+
+        Args:
+            argv (list): The command line arguments, without the program name.
+            base (SGAConfig, optional): The configuration that provides the settings missing from the file.
+
+        Returns:
+            SGAConfig: The configuration.
+        """
+        options = {"-g": "limitedDebug", "-G": "fullDebug", "--resume": "resume"}
+        unknown = [argument for argument in argv[:-1] if argument not in options]
+        if unknown:
+            raise SettingsError(f"Unknown options: {', '.join(unknown)}")
+        config = base or cls()
+        if argv and argv[-1] not in options:
+            config = cls.from_file(argv[-1], config)
+        return config.replace(**{options[argument]: True for argument in argv if argument in options})
+
+    def replace(self, **changes) -> "SGAConfig":
+        """
+        Get a copy of the configuration with some settings changed, validated like a new configuration.
+
+        Args:
+            **changes: The settings to change.
+
+        Returns:
+            SGAConfig: The new configuration.
+        """
+        unknown = [key for key in changes if key not in SETTING_NAMES]
+        if unknown:
+            raise SettingsError(f"Unknown settings: {', '.join(unknown)}")
+        return replace(self, **changes)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Get every setting of the configuration.
+
+        Returns:
+            dict: The settings by name.
+        """
+        return asdict(self)
+
+    def get(self, key: str) -> Any:
+        """
+        Get a setting by name, like settings_loader.get_setting.
+
+        Args:
+            key (str): The name of the setting.
+
+        Returns:
+            Any: The value of the setting.
+        """
+        if key not in SETTING_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+
+def setting_names(include_command_line: bool = False) -> List[str]:
+    """
+    Get the names of the settings in the order of the settings file.
+
+    Args:
+        include_command_line (bool, optional): Whether to include the settings set by command line options.
+
+    Returns:
+        list: The names of the settings.
+    """
+    return [
+        field.name for field in fields(SGAConfig)
+        if include_command_line or field.name not in COMMAND_LINE_SETTINGS
+    ]
+
+
+def parse_setting_value(name: str, text: str, location: str) -> Any:
+    """
+    Convert the text of a setting in a settings file to its value.
+
+    Args:
+        name (str): The name of the setting.
+        text (str): The text of the value.
+        location (str): Where the value was read, for error messages.
+
+    Returns:
+        Any: A float for probabilities, an integer or text for settings that may be text, an integer otherwise.
+    """
+    if name in SETTINGS_THAT_MUST_BE_ONE_OR_LESS:
+        try:
+            return float(text)
+        except ValueError:
+            raise SettingsError(f"{location}: the value for {name} must be a decimal number") from None
+    if re.fullmatch(r"[+-]?\d+", text):
+        return int(text)
+    if name in SETTINGS_THAT_MAY_BE_TEXT:
+        return text
+    raise SettingsError(f"{location}: the value for {name} must be an integer")
+
+
+SETTING_NAMES = frozenset(setting_names(include_command_line=True))
+DEFAULT_CONFIG = SGAConfig()
@@ -0,0 +1,115 @@
+# Author: Daniel Glauber
+# File: crossover.py
+# Description: This file contains the crossover operators, which choose the bits the two children swap.
+# Every operator returns its choice as a mask: an integer whose bit i is set when the first child takes
+# bit i from the second parent, so the children are merged a machine word at a time by the genomes.
+import random
+
+# Operator values used by the crossoverOperator setting
+UNIFORM_CROSSOVER = 0
+ONE_POINT_CROSSOVER = 1
+TWO_POINT_CROSSOVER = 2
+
+# Sampler values used by the crossoverMaskSampler setting
+BIT_MASK_SAMPLER = 0
+WORD_MASK_SAMPLER = 1
+
+
+def bitwise_uniform_mask(string_size, rng=random):
+    """
+    Choose every bit of a uniform crossover mask with its own random draw.
+    This is the original sampler, kept so older runs can be reproduced.
+
+    Args:
+        string_size (int): The size of the solution string.
+        rng (random.Random, optional): The random number generator to draw from.
+
+    Returns:
+        int: The crossover mask.
+    """
+    choices = [rng.choice([0, 1]) for i in range(string_size)]
+    return int("".join(map(str, reversed(choices))), 2) if choices else 0
+
+
+def word_uniform_mask(string_size, rng=random):
+    """
+    Draw a uniform crossover mask in a single call, which fills the mask with whole random words.
+
+    Args:
+        string_size (int): The size of the solution string.
+        rng (random.Random, optional): The random number generator to draw from.
+
+    Returns:
+        int: The crossover mask.
+    """
+    return rng.getrandbits(string_size)
+
+
+def one_point_mask(string_size, rng=random):
+    """
+    Draw a one-point crossover mask: the children swap every bit from a random cut point onwards.
+
+    Args:
+        string_size (int): The size of the solution string.
+        rng (random.Random, optional): The random number generator to draw from.
+
+    Returns:
+        int: The crossover mask, 0 if the solution is too short to be cut.
+    """
+    if string_size < 2:
+        return 0
+    point = rng.randrange(1, string_size)
+    return ((1 << string_size) - 1) ^ ((1 << point) - 1)
+
+
+def two_point_mask(string_size, rng=random):
+    """
+    Draw a two-point crossover mask: the children swap the bits between two different random cut points.
+
+    Args:
+        string_size (int): The size of the solution string.
+        rng (random.Random, optional): The random number generator to draw from.
+
+    Returns:
+        int: The crossover mask, a one-point mask if the solution is too short for two cut points.
+    """
+    if string_size < 3:
+        return one_point_mask(string_size, rng)
+    first = rng.randrange(1, string_size)
+    # The second point is drawn from the remaining points so the two are always different
+    second = rng.randrange(1, string_size - 1)
+    if second >= first:
+        second += 1
+    low, high = min(first, second), max(first, second)
+    return ((1 << high) - 1) ^ ((1 << low) - 1)
+
+
+UNIFORM_MASK_SAMPLERS = {
+    BIT_MASK_SAMPLER: bitwise_uniform_mask,
+    WORD_MASK_SAMPLER: word_uniform_mask,
+}
+
+CROSSOVER_MASKS = {
+    ONE_POINT_CROSSOVER: one_point_mask,
+    TWO_POINT_CROSSOVER: two_point_mask,
+}
+
+
+def get_crossover_mask_function(crossover_operator, mask_sampler=WORD_MASK_SAMPLER):
+    """
+    Get the mask function for the crossoverOperator and crossoverMaskSampler setting values.
+
+    Args:
+        crossover_operator (int): The crossoverOperator setting value.
+        mask_sampler (int, optional): The crossoverMaskSampler setting value, which only matters for uniform crossover.
+
+    Returns:
+        function: The mask function, called with the string size and optionally a random number generator.
+    """
+    if mask_sampler not in UNIFORM_MASK_SAMPLERS:
+        raise ValueError(f"Unknown crossoverMaskSampler {mask_sampler}")
+    if crossover_operator == UNIFORM_CROSSOVER:
+        return UNIFORM_MASK_SAMPLERS[mask_sampler]
+    if crossover_operator not in CROSSOVER_MASKS:
+        raise ValueError(f"Unknown crossoverOperator {crossover_operator}")
+    return CROSSOVER_MASKS[crossover_operator]
@@ -0,0 +1,229 @@
+# Author: Daniel Glauber
+# File: diversity.py
+# Description: This file contains the allele counts of a generation, which measure how diverse the
+# population still is. The counts are kept up to date as individuals enter and leave the generation,
+# so the diversity of a generation costs O(L) instead of comparing every pair of individuals.
+from operator import add
+from genome import MASK_DIGITS_TO_CHOICES
+
+# Values used by the diversityStatistics setting
+DIVERSITY_STATISTICS_OFF = 0
+DIVERSITY_STATISTICS_ON = 1
+
+
+def diversity_from_counts(counts, population_size):
+    """
+    Get the diversity statistics of a generation from the number of individuals carrying a 1 at every locus.
+
+    Args:
+        counts (list): The number of individuals carrying a 1, by locus.
+        population_size (int): The number of individuals of the generation.
+
+    Returns:
+        dict: The bitwise diversity, from 0.0 when every locus has converged to 1.0 when every locus is split
+            half and half, the mean Hamming distance between two different individuals, and the number
+            of converged loci, at which every individual carries the same bit.
+    """
+    string_size = len(counts)
+    # Every locus makes count * (population_size - count) of the pairs of individuals differ
+    differing_pairs = sum(count * (population_size - count) for count in counts)
+    pairs = population_size * (population_size - 1) // 2
+    return {
+        "diversity": 4 * differing_pairs / (population_size * population_size * string_size) if string_size else 0.0,
+        "mean_hamming_distance": differing_pairs / pairs if pairs else 0.0,
+        "converged_loci": sum(1 for count in counts if count == 0 or count == population_size),
+    }
+
+
+class AlleleCounts:
+    """
+    Counts the individuals of a generation carrying a 1 at every locus. The counts are kept bit-sliced:
+    plane j holds bit j of the count of every locus, so a whole genome is added with a few operations
+    on its packed bits rather than one per locus.
+    Genomes are added in carry-save fashion: a genome waits at level 0 for a second one, and the pair
+    goes through a full adder with plane 0 whose carry moves on to wait at level 1, and so on.
+    Adding a genome then costs about one full adder however large the counts grow.
+    """
+    enabled = True
+
+    def __init__(self, string_size=0):
+        """
+        Initialize empty AlleleCounts.
+
+        Args:
+            string_size (int, optional): The size of the solution string.
+        """
+        self.string_size = string_size
+        self.reset()
+
+    def reset(self):
+        """
+        Forget every genome added so far.
+        """
+        self.count = 0
+        self._planes = []
+        # The packed bits waiting at every level for a second word of the same weight, or 0
+        self._waiting = []
+
+    def add(self, genome):
+        """
+        Add the bits of a genome to the counts.
+
+        Args:
+            genome (ListGenome or PackedGenome): The genome.
+        """
+        self.count += 1
+        planes = self._planes
+        waiting = self._waiting
+        word = genome.to_int()
+        level = 0
+        while word:
+            if level == len(planes):
+                planes.append(0)
+                waiting.append(0)
+            other = waiting[level]
+            if not other:
+                waiting[level] = word
+                return
+            waiting[level] = 0
+            # Full adder of the plane and the two words: the sum stays in the plane, the carry moves up a level
+            plane = planes[level]
+            half_sum = word ^ other
+            planes[level] = plane ^ half_sum
+            word = (word & other) | (plane & half_sum)
+            level += 1
+
+    def _flush(self):
+        """
+        Add the words still waiting at every level into the planes.
+        """
+        planes = self._planes
+        for level, word in enumerate(self._waiting):
+            self._waiting[level] = 0
+            plane_index = level
+            while word:
+                if plane_index == len(planes):
+                    planes.append(0)
+                    self._waiting.append(0)
+                plane = planes[plane_index]
+                planes[plane_index] = plane ^ word
+                word &= plane
+                plane_index += 1
+
+    def remove(self, genome):
+        """
+        Remove the bits of a genome added before from the counts.
+
+        Args:
+            genome (ListGenome or PackedGenome): The genome.
+        """
+        self._flush()
+        self.count -= 1
+        planes = self._planes
+        borrow = genome.to_int()
+        for plane_index, plane in enumerate(planes):
+            if not borrow:
+                break
+            planes[plane_index] = plane ^ borrow
+            borrow &= ~plane
+
+    def replace(self, old_genome, new_genome):
+        """
+        Replace the bits of a genome added before with the bits of another genome.
+
+        Args:
+            old_genome (ListGenome or PackedGenome): The genome that leaves the generation.
+            new_genome (ListGenome or PackedGenome): The genome that takes its place.
+        """
+        self.remove(old_genome)
+        self.add(new_genome)
+
+    def add_generation(self, generation):
+        """
+        Reset the counts and add the genome of every individual of a generation.
+
+        Args:
+            generation (iterable): The individuals of the generation.
+        """
+        self.add_genomes(individual.genome for individual in generation)
+
+    def add_genomes(self, genomes):
+        """
+        Reset the counts and add every genome of a generation.
+
+        Args:
+            genomes (iterable): The genomes of the generation.
+        """
+        self.reset()
+        for genome in genomes:
+            self.add(genome)
+
+    def counts(self):
+        """
+        Get the number of individuals carrying a 1 at every locus.
+
+        Returns:
+            list: The counts, by locus.
+        """
+        self._flush()
+        counts = [0] * self.string_size
+        for plane_index, plane in enumerate(self._planes):
+            # The binary digits of the plane are reversed so byte i is the bit of locus i
+            bits = format(plane, f"0{self.string_size}b")[::-1].encode().translate(MASK_DIGITS_TO_CHOICES)
+            counts = list(map(add, counts, map((1 << plane_index).__mul__, bits)))
+        return counts
+
+    def as_dict(self):
+        """
+        Get the diversity statistics of the counted generation.
+
+        Returns:
+            dict: The diversity, mean Hamming distance and converged loci, see diversity_from_counts.
+        """
+        return diversity_from_counts(self.counts(), self.count)
+
+
+class NullAlleleCounts:
+    """
+    Allele counts used when the diversity statistics are off. They count nothing.
+    """
+    enabled = False
+
+    def reset(self):
+        pass
+
+    def add(self, genome):
+        pass
+
+    def replace(self, old_genome, new_genome):
+        pass
+
+    def add_generation(self, generation):
+        pass
+
+    def add_genomes(self, genomes):
+        pass
+
+    def as_dict(self):
+        return None
+
+
+NULL_ALLELE_COUNTS = NullAlleleCounts()
+
+
+def create_allele_counts(diversity_statistics, string_size):
+    """
+    Get the allele counts of a generation for a diversityStatistics setting value.
+
+    Args:
+        diversity_statistics (int): The diversityStatistics setting value.
+        string_size (int): The size of the solution string.
+
+    Returns:
+        AlleleCounts or NullAlleleCounts: New AlleleCounts, or the shared NullAlleleCounts when the statistics are off.
+    """
+    if diversity_statistics == DIVERSITY_STATISTICS_OFF:
+        return NULL_ALLELE_COUNTS
+    if diversity_statistics == DIVERSITY_STATISTICS_ON:
+        return AlleleCounts(string_size)
+    raise ValueError(f"Unknown diversityStatistics {diversity_statistics}")
@@ -0,0 +1,290 @@
+# Author: Daniel Glauber
+# File: fitness.py
+# Description: This file contains the fitness functions used to evaluate individual solutions.
+import importlib
+import importlib.util
+import os
+from collections import OrderedDict
+
+
+class FitnessFunction:
+    """
+    Base class for fitness functions.
+    A fitness function must implement evaluate. It may also implement delta, which updates
+    a known fitness from the bits that changed instead of evaluating the whole solution again.
+    """
+    # The name the fitness function is registered under
+    name = None
+    # Whether delta is implemented
+    supports_delta = False
+    # delta is only used when at most this fraction of the bits changed, above it evaluate is cheaper
+    max_delta_fraction = 1.0
+
+    def evaluate(self, genome):
+        """
+        Evaluate the fitness of a whole solution.
+
+        Args:
+            genome (ListGenome or PackedGenome): The solution to evaluate.
+
+        Returns:
+            int: The fitness of the solution.
+        """
+        raise NotImplementedError
+
+    def delta(self, fitness, genome, changed_positions, old_values):
+        """
+        Update the fitness of a solution after some of its bits changed.
+
+        Args:
+            fitness (int): The fitness of the solution before the change.
+            genome (ListGenome or PackedGenome): The solution after the change.
+            changed_positions (list): The indexes of the bits that changed.
+            old_values (list): The value of each changed bit before the change.
+
+        Returns:
+            int: The fitness of the changed solution.
+        """
+        raise NotImplementedError
+
+    def use_delta(self, changed_count, string_size):
+        """
+        Check whether delta should be used for a change of the given size.
+
+        Args:
+            changed_count (int): The number of bits that changed.
+            string_size (int): The size of the solution string.
+
+        Returns:
+            bool: True if delta is cheaper than evaluating the whole solution.
+        """
+        return self.supports_delta and changed_count <= self.max_delta_fraction * string_size
+
+
+class OneMax(FitnessFunction):
+    """
+    The fitness of a solution is the number of bits set to 1.
+    """
+    name = "onemax"
+    supports_delta = True
+    # A full evaluation is a popcount over stringSizeN / 64 machine words
+    max_delta_fraction = 1 / 64
+
+    def evaluate(self, genome):
+        return genome.count_ones()
+
+    def delta(self, fitness, genome, changed_positions, old_values):
+        # Every bit that was 1 loses a point and every bit that was 0 gains one
+        ones_lost = sum(old_values)
+        return fitness + len(old_values) - 2 * ones_lost
+
+
+class CallableFitness(FitnessFunction):
+    """
+    Wraps a plain function that takes the solution as a list of integers and returns its fitness.
+    """
+    def __init__(self, function, name=None):
+        """
+        Initialize the CallableFitness with the function to call.
+
+        Args:
+            function (callable): The function that evaluates a solution.
+            name (str, optional): The name of the fitness function.
+        """
+        self._function = function
+        self.name = name if name is not None else getattr(function, "__name__", None)
+
+    def evaluate(self, genome):
+        return self._function(genome.to_list())
+
+
+class CachedFitnessFunction(FitnessFunction):
+    """
+    Wraps a fitness function with a size-bounded least recently used cache keyed by a hash of the solution.
+    """
+    def __init__(self, fitness_function, max_size):
+        """
+        Initialize the cache around a fitness function.
+
+        Args:
+            fitness_function (FitnessFunction): The fitness function to cache.
+            max_size (int): The maximum number of cached solutions.
+        """
+        if max_size < 1:
+            raise ValueError("The fitness cache size must be at least 1")
+        self._fitness_function = fitness_function
+        self._max_size = max_size
+        self._cache = OrderedDict()
+        self.name = fitness_function.name
+        self.supports_delta = fitness_function.supports_delta
+        self.max_delta_fraction = fitness_function.max_delta_fraction
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def fitness_function(self):
+        return self._fitness_function
+
+    def evaluate(self, genome):
+        key, fitness = self.lookup(genome)
+        if fitness is None:
+            fitness = self._fitness_function.evaluate(genome)
+            self.store(key, fitness)
+        return fitness
+
+    def lookup(self, genome):
+        """
+        Look up the cached fitness of a solution.
+
+        Args:
+            genome (ListGenome or PackedGenome): The solution to look up.
+
+        Returns:
+            tuple: The cache key of the solution and its cached fitness, or None on a miss.
+        """
+        key = genome.fingerprint()
+        cache = self._cache
+        if key in cache:
+            self.hits += 1
+            cache.move_to_end(key)
+            return key, cache[key]
+        self.misses += 1
+        return key, None
+
+    def store(self, key, fitness):
+        """
+        Store the fitness of a solution, evicting the least recently used entry when the cache is full.
+
+        Args:
+            key (tuple): The cache key returned by lookup.
+            fitness (int): The fitness of the solution.
+        """
+        cache = self._cache
+        cache[key] = fitness
+        if len(cache) > self._max_size:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    def delta(self, fitness, genome, changed_positions, old_values):
+        return self._fitness_function.delta(fitness, genome, changed_positions, old_values)
+
+    def cache_info(self):
+        """
+        Get the cache statistics.
+
+        Returns:
+            dict: The hits, misses, evictions, current size and maximum size of the cache.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+            "max_size": self._max_size
+        }
+
+
+# Registered fitness functions by name, and the names of the fitnessFunction integer values
+FITNESS_FUNCTIONS = {}
+FITNESS_FUNCTION_IDS = {}
+
+
+def register_fitness_function(name, fitness_function, fitness_function_id=None):
+    """
+    Register a fitness function so it can be selected with the fitnessFunction setting.
+
+    Args:
+        name (str): The name of the fitness function.
+        fitness_function (FitnessFunction or callable): The fitness function, or a function that takes the
+            solution as a list of integers and returns its fitness.
+        fitness_function_id (int, optional): An integer value that also selects the fitness function.
+
+    Returns:
+        FitnessFunction: The registered fitness function.
+    """
+    if isinstance(fitness_function, type) and issubclass(fitness_function, FitnessFunction):
+        fitness_function = fitness_function()
+    if not isinstance(fitness_function, FitnessFunction):
+        if not callable(fitness_function):
+            raise ValueError(f"Fitness function {name} is not callable")
+        fitness_function = CallableFitness(fitness_function, name)
+    if fitness_function.name is None:
+        fitness_function.name = name
+    FITNESS_FUNCTIONS[name] = fitness_function
+    if fitness_function_id is not None:
+        FITNESS_FUNCTION_IDS[fitness_function_id] = name
+    return fitness_function
+
+
+def load_fitness_function(path):
+    """
+    Import a user-supplied fitness function given as module:callable and register it under that path.
+    The module can be a module name or the path of a Python file ending in .py.
+
+    Args:
+        path (str): The module and attribute name separated by a colon.
+
+    Returns:
+        FitnessFunction: The loaded fitness function.
+    """
+    module_name, _, attribute_name = path.rpartition(":")
+    if not module_name or not attribute_name:
+        raise ValueError(f"Fitness function {path} must be given as module:callable")
+    try:
+        if module_name.endswith(".py"):
+            # The module is given as the path of a Python file
+            spec = importlib.util.spec_from_file_location(os.path.basename(module_name)[:-3], module_name)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            module = importlib.import_module(module_name)
+    except (ImportError, OSError) as e:
+        raise ValueError(f"Could not import fitness function module {module_name}: {e}")
+    if not hasattr(module, attribute_name):
+        raise ValueError(f"Module {module_name} has no fitness function {attribute_name}")
+    return register_fitness_function(path, getattr(module, attribute_name))
+
+
+def get_fitness_function(fitness_function_value):
+    """
+    Get the fitness function for a fitnessFunction setting value.
+
+    Args:
+        fitness_function_value (int, str or FitnessFunction): An integer id, a registered name,
+            a module:callable path, or a fitness function that is returned unchanged.
+
+    Returns:
+        FitnessFunction: The fitness function.
+    """
+    if isinstance(fitness_function_value, FitnessFunction):
+        return fitness_function_value
+    if isinstance(fitness_function_value, int):
+        if fitness_function_value not in FITNESS_FUNCTION_IDS:
+            raise ValueError(f"Unknown fitnessFunction {fitness_function_value}")
+        return FITNESS_FUNCTIONS[FITNESS_FUNCTION_IDS[fitness_function_value]]
+    if fitness_function_value in FITNESS_FUNCTIONS:
+        return FITNESS_FUNCTIONS[fitness_function_value]
+    if ":" in fitness_function_value:
+        return load_fitness_function(fitness_function_value)
+    raise ValueError(f"Unknown fitnessFunction {fitness_function_value}")
+
+
+def create_fitness_function(fitness_function_value, cache_size=0):
+    """
+    Get the fitness function for a fitnessFunction setting value, wrapped in a cache when requested.
+
+    Args:
+        fitness_function_value (int, str or FitnessFunction): The fitnessFunction setting value.
+        cache_size (int, optional): The maximum number of cached solutions, 0 disables the cache.
+
+    Returns:
+        FitnessFunction: The fitness function.
+    """
+    fitness_function = get_fitness_function(fitness_function_value)
+    if cache_size > 0:
+        return CachedFitnessFunction(fitness_function, cache_size)
+    return fitness_function
+
+
+register_fitness_function("onemax", OneMax(), 0)
@@ -0,0 +1,111 @@
+# Author: Daniel Glauber
+# File: fitness_heap.py
+# Description: This file contains the fitness index used by steady-state replacement, which keeps the
+# individuals of a generation ordered by fitness so the worst and the best are found without a full scan.
+import heapq
+
+
+class FitnessHeap:
+    """
+    Keeps the fitness of every individual of a generation in a min-heap and a max-heap of (fitness, index)
+    entries, with the sums needed for the mean and variance, so the worst and the best individual are known
+    in O(1) and replacing an individual costs O(log n).
+    An update pushes new entries instead of moving the old ones, which leaves the heaps to the heapq module.
+    The old entries are only dropped when they reach the top, and an entry is current while the fitness
+    of its index still equals its own. Equal fitness goes to the lowest index.
+    """
+    def __init__(self, fitness_values):
+        """
+        Initialize the FitnessHeap.
+
+        Args:
+            fitness_values (iterable): The fitness of every individual of the generation in index order.
+        """
+        self._fitness = list(fitness_values)
+        self._rebuild()
+        self._total = sum(self._fitness)
+        self._total_of_squares = sum(fitness * fitness for fitness in self._fitness)
+
+    def _rebuild(self):
+        """
+        Build both heaps from the current fitness values, which drops every outdated entry.
+        """
+        self._worst_heap = [(fitness, index) for index, fitness in enumerate(self._fitness)]
+        # Negated fitness puts the highest fitness on top of the min-heap
+        self._best_heap = [(-fitness, index) for index, fitness in enumerate(self._fitness)]
+        heapq.heapify(self._worst_heap)
+        heapq.heapify(self._best_heap)
+
+    def _top_index(self, heap, sign):
+        """
+        Drop the outdated entries from the top of a heap.
+
+        Args:
+            heap (list): The heap.
+            sign (int): 1 for the min-heap, -1 for the max-heap, whose fitness is negated.
+
+        Returns:
+            int: The index on top of the heap.
+        """
+        fitness = self._fitness
+        key, index = heap[0]
+        while fitness[index] * sign != key:
+            heapq.heappop(heap)
+            key, index = heap[0]
+        return index
+
+    @property
+    def fitness_values(self):
+        return self._fitness
+
+    @property
+    def worst_index(self):
+        return self._top_index(self._worst_heap, 1)
+
+    @property
+    def best_index(self):
+        return self._top_index(self._best_heap, -1)
+
+    @property
+    def worst(self):
+        return self._fitness[self.worst_index]
+
+    @property
+    def best(self):
+        return self._fitness[self.best_index]
+
+    def __len__(self):
+        return len(self._fitness)
+
+    def update(self, index, fitness):
+        """
+        Change the fitness of an individual, as when it is replaced by a child.
+
+        Args:
+            index (int): The index of the individual.
+            fitness (int): Its new fitness.
+        """
+        old_fitness = self._fitness[index]
+        self._fitness[index] = fitness
+        self._total += fitness - old_fitness
+        self._total_of_squares += fitness * fitness - old_fitness * old_fitness
+        if len(self._worst_heap) > 2 * len(self._fitness):
+            self._rebuild()
+        else:
+            heapq.heappush(self._worst_heap, (fitness, index))
+            heapq.heappush(self._best_heap, (-fitness, index))
+
+    def fill_statistics(self, statistics):
+        """
+        Overwrite generation statistics with the statistics of the indexed fitness values.
+
+        Args:
+            statistics (GenerationStatistics): The statistics to overwrite.
+        """
+        statistics.count = len(self._fitness)
+        statistics.total = self._total
+        statistics.total_of_squares = self._total_of_squares
+        statistics.best = self.best
+        statistics.best_index = self.best_index
+        statistics.worst = self.worst
+        statistics.worst_index = self.worst_index
@@ -0,0 +1,93 @@
+# Author: Daniel Glauber
+# File: generation_statistics.py
+# Description: This file contains the collector that keeps the fitness statistics of a generation
+# up to date as individuals are added to it.
+
+
+class GenerationStatistics:
+    """
+    Keeps the best, worst, mean and variance of the fitness of a generation, and the indexes of the
+    best and worst individuals, updating them in O(1) as each individual is added.
+    When several individuals share the best or worst fitness, the one added first is kept,
+    which matches max() and min() over the generation in index order.
+    """
+    def __init__(self):
+        """
+        Initialize an empty GenerationStatistics.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Forget every individual added so far.
+        """
+        self.count = 0
+        self.total = 0
+        self.total_of_squares = 0
+        self.best = None
+        self.best_index = None
+        self.worst = None
+        self.worst_index = None
+
+    def add(self, index, fitness):
+        """
+        Add the fitness of an individual to the statistics.
+
+        Args:
+            index (int): The index of the individual in its generation.
+            fitness (int): The fitness of the individual.
+        """
+        self.count += 1
+        self.total += fitness
+        self.total_of_squares += fitness * fitness
+        if self.best is None or fitness > self.best:
+            self.best = fitness
+            self.best_index = index
+        if self.worst is None or fitness < self.worst:
+            self.worst = fitness
+            self.worst_index = index
+
+    def add_generation(self, generation):
+        """
+        Reset the statistics and add every individual of a generation in index order.
+
+        Args:
+            generation (list): The individuals of the generation.
+        """
+        self.add_fitness_values(individual.get_solution_fitness() for individual in generation)
+
+    def add_fitness_values(self, fitness_values):
+        """
+        Reset the statistics and add the fitness of every individual of a generation in index order.
+
+        Args:
+            fitness_values (iterable): The fitness of every individual of the generation.
+        """
+        self.reset()
+        for index, fitness in enumerate(fitness_values):
+            self.add(index, fitness)
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    @property
+    def variance(self):
+        # Computed from the sums so integer fitness values give an exact result
+        return (self.count * self.total_of_squares - self.total * self.total) / (self.count * self.count)
+
+    def as_dict(self):
+        """
+        Get the statistics as a dictionary.
+
+        Returns:
+            dict: The best, average, worst and variance of the fitness, and the indexes of the best and worst individuals.
+        """
+        return {
+            "best": self.best,
+            "best_index": self.best_index,
+            "average": self.mean,
+            "worst": self.worst,
+            "worst_index": self.worst_index,
+            "variance": self.variance,
+        }
@@ -0,0 +1,483 @@
+# Author: Daniel Glauber
+# File: genome.py
+# Description: This file contains the storage backends for an individual's binary solution string.
+
+import hashlib
+from operator import ne
+
+# Genome representation values used by the genomeRepresentation setting
+LIST_GENOME = 0
+PACKED_GENOME = 1
+
+# Turns the "0" and "1" digits of a crossover mask into the index of the parent a child takes each bit from
+MASK_DIGITS_TO_CHOICES = bytes.maketrans(b"01", b"\x00\x01")
+# Turns the bits of a ListGenome back into "0" and "1" digits
+BITS_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+try:
+    # int.bit_count is only available from Python 3.10 onwards
+    popcount = int.bit_count
+except AttributeError:
+    def popcount(value):
+        """
+        Count the number of set bits in a non-negative integer.
+
+        Args:
+            value (int): The integer to count the set bits of.
+
+        Returns:
+            int: The number of set bits.
+        """
+        return bin(value).count("1")
+
+
+def set_bit_positions(value):
+    """
+    Get the indexes of the set bits of a non-negative integer.
+
+    Args:
+        value (int): The integer.
+
+    Returns:
+        list: The indexes of the set bits in increasing order.
+    """
+    positions = []
+    # Peel off the lowest set bit each time, so the cost grows with the number of set bits
+    while value:
+        lowest_bit = value & -value
+        positions.append(lowest_bit.bit_length() - 1)
+        value ^= lowest_bit
+    return positions
+
+
+class ListGenome:
+    """
+    Stores a solution as a list of integers, one per bit.
+    """
+    __slots__ = ("_bits",)
+
+    def __init__(self, bits=None):
+        """
+        Initialize a ListGenome from a list of bits.
+
+        Args:
+            bits (list, optional): The bits of the solution as a list of integers.
+        """
+        self._bits = [] if bits is None else list(bits)
+
+    def __len__(self):
+        return len(self._bits)
+
+    def __eq__(self, other):
+        return isinstance(other, ListGenome) and self._bits == other._bits
+
+    def copy(self):
+        """
+        Get a copy of the genome.
+
+        Returns:
+            ListGenome: A copy of the genome.
+        """
+        return ListGenome(self._bits)
+
+    def copy_from(self, other):
+        """
+        Overwrite the bits of this genome with the bits of another genome, reusing this genome's list.
+
+        Args:
+            other (ListGenome): The genome to copy.
+        """
+        self._bits[:] = other._bits
+
+    def to_list(self):
+        """
+        Get the bits of the genome as a new list of integers.
+
+        Returns:
+            list: The bits of the genome.
+        """
+        return self._bits.copy()
+
+    def fingerprint(self):
+        """
+        Get a hash that identifies the bits of the genome.
+
+        Returns:
+            tuple: The size of the genome and a 128-bit digest of its bits.
+        """
+        return len(self._bits), hashlib.blake2b(bytes(self._bits), digest_size=16).digest()
+
+    def to_bytes(self):
+        """
+        Pack the bits of the genome into bytes, bit i of the genome being bit i % 8 of byte i // 8.
+
+        Returns:
+            bytes: The packed bits.
+        """
+        return PackedGenome(self._bits).to_bytes()
+
+    def as_string(self):
+        """
+        Get the bits of the genome as a comma-separated string.
+
+        Returns:
+            str: The genome as a string.
+        """
+        return ",".join(map(str, self._bits))
+
+    def count_ones(self):
+        """
+        Count the number of bits set to 1.
+
+        Returns:
+            int: The number of set bits.
+        """
+        return sum(self._bits)
+
+    def to_int(self):
+        """
+        Pack the bits of the genome into an integer, bit i of the genome being bit i of the integer.
+
+        Returns:
+            int: The packed bits.
+        """
+        return int(bytes(self._bits).translate(BITS_TO_DIGITS)[::-1], 2) if self._bits else 0
+
+    def get_bit(self, index):
+        """
+        Get the value of a single bit.
+
+        Args:
+            index (int): The index of the bit.
+
+        Returns:
+            int: The value of the bit.
+        """
+        return self._bits[index]
+
+    def flip(self, positions):
+        """
+        Flip the bits at the given positions.
+
+        Args:
+            positions (iterable): The indexes of the bits to flip.
+        """
+        bits = self._bits
+        for index in positions:
+            bits[index] ^= 1
+
+    def count_differences(self, other):
+        """
+        Count the bits that differ between two genomes of the same size.
+
+        Args:
+            other (ListGenome): The genome to compare with.
+
+        Returns:
+            int: The number of differing bits.
+        """
+        return sum(map(ne, self._bits, other._bits))
+
+    def differing_positions(self, other):
+        """
+        Get the indexes of the bits that differ between two genomes of the same size.
+
+        Args:
+            other (ListGenome): The genome to compare with.
+
+        Returns:
+            list: The indexes of the differing bits in increasing order.
+        """
+        return [index for index, (a, b) in enumerate(zip(self._bits, other._bits)) if a != b]
+
+    def masked_differing_positions(self, other, mask):
+        """
+        Get the indexes of the bits that differ between two genomes of the same size among the bits of a mask.
+        Only the bits of the mask are looked at, so the cost grows with the number of bits the mask sets.
+
+        Args:
+            other (ListGenome): The genome to compare with.
+            mask (int): Bit i is set when bit i is compared.
+
+        Returns:
+            list: The indexes of the differing bits in increasing order.
+        """
+        bits, other_bits = self._bits, other._bits
+        return [index for index in set_bit_positions(mask) if bits[index] != other_bits[index]]
+
+    def cross(self, other, mask):
+        """
+        Combine two genomes into two new child genomes.
+
+        Args:
+            other (ListGenome): The second parent genome.
+            mask (int): Bit i is set when the first child takes bit i from other.
+
+        Returns:
+            tuple: The two child genomes.
+        """
+        child_a, child_b = ListGenome(), ListGenome()
+        self.cross_into(other, mask, child_a, child_b)
+        return child_a, child_b
+
+    def cross_into(self, other, mask, child_a, child_b):
+        """
+        Combine two genomes, overwriting two existing genomes with the children.
+        The lists of the children are reused, so no genome is created.
+
+        Args:
+            other (ListGenome): The second parent genome.
+            mask (int): Bit i is set when the first child takes bit i from other.
+            child_a (ListGenome): The genome that receives the first child, which must not be a parent.
+            child_b (ListGenome): The genome that receives the second child, which must not be a parent.
+        """
+        parents = (self._bits, other._bits)
+        # One 0/1 byte per bit, bit 0 of the mask first
+        size = len(self._bits)
+        choices = format(mask, f"0{size}b")[:-size - 1:-1].encode().translate(MASK_DIGITS_TO_CHOICES)
+        child_a._bits[:] = [parents[choice][index] for index, choice in enumerate(choices)]
+        child_b._bits[:] = [parents[choice ^ 1][index] for index, choice in enumerate(choices)]
+
+
+class PackedGenome:
+    """
+    Stores a solution as the bits of a single arbitrary-precision integer.
+    Bit i of the solution is bit i of the integer.
+    """
+    __slots__ = ("_value", "_size")
+
+    def __init__(self, bits=None, size=None, value=None):
+        """
+        Initialize a PackedGenome from a list of bits or from an already packed integer.
+
+        Args:
+            bits (list, optional): The bits of the solution as a list of integers.
+            size (int, optional): The number of bits when value is given.
+            value (int, optional): The packed bits of the solution.
+        """
+        if value is not None:
+            self._value = value
+            self._size = size
+        else:
+            bits = [] if bits is None else bits
+            self._size = len(bits)
+            self._value = int("".join(map(str, reversed(bits))), 2) if bits else 0
+
+    def __len__(self):
+        return self._size
+
+    def __eq__(self, other):
+        return isinstance(other, PackedGenome) and self._size == other._size and self._value == other._value
+
+    @property
+    def value(self):
+        return self._value
+
+    def copy(self):
+        """
+        Get a copy of the genome.
+
+        Returns:
+            PackedGenome: A copy of the genome.
+        """
+        # Integers are immutable, so the copy can share the value
+        return PackedGenome(size=self._size, value=self._value)
+
+    def copy_from(self, other):
+        """
+        Overwrite the bits of this genome with the bits of another genome.
+
+        Args:
+            other (PackedGenome): The genome to copy.
+        """
+        self._value = other._value
+        self._size = other._size
+
+    def to_list(self):
+        """
+        Get the bits of the genome as a new list of integers.
+
+        Returns:
+            list: The bits of the genome.
+        """
+        if not self._size:
+            return []
+        return [int(bit) for bit in reversed(format(self._value, f"0{self._size}b"))]
+
+    def fingerprint(self):
+        """
+        Get a hash that identifies the bits of the genome.
+
+        Returns:
+            tuple: The size of the genome and a 128-bit digest of its bits.
+        """
+        return self._size, hashlib.blake2b(self.to_bytes(), digest_size=16).digest()
+
+    def to_bytes(self):
+        """
+        Pack the bits of the genome into bytes, bit i of the genome being bit i % 8 of byte i // 8.
+
+        Returns:
+            bytes: The packed bits.
+        """
+        return self._value.to_bytes((self._size + 7) // 8, "little")
+
+    def as_string(self):
+        """
+        Get the bits of the genome as a comma-separated string.
+
+        Returns:
+            str: The genome as a string.
+        """
+        if not self._size:
+            return ""
+        return ",".join(reversed(format(self._value, f"0{self._size}b")))
+
+    def count_ones(self):
+        """
+        Count the number of bits set to 1.
+
+        Returns:
+            int: The number of set bits.
+        """
+        return popcount(self._value)
+
+    def to_int(self):
+        """
+        Get the packed bits of the genome, bit i of the genome being bit i of the integer.
+
+        Returns:
+            int: The packed bits.
+        """
+        return self._value
+
+    def get_bit(self, index):
+        """
+        Get the value of a single bit.
+
+        Args:
+            index (int): The index of the bit.
+
+        Returns:
+            int: The value of the bit.
+        """
+        return (self._value >> index) & 1
+
+    def flip(self, positions):
+        """
+        Flip the bits at the given positions.
+
+        Args:
+            positions (iterable): The indexes of the bits to flip.
+        """
+        mask = 0
+        for index in positions:
+            mask |= 1 << index
+        self._value ^= mask
+
+    def count_differences(self, other):
+        """
+        Count the bits that differ between two genomes of the same size.
+
+        Args:
+            other (PackedGenome): The genome to compare with.
+
+        Returns:
+            int: The number of differing bits.
+        """
+        return popcount(self._value ^ other._value)
+
+    def differing_positions(self, other):
+        """
+        Get the indexes of the bits that differ between two genomes of the same size.
+
+        Args:
+            other (PackedGenome): The genome to compare with.
+
+        Returns:
+            list: The indexes of the differing bits in increasing order.
+        """
+        return set_bit_positions(self._value ^ other._value)
+
+    def masked_differing_positions(self, other, mask):
+        """
+        Get the indexes of the bits that differ between two genomes of the same size among the bits of a mask.
+
+        Args:
+            other (PackedGenome): The genome to compare with.
+            mask (int): Bit i is set when bit i is compared.
+
+        Returns:
+            list: The indexes of the differing bits in increasing order.
+        """
+        return set_bit_positions((self._value ^ other._value) & mask)
+
+    def cross(self, other, mask):
+        """
+        Combine two genomes into two new child genomes.
+
+        Args:
+            other (PackedGenome): The second parent genome.
+            mask (int): Bit i is set when the first child takes bit i from other.
+
+        Returns:
+            tuple: The two child genomes.
+        """
+        child_a, child_b = PackedGenome(), PackedGenome()
+        self.cross_into(other, mask, child_a, child_b)
+        return child_a, child_b
+
+    def cross_into(self, other, mask, child_a, child_b):
+        """
+        Combine two genomes by merging their integers through the mask, overwriting two existing genomes
+        with the children. The cost grows with the number of machine words of the genome, not of bits.
+
+        Args:
+            other (PackedGenome): The second parent genome.
+            mask (int): Bit i is set when the first child takes bit i from other.
+            child_a (PackedGenome): The genome that receives the first child.
+            child_b (PackedGenome): The genome that receives the second child.
+        """
+        # Only the differing bits the mask selects are swapped
+        swapped = (self._value ^ other._value) & mask
+        child_a._value, child_b._value = self._value ^ swapped, other._value ^ swapped
+        child_a._size = child_b._size = self._size
+
+
+def make_genome(bits, genome_representation=LIST_GENOME):
+    """
+    Create a genome of the requested representation from a list of bits.
+
+    Args:
+        bits (list): The bits of the solution as a list of integers.
+        genome_representation (int): LIST_GENOME or PACKED_GENOME.
+
+    Returns:
+        ListGenome or PackedGenome: The new genome.
+    """
+    if genome_representation == PACKED_GENOME:
+        return PackedGenome(bits)
+    if genome_representation == LIST_GENOME:
+        return ListGenome(bits)
+    raise ValueError(f"Unknown genome representation {genome_representation}")
+
+
+def genome_from_bytes(data, size, genome_representation=LIST_GENOME):
+    """
+    Create a genome of the requested representation from bits packed by to_bytes.
+
+    Args:
+        data (bytes-like): The packed bits, bit i being bit i % 8 of byte i // 8.
+        size (int): The number of bits.
+        genome_representation (int): LIST_GENOME or PACKED_GENOME.
+
+    Returns:
+        ListGenome or PackedGenome: The new genome.
+    """
+    genome = PackedGenome(size=size, value=int.from_bytes(data, "little"))
+    if genome_representation == PACKED_GENOME:
+        return genome
+    if genome_representation == LIST_GENOME:
+        return ListGenome(genome.to_list())
+    raise ValueError(f"Unknown genome representation {genome_representation}")
@@ -0,0 +1,240 @@
+# Author: Daniel Glauber
+# File: history.py
+# Description: This file contains the generation history writer, which streams one record per generation
+# to a buffered JSON lines file, and the fixed-size window of recent generations used to detect stagnation.
+import json
+
+# Values used by the writeHistory setting
+HISTORY_OFF = 0
+HISTORY_STATISTICS = 1
+HISTORY_WITH_HASHES = 2
+
+# Bytes buffered before the history file is written to
+DEFAULT_HISTORY_BUFFER_SIZE = 1 << 20
+
+
+def genome_hash(genome):
+    """
+    Get a short hexadecimal hash that identifies the bits of a genome.
+
+    Args:
+        genome (ListGenome or PackedGenome): The genome.
+
+    Returns:
+        str: The hash as hexadecimal.
+    """
+    return genome.fingerprint()[1].hex()
+
+
+class HistoryWriter:
+    """
+    Streams one JSON record per generation to a file through a large buffer, so the history of
+    a long run is never held in memory.
+    """
+    enabled = True
+
+    def __init__(self, path, include_hashes=False, buffer_size=DEFAULT_HISTORY_BUFFER_SIZE, append=False):
+        """
+        Initialize the HistoryWriter and open its file.
+
+        Args:
+            path (str): The path of the history file.
+            include_hashes (bool, optional): Whether to include a hash of the best and worst genome.
+            buffer_size (int, optional): The number of bytes buffered before the file is written to.
+            append (bool, optional): Whether to add to an existing file, as when a run is resumed.
+        """
+        self._path = path
+        self._include_hashes = include_hashes
+        self._file = open(path, "ab" if append else "wb", buffering=buffer_size)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def include_hashes(self):
+        return self._include_hashes
+
+    def write(self, generation_data):
+        """
+        Write the record of a generation.
+
+        Args:
+            generation_data (dict): The generation data collected by the SGAController.
+        """
+        best = generation_data["best"]
+        worst = generation_data["worst"]
+        record = {
+            "generation": generation_data["generation"],
+            "best": best["fitness"],
+            "best_index": best["index"],
+            "average": generation_data["average"],
+            "worst": worst["fitness"],
+            "worst_index": worst["index"],
+            "variance": generation_data["variance"],
+        }
+        if self._include_hashes:
+            record["best_hash"] = genome_hash(best["genome"])
+            record["worst_hash"] = genome_hash(worst["genome"])
+        if "islands" in generation_data:
+            record["islands"] = generation_data["islands"]
+        if "diversity" in generation_data:
+            record["diversity"] = generation_data["diversity"]
+        self._file.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+
+    def close(self):
+        """
+        Write any buffered records and close the history file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class NullHistory:
+    """
+    History writer used when the history is off. It writes nothing.
+    """
+    enabled = False
+
+    def write(self, generation_data):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_HISTORY = NullHistory()
+
+
+def create_history(write_history, path, append=False):
+    """
+    Get the history writer for a writeHistory setting value.
+
+    Args:
+        write_history (int): The writeHistory setting value.
+        path (str): The path of the history file.
+        append (bool, optional): Whether to add to an existing history file.
+
+    Returns:
+        HistoryWriter or NullHistory: A new HistoryWriter, or the shared NullHistory when the history is off.
+    """
+    if write_history == HISTORY_OFF:
+        return NULL_HISTORY
+    if write_history in (HISTORY_STATISTICS, HISTORY_WITH_HASHES):
+        return HistoryWriter(path, write_history == HISTORY_WITH_HASHES, append=append)
+    raise ValueError(f"Unknown writeHistory {write_history}")
+
+
+class GenerationWindow:
+    """
+    Fixed-size ring buffer of the best, average and worst fitness of the most recent generations,
+    and of the best and worst genome of each, used to detect stagnation without keeping the history.
+    """
+    def __init__(self, size):
+        """
+        Initialize an empty GenerationWindow.
+
+        Args:
+            size (int): The number of generations kept.
+        """
+        self._size = size
+        self._best = [0] * size
+        self._average = [0.0] * size
+        self._worst = [0] * size
+        self._best_genomes = [None] * size
+        self._worst_genomes = [None] * size
+        self._generations_seen = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def generations_seen(self):
+        return self._generations_seen
+
+    def __len__(self):
+        return min(self._generations_seen, self._size)
+
+    def append(self, best, average, worst, best_genome=None, worst_genome=None):
+        """
+        Add a generation, overwriting the oldest one when the window is full.
+
+        Args:
+            best (int): The best fitness of the generation.
+            average (float): The average fitness of the generation.
+            worst (int): The worst fitness of the generation.
+            best_genome (ListGenome or PackedGenome, optional): The genome of the best individual.
+            worst_genome (ListGenome or PackedGenome, optional): The genome of the worst individual.
+        """
+        slot = self._generations_seen % self._size
+        self._best[slot] = best
+        self._average[slot] = average
+        self._worst[slot] = worst
+        self._best_genomes[slot] = best_genome
+        self._worst_genomes[slot] = worst_genome
+        self._generations_seen += 1
+
+    def restore(self, generations_seen, best, average, worst, best_genomes, worst_genomes):
+        """
+        Replace the content of the window with generations saved by as_dict, as when a run is resumed.
+
+        Args:
+            generations_seen (int): The number of generations seen when the window was saved.
+            best (list): The best fitness of each saved generation, oldest first.
+            average (list): The average fitness of each saved generation, oldest first.
+            worst (list): The worst fitness of each saved generation, oldest first.
+            best_genomes (list): The genome of the best individual of each saved generation, oldest first.
+            worst_genomes (list): The genome of the worst individual of each saved generation, oldest first.
+        """
+        if len(best) > self._size:
+            raise ValueError(f"Cannot restore {len(best)} generations into a window of {self._size}")
+        self.__init__(self._size)
+        self._generations_seen = generations_seen - len(best)
+        for generation in zip(best, average, worst, best_genomes, worst_genomes):
+            self.append(*generation)
+
+    def _slot(self, index):
+        """
+        Get the slot of a generation in the window.
+
+        Args:
+            index (int): The position of the generation in the window, 0 being the oldest.
+
+        Returns:
+            int: The slot of the generation.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("Generation window index out of range")
+        return (self._generations_seen - len(self) + index) % self._size
+
+    def best(self, index):
+        return self._best[self._slot(index)]
+
+    def average(self, index):
+        return self._average[self._slot(index)]
+
+    def worst(self, index):
+        return self._worst[self._slot(index)]
+
+    def best_genome(self, index):
+        return self._best_genomes[self._slot(index)]
+
+    def worst_genome(self, index):
+        return self._worst_genomes[self._slot(index)]
+
+    def as_dict(self):
+        """
+        Get the generations in the window, oldest first.
+
+        Returns:
+            dict: The number of generations seen and the best, average and worst fitness of each generation.
+        """
+        indexes = range(len(self))
+        return {
+            "generations_seen": self._generations_seen,
+            "best": [self.best(index) for index in indexes],
+            "average": [self.average(index) for index in indexes],
+            "worst": [self.worst(index) for index in indexes],
+        }
@@ -1,30 +1,104 @@
 # Author: Daniel Glauber
 # File: individual.py
 # Description: This file contains the class that represents an individual solution in the population.
+from genome import LIST_GENOME, make_genome
+from fitness import get_fitness_function
 
 # Class Individual represents a single solution in population
 class Individual:
     """
     Represents a single solution in the population.
     """
-    def __init__(self, fitness_function, starting_solution=None, solution_fitness=None):
+    __slots__ = (
+        "_fitness_function_value",
+        "_fitness_function",
+        "_genome_representation",
+        "_solution",
+        "_fitness_evaluated",
+        "_solution_fitness",
+    )
+
+    def __init__(self, fitness_function, starting_solution=None, solution_fitness=None,
+                 genome_representation=LIST_GENOME):
         """
         Initialize an Individual with a fitness function and starting solution.
         
         Args:
-            fitness_function (int): The fitness function value.
+            fitness_function (int, str or FitnessFunction): The fitness function value.
             starting_solution (list, optional): The starting solution as a list of integers.
             solution_fitness (int, optional): The precomputed fitness of the solution.
+            genome_representation (int, optional): How the solution is stored (0 = list, 1 = packed).
         """
         if starting_solution is None:
             starting_solution = []
         self._fitness_function_value = fitness_function
-        self._solution = starting_solution.copy()
+        self._fitness_function = get_fitness_function(fitness_function)
+        self._genome_representation = genome_representation
+        self._solution = make_genome(starting_solution, genome_representation)
         self._fitness_evaluated = False
         self._solution_fitness = None
-        if self._solution:
+        if len(self._solution):
             self.evaluate_solution_fitness(solution_fitness)
 
+    @classmethod
+    def from_genome(cls, fitness_function, genome, solution_fitness=None, genome_representation=LIST_GENOME,
+                    parent=None, evaluate=True, changed_positions=None):
+        """
+        Create an Individual that takes ownership of an existing genome without copying it.
+        
+        Args:
+            fitness_function (int, str or FitnessFunction): The fitness function value.
+            genome (ListGenome or PackedGenome): The genome of the new individual.
+            solution_fitness (int, optional): The precomputed fitness of the solution.
+            genome_representation (int, optional): How the solution is stored (0 = list, 1 = packed).
+            parent (Individual, optional): A parent the genome was derived from, used to evaluate the fitness incrementally.
+            evaluate (bool, optional): Whether to evaluate the fitness now, otherwise it is left for a later batch.
+            changed_positions (list, optional): The indexes of the bits at which the genome differs from the parent.
+        
+        Returns:
+            Individual: The new individual.
+        """
+        individual = cls(fitness_function, genome_representation=genome_representation)
+        individual.assign(genome, solution_fitness, parent, evaluate, changed_positions)
+        return individual
+
+    def assign(self, genome, solution_fitness=None, parent=None, evaluate=True, changed_positions=None):
+        """
+        Overwrite this individual in place with a new genome, taking ownership of it without copying.
+        
+        Args:
+            genome (ListGenome or PackedGenome): The new genome.
+            solution_fitness (int, optional): The precomputed fitness of the solution.
+            parent (Individual, optional): A parent the genome was derived from, used to evaluate the fitness incrementally.
+            evaluate (bool, optional): Whether to evaluate the fitness now, otherwise it is left for a later batch.
+            changed_positions (list, optional): The indexes of the bits at which the genome differs from the parent.
+        """
+        self._solution = genome
+        self._fitness_evaluated = False
+        self._solution_fitness = None
+        if solution_fitness is not None:
+            self.evaluate_solution_fitness(solution_fitness)
+        elif len(genome) and evaluate:
+            if parent is not None and changed_positions is not None:
+                self.evaluate_fitness_from_parent(parent, changed_positions)
+            else:
+                self.evaluate_solution_fitness()
+
+    def copy_from(self, other):
+        """
+        Overwrite this individual in place with a copy of another individual,
+        reusing this individual's genome storage where the representation allows it.
+        
+        Args:
+            other (Individual): The individual to copy.
+        """
+        if type(self._solution) is type(other.genome):
+            self._solution.copy_from(other.genome)
+        else:
+            self._solution = other.genome.copy()
+        self._fitness_evaluated = other.fitness_evaluated
+        self._solution_fitness = other.solution_fitness
+
     @property
     def fitness_function_value(self):
         return self._fitness_function_value
@@ -32,18 +106,25 @@ class Individual:
     @fitness_function_value.setter
     def fitness_function_value(self, value):
         self._fitness_function_value = value
+        self._fitness_function = get_fitness_function(value)
         self._fitness_evaluated = False
         self._solution_fitness = None
 
     @property
     def solution(self):
-        return self._solution
+        return self._solution.to_list()
 
     @solution.setter
     def solution(self, value):
-        self._solution = value
-        self._fitness_evaluated = False
-        self._solution_fitness = None
+        self.set_solution(value)
+
+    @property
+    def genome(self):
+        return self._solution
+
+    @property
+    def genome_representation(self):
+        return self._genome_representation
 
     @property
     def fitness_evaluated(self):
@@ -68,7 +149,7 @@ class Individual:
         Returns:
             str: The solution as a string.
         """
-        return ",".join([str(x) for x in self._solution])
+        return self._solution.as_string()
 
     def mutate_solution(self, indexes_to_mutate_bool_list, full_debug=False):
         """
@@ -76,19 +157,37 @@ class Individual:
         
         Args:
             indexes_to_mutate_bool_list (list): A list of boolean values indicating mutation points.
-            full_debug (bool, optional): Whether to print debug information.
-        """
-        if any(indexes_to_mutate_bool_list):
-            if full_debug:
-                print(f"Before Mutation: {self.solution_as_string()}")
-            for index, mutate_boolean in enumerate(indexes_to_mutate_bool_list):
-                if mutate_boolean:
-                    # Flip the bit at the current index
-                    self._solution[index] = self._solution[index] ^ 1
-            # Recalculate the fitness after mutation
-            self._solution_fitness = sum(self._solution)
-            if full_debug:
-                print(f"After Mutation: {self.solution_as_string()}\n")
+            full_debug (bool, optional): Unused, mutations are recorded by the trace sink of the Population.
+        """
+        self.mutate_positions(
+            [index for index, mutate_boolean in enumerate(indexes_to_mutate_bool_list) if mutate_boolean]
+        )
+
+    def mutate_positions(self, positions, evaluate=True):
+        """
+        Mutate the solution by flipping the bits at the given positions.
+        
+        Args:
+            positions (list): The indexes of the bits to flip.
+            evaluate (bool, optional): Whether to evaluate a fitness that cannot be updated incrementally now,
+                otherwise it is left for a later batch.
+        """
+        if positions:
+            if self._fitness_evaluated and self._fitness_function.use_delta(len(positions), len(self._solution)):
+                # Update the fitness from the flipped bits only
+                old_values = [self._solution.get_bit(index) for index in positions]
+                self._solution.flip(positions)
+                self._solution_fitness = self._fitness_function.delta(
+                    self._solution_fitness, self._solution, positions, old_values
+                )
+            else:
+                self._solution.flip(positions)
+                if evaluate:
+                    # Recalculate the fitness after mutation
+                    self.evaluate_solution_fitness()
+                else:
+                    self._fitness_evaluated = False
+                    self._solution_fitness = None
 
     def evaluate_solution_fitness(self, solution_fitness=None):
         """
@@ -100,10 +199,27 @@ class Individual:
         if solution_fitness is not None:
             self._solution_fitness = solution_fitness
         else:
-            if self._fitness_function_value == 0:
-                # Calculate fitness as the sum of the solution elements
-                self._solution_fitness = sum(self._solution)
-                self._fitness_evaluated = True
+            self._solution_fitness = self._fitness_function.evaluate(self._solution)
+        self._fitness_evaluated = True
+
+    def evaluate_fitness_from_parent(self, parent, changed_positions):
+        """
+        Evaluate the fitness of the solution starting from the fitness of a similar parent.
+        Only the bits that differ from the parent are looked at when the fitness function supports it.
+        
+        Args:
+            parent (Individual): An evaluated individual with a solution of the same size.
+            changed_positions (list): The indexes of the bits at which the solution differs from the parent.
+        """
+        fitness_function = self._fitness_function
+        if parent.fitness_evaluated and fitness_function.use_delta(len(changed_positions), len(self._solution)):
+            parent_genome = parent.genome
+            old_values = [parent_genome.get_bit(index) for index in changed_positions]
+            self.evaluate_solution_fitness(fitness_function.delta(
+                parent.solution_fitness, self._solution, changed_positions, old_values
+            ))
+        else:
+            self.evaluate_solution_fitness()
 
     def get_solution_fitness(self):
         """
@@ -125,7 +241,7 @@ class Individual:
         Returns:
             list: A copy of the solution.
         """
-        return self._solution.copy()
+        return self._solution.to_list()
 
     def set_solution(self, new_solution):
         """
@@ -134,7 +250,7 @@ class Individual:
         Args:
             new_solution (list): The new solution to set.
         """
-        self._solution = new_solution.copy()
+        self._solution = make_genome(new_solution, self._genome_representation)
         self._fitness_evaluated = False
         self._solution_fitness = None
 
@@ -155,5 +271,89 @@ class Individual:
             new_fitness_function_value (int): The new fitness function value.
         """
         self._fitness_function_value = new_fitness_function_value
+        self._fitness_function = get_fitness_function(new_fitness_function_value)
         self._fitness_evaluated = False
-        self._solution_fitness = None
\ No newline at end of file
+        self._solution_fitness = None
+
+
+class IndividualPool:
+    """
+    Free list of individuals that are no longer part of a generation. A population takes individuals
+    from the pool instead of creating new ones, and the recycled individuals keep their genome storage
+    so they can be overwritten in place. The content of a recycled individual is stale until it is overwritten.
+    """
+    def __init__(self, fitness_function, genome_representation=LIST_GENOME):
+        """
+        Initialize an empty IndividualPool.
+
+        Args:
+            fitness_function (int, str or FitnessFunction): The fitness function of the individuals.
+            genome_representation (int, optional): How the solutions are stored (0 = list, 1 = packed).
+        """
+        self._fitness_function = fitness_function
+        self._genome_representation = genome_representation
+        self._free = []
+        self._created = 0
+
+    @property
+    def fitness_function(self):
+        return self._fitness_function
+
+    @fitness_function.setter
+    def fitness_function(self, value):
+        self._fitness_function = value
+
+    @property
+    def genome_representation(self):
+        return self._genome_representation
+
+    @property
+    def created(self):
+        return self._created
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self):
+        """
+        Get an individual to overwrite, recycling a released individual when there is one.
+
+        Returns:
+            Individual: An individual that uses the fitness function of the pool.
+        """
+        if self._free:
+            individual = self._free.pop()
+            if individual.fitness_function_value is not self._fitness_function:
+                individual.fitness_function_value = self._fitness_function
+            return individual
+        self._created += 1
+        return Individual(self._fitness_function, genome_representation=self._genome_representation)
+
+    def release(self, individual):
+        """
+        Give back an individual that is no longer referenced by a generation.
+
+        Args:
+            individual (Individual): The individual to recycle.
+        """
+        if individual.genome_representation == self._genome_representation:
+            self._free.append(individual)
+
+    def release_all(self, individuals):
+        """
+        Give back several individuals that are no longer referenced by a generation.
+
+        Args:
+            individuals (iterable): The individuals to recycle.
+        """
+        for individual in individuals:
+            self.release(individual)
+
+    def info(self):
+        """
+        Get the statistics of the pool.
+
+        Returns:
+            dict: The number of individuals the pool created and the number waiting to be recycled.
+        """
+        return {"created": self._created, "free": len(self._free)}
@@ -0,0 +1,441 @@
+# Author: Daniel Glauber
+# File: island_population.py
+# Description: This file contains the island model, which evolves several populations in separate processes
+# and periodically migrates their best individuals between them.
+import multiprocessing
+from fitness import get_fitness_function
+from individual import Individual
+from population import Population
+from rng import RandomStreams
+import settings_loader as sl
+
+# Topology values used by the migrationTopology setting
+RING_TOPOLOGY = 0
+RANDOM_TOPOLOGY = 1
+
+# Sent by an island in place of its reply when it raised an error
+ISLAND_ERROR = "error"
+
+
+def island_statistics(population):
+    """
+    Collect the statistics of an island's current generation, with the genomes of its best and worst
+    individuals so the controller can keep them without asking the island again.
+
+    Args:
+        population (Population): The island's population.
+
+    Returns:
+        tuple: The best, average, worst and variance of the fitness and the indexes of the best and worst individuals,
+            and the genomes of the best and worst individuals by index.
+    """
+    statistics = population.get_generation_statistics()
+    genomes = {
+        index: population.get_individual(index).genome
+        for index in (statistics["best_index"], statistics["worst_index"])
+    }
+    return statistics, genomes
+
+
+def run_island(connection, config, seed):
+    """
+    Evolve one island in a worker process, following the commands sent by the IslandPopulation.
+
+    Args:
+        connection (multiprocessing.connection.Connection): The pipe to the IslandPopulation.
+        config (SGAConfig): The settings of the run.
+        seed (str): The random seed of the island.
+    """
+    population = None
+    try:
+        population = Population(config)
+        population.initialize_random_starting_population(seed)
+        connection.send(island_statistics(population))
+        while True:
+            command, argument = connection.recv()
+            if command == "step":
+                population.select_mating_parents()
+                population.replace_current_population()
+                connection.send(island_statistics(population))
+            elif command == "emigrants":
+                connection.send([
+                    (individual.genome, individual.solution_fitness)
+                    for individual in population.get_best_individuals(argument)
+                ])
+            elif command == "immigrants":
+                population.replace_worst_individuals(argument)
+                connection.send(island_statistics(population))
+            elif command == "individual":
+                individual = population.current_generation[argument]
+                connection.send((individual.genome, individual.solution_fitness))
+            elif command == "generation":
+                connection.send([
+                    (individual.genome, individual.solution_fitness)
+                    for individual in population.current_generation
+                ])
+            elif command == "stop":
+                break
+    except EOFError:
+        # The IslandPopulation went away without sending stop
+        pass
+    except Exception as e:
+        # The error is raised again by the IslandPopulation, in the process of the controller
+        try:
+            connection.send((ISLAND_ERROR, f"{type(e).__name__}: {e}"))
+        except OSError:
+            pass
+    finally:
+        if population is not None:
+            population.close()
+        connection.close()
+
+
+class IslandPopulation:
+    """
+    Represents a population split into islands that evolve in separate processes.
+    Every migrationInterval generations each island sends copies of its best migrationSize
+    individuals to another island, where they replace the worst individuals.
+    The statistics of all islands are merged so the controller can treat it as a single population.
+    """
+    def __init__(self, config=None):
+        """
+        Initialize the IslandPopulation with settings and no running islands.
+
+        Args:
+            config (SGAConfig, optional): The settings of the run (default: the settings loaded by the settings loader).
+        """
+        self._config = config if config is not None else sl.current_config()
+        self._fitness_function = self._config.fitnessFunction
+        # Resolve the fitness function here so a bad setting fails before any island is started
+        get_fitness_function(self._fitness_function)
+        self._island_count = self._config.islandCount
+        self._migration_interval = self._config.migrationInterval
+        self._migration_size = self._config.migrationSize
+        self._migration_topology = self._config.migrationTopology
+        if self._island_count < 1:
+            raise ValueError("islandCount must be at least 1")
+        if self._migration_interval < 0 or self._migration_size < 0:
+            raise ValueError("migrationInterval and migrationSize cannot be negative")
+        if self._migration_topology not in (RING_TOPOLOGY, RANDOM_TOPOLOGY):
+            raise ValueError(f"Unknown migrationTopology {self._migration_topology}")
+        self._island_size = self._config.populationSizeN
+        self._population_size = self._island_size * self._island_count
+        self._processes = []
+        self._connections = []
+        self._island_statistics = []
+        self._island_genomes = []
+        self._generation_number = 1
+        self._migration_random = None
+
+    @property
+    def island_count(self):
+        return self._island_count
+
+    @property
+    def island_size(self):
+        return self._island_size
+
+    @property
+    def population_size(self):
+        return self._population_size
+
+    @property
+    def migration_interval(self):
+        return self._migration_interval
+
+    @property
+    def migration_size(self):
+        return self._migration_size
+
+    @property
+    def migration_topology(self):
+        return self._migration_topology
+
+    def initialize_random_starting_population(self):
+        """
+        Start one process per island and initialize every island with random individuals.
+        """
+        # Every island and the migrations draw from their own streams derived from randSeed,
+        # so the run does not depend on how the island processes are scheduled
+        random_streams = RandomStreams(self._config.randSeed)
+        self._migration_random = random_streams.stream("migration")
+        for island in range(self._island_count):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_island,
+                args=(child_connection, self._config, random_streams.spawn("island", island).seed),
+                name=f"sga-island-{island}"
+            )
+            process.start()
+            child_connection.close()
+            self._processes.append(process)
+            self._connections.append(parent_connection)
+        self._set_island_statistics([self._receive(island) for island in range(self._island_count)])
+
+    def _set_island_statistics(self, replies):
+        """
+        Keep the statistics and the best and worst genomes that every island sent for its current generation.
+
+        Args:
+            replies (list): The statistics and genomes of every island.
+        """
+        self._island_statistics = [statistics for statistics, genomes in replies]
+        self._island_genomes = [genomes for statistics, genomes in replies]
+
+    def _receive(self, island):
+        """
+        Wait for the reply of an island.
+
+        Args:
+            island (int): The index of the island.
+
+        Returns:
+            The reply of the island.
+        """
+        try:
+            reply = self._connections[island].recv()
+        except EOFError:
+            raise ValueError(f"Island {island} stopped unexpectedly")
+        # No other reply is a tuple starting with text
+        if isinstance(reply, tuple) and isinstance(reply[0], str) and reply[0] == ISLAND_ERROR:
+            raise ValueError(f"Island {island} failed: {reply[1]}")
+        return reply
+
+    def _broadcast(self, command, arguments=None):
+        """
+        Send a command to every island and collect the replies.
+
+        Args:
+            command (str): The command to send.
+            arguments (list, optional): One argument per island.
+
+        Returns:
+            list: The reply of every island.
+        """
+        if arguments is None:
+            arguments = [None] * self._island_count
+        for connection, argument in zip(self._connections, arguments):
+            connection.send((command, argument))
+        return [self._receive(island) for island in range(self._island_count)]
+
+    def _request(self, island, command, argument=None):
+        """
+        Send a command to a single island and wait for the reply.
+
+        Args:
+            island (int): The index of the island.
+            command (str): The command to send.
+            argument (optional): The argument of the command.
+
+        Returns:
+            The reply of the island.
+        """
+        self._connections[island].send((command, argument))
+        return self._receive(island)
+
+    def migration_destinations(self):
+        """
+        Choose the island that receives the emigrants of every island.
+
+        Returns:
+            list: The destination island of each island.
+        """
+        if self._migration_topology == RING_TOPOLOGY:
+            return [(island + 1) % self._island_count for island in range(self._island_count)]
+        destinations = []
+        for island in range(self._island_count):
+            destination = self._migration_random.randrange(self._island_count - 1)
+            # Skip over the island itself so emigrants always leave home
+            destinations.append(destination + 1 if destination >= island else destination)
+        return destinations
+
+    def migrate(self):
+        """
+        Send the best individuals of every island to its destination island.
+        """
+        emigrants = self._broadcast("emigrants", [self._migration_size] * self._island_count)
+        immigrants = [[] for island in range(self._island_count)]
+        for island, destination in enumerate(self.migration_destinations()):
+            immigrants[destination].extend(emigrants[island])
+        self._set_island_statistics(self._broadcast("immigrants", immigrants))
+
+    def select_mating_parents(self):
+        """
+        Evolve every island by one generation, migrating afterwards when it is due.
+        """
+        self._set_island_statistics(self._broadcast("step"))
+        self._generation_number += 1
+        if (self._island_count > 1 and self._migration_interval > 0 and self._migration_size > 0
+                and self._generation_number % self._migration_interval == 0):
+            self.migrate()
+
+    def replace_current_population(self):
+        """
+        Replace the current generation with the next generation.
+        Every island already replaces its own generation when it evolves.
+        """
+
+    def get_island_statistics(self):
+        """
+        Get the statistics of every island's current generation.
+
+        Returns:
+            list: A dictionary of statistics per island.
+        """
+        return [statistics.copy() for statistics in self._island_statistics]
+
+    def _get_solution(self, island, index):
+        """
+        Get the solution of an individual on an island.
+
+        Args:
+            island (int): The index of the island.
+            index (int): The index of the individual on the island.
+
+        Returns:
+            list: The solution as a list of integers.
+        """
+        genome, fitness = self._request(island, "individual", index)
+        return genome.to_list()
+
+    def get_generation_statistics(self):
+        """
+        Merge the statistics of every island into the statistics of the whole population.
+        The best and worst indexes count the individuals of all islands in island order.
+
+        Returns:
+            dict: The best, average, worst and variance of the fitness, and the indexes of the best and worst individuals.
+        """
+        island_statistics = self._island_statistics
+        best_island = max(range(self._island_count), key=lambda index: island_statistics[index]["best"])
+        worst_island = min(range(self._island_count), key=lambda index: island_statistics[index]["worst"])
+        average = sum(statistics["average"] for statistics in island_statistics) / self._island_count
+        # Every island has the same size, so the pooled variance is the mean second moment minus the squared mean
+        second_moment = sum(
+            statistics["variance"] + statistics["average"] ** 2 for statistics in island_statistics
+        ) / self._island_count
+        return {
+            "best": island_statistics[best_island]["best"],
+            "best_index": best_island * self._island_size + island_statistics[best_island]["best_index"],
+            "average": average,
+            "worst": island_statistics[worst_island]["worst"],
+            "worst_index": worst_island * self._island_size + island_statistics[worst_island]["worst_index"],
+            "variance": max(0.0, second_moment - average ** 2),
+        }
+
+    def get_individual(self, index):
+        """
+        Get an individual of the current generation.
+
+        Args:
+            index (int): The index of the individual, counting the individuals of all islands in island order.
+
+        Returns:
+            Individual: A copy of the individual.
+        """
+        island, local_index = divmod(index, self._island_size)
+        genome, fitness = self._request(island, "individual", local_index)
+        return Individual.from_genome(
+            self._fitness_function, genome, fitness, genome_representation=self._config.genomeRepresentation
+        )
+
+    def copy_genome(self, index):
+        """
+        Get a copy of the genome of an individual of the current generation.
+        The genomes of the best and worst individual of every island came with its statistics,
+        so they are returned without asking the island.
+
+        Args:
+            index (int): The index of the individual, counting the individuals of all islands in island order.
+
+        Returns:
+            ListGenome or PackedGenome: The genome, which no island changes.
+        """
+        island, local_index = divmod(index, self._island_size)
+        genome = self._island_genomes[island].get(local_index)
+        if genome is None:
+            genome = self._request(island, "individual", local_index)[0]
+        return genome
+
+    def get_average_fitness(self):
+        """
+        Calculate and return the average fitness over all islands.
+
+        Returns:
+            float: The average fitness of the current generation.
+        """
+        return sum(statistics["average"] for statistics in self._island_statistics) / self._island_count
+
+    def get_best_fitness(self):
+        """
+        Get the best fitness over all islands.
+
+        Returns:
+            dict: A dictionary containing the best fitness, solution, and index.
+                The index counts the individuals of all islands in island order.
+        """
+        island = max(range(self._island_count), key=lambda index: self._island_statistics[index]["best"])
+        statistics = self._island_statistics[island]
+        return {
+            "fitness": statistics["best"],
+            "solution": self._get_solution(island, statistics["best_index"]),
+            "index": island * self._island_size + statistics["best_index"],
+            "island": island
+        }
+
+    def get_worst_fitness(self):
+        """
+        Get the worst fitness over all islands.
+
+        Returns:
+            dict: A dictionary containing the worst fitness, solution, and index.
+                The index counts the individuals of all islands in island order.
+        """
+        island = min(range(self._island_count), key=lambda index: self._island_statistics[index]["worst"])
+        statistics = self._island_statistics[island]
+        return {
+            "fitness": statistics["worst"],
+            "solution": self._get_solution(island, statistics["worst_index"]),
+            "index": island * self._island_size + statistics["worst_index"],
+            "island": island
+        }
+
+    def get_current_generation(self):
+        """
+        Get a copy of the individuals of all islands in island order.
+
+        Returns:
+            list: The current generation of every island.
+        """
+        return [
+            Individual.from_genome(
+                self._fitness_function, genome, fitness, genome_representation=self._config.genomeRepresentation
+            )
+            for island_generation in self._broadcast("generation")
+            for genome, fitness in island_generation
+        ]
+
+    def close(self):
+        """
+        Stop every island process.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(("stop", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+        self._processes = []
+        self._connections = []
+
+    def get_fitness_function(self):
+        """
+        Get the fitness function value.
+
+        Returns:
+            int: The fitness function value.
+        """
+        return self._fitness_function
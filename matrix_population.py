@@ -0,0 +1,353 @@
+# Author: Daniel Glauber
+# File: matrix_population.py
+# Description: This file contains a population engine that stores an entire generation as a NumPy matrix.
+import settings_loader as sl
+from individual import Individual
+from genome import make_genome
+from fitness import OneMax, get_fitness_function
+from mutation import get_bit_mutation_rate
+from crossover import CROSSOVER_MASKS, ONE_POINT_CROSSOVER, UNIFORM_CROSSOVER
+from diversity import DIVERSITY_STATISTICS_ON, diversity_from_counts
+from profiling import NULL_PROFILER
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it is only needed for populationEngine 1
+    np = None
+
+# Upper bound on the number of random values drawn at once when building mutation masks
+MUTATION_CHUNK_ELEMENTS = 1 << 22
+
+
+class MatrixPopulation:
+    """
+    Represents the entire population as a 2-D uint8 matrix with one row per individual,
+    plus a vector holding the fitness of every row.
+    Every genetic operator is applied to the whole generation at once.
+    """
+    def __init__(self, config=None):
+        """
+        Initialize the MatrixPopulation with settings and empty generations.
+        
+        Args:
+            config (SGAConfig, optional): The settings of the run (default: the settings loaded by the settings loader).
+        """
+        if np is None:
+            raise ImportError("populationEngine 1 requires the numpy library to be installed")
+        self._config = config if config is not None else sl.current_config()
+        self._fitness_function = self._config.fitnessFunction
+        if not isinstance(get_fitness_function(self._fitness_function), OneMax):
+            raise ValueError(f"populationEngine 1 does not support fitnessFunction {self._fitness_function}")
+        self._rng = None
+        self._current_generation = None
+        self._current_fitness = None
+        self._next_generation = None
+        self._next_fitness = None
+        self._profiler = NULL_PROFILER
+
+    @property
+    def current_generation(self):
+        return self._current_generation
+
+    @property
+    def current_fitness(self):
+        return self._current_fitness
+
+    @property
+    def fitness_function(self):
+        return self._fitness_function
+
+    @property
+    def string_size(self):
+        return self._string_size
+
+    @property
+    def population_size(self):
+        return self._population_size
+
+    @property
+    def prob_apply_crossover(self):
+        return self._prob_apply_crossover
+
+    @property
+    def prob_apply_mutation(self):
+        return self._prob_apply_mutation
+
+    @property
+    def tournament_selection_size(self):
+        return self._tournament_selection_size
+
+    def evaluate_fitness(self, genomes):
+        """
+        Evaluate the fitness of every row of a genome matrix.
+
+        Args:
+            genomes (numpy.ndarray): The genome matrix.
+
+        Returns:
+            numpy.ndarray: The fitness of each row.
+        """
+        # OneMax is the number of bits set to 1 in each row
+        return genomes.sum(axis=1, dtype=np.int64)
+
+    def initialize_random_starting_population(self):
+        """
+        Initialize the starting population with random individuals.
+        """
+        self._rng = np.random.default_rng(self._config.randSeed)
+        self._string_size = self._config.stringSizeN
+        self._population_size = self._config.populationSizeN
+        self._selection_method = self._config.selectionMethod
+        self._prob_apply_crossover = self._config.probApplyCrossover
+        self._prob_apply_mutation = self._config.probApplyMutation
+        self._tournament_selection_size = self._config.tournamentSizeK
+        if self._config.replacementStrategy != 0:
+            raise ValueError(f"populationEngine 1 does not support replacementStrategy {self._config.replacementStrategy}")
+        self._crossover_operator = self._config.crossoverOperator
+        if self._crossover_operator != UNIFORM_CROSSOVER and self._crossover_operator not in CROSSOVER_MASKS:
+            raise ValueError(f"Unknown crossoverOperator {self._crossover_operator}")
+        self._bit_mutation_rate = get_bit_mutation_rate(self._config.bitMutationRate, self._string_size)
+        self._diversity_statistics = (
+            self._config.diversityStatistics == DIVERSITY_STATISTICS_ON or self._config.minimumDiversity > 0
+        )
+        self._current_generation = self._rng.integers(
+            0, 2, size=(self._population_size, self._string_size), dtype=np.uint8
+        )
+        self._current_fitness = self.evaluate_fitness(self._current_generation)
+
+    def get_average_fitness(self):
+        """
+        Calculate and return the average fitness of the current generation.
+
+        Returns:
+            float: The average fitness of the current generation.
+        """
+        return float(self._current_fitness.mean())
+
+    def get_worst_fitness(self):
+        """
+        Get the worst fitness in the current generation.
+
+        Returns:
+            dict: A dictionary containing the worst fitness, solution, and index.
+        """
+        worst_index = int(self._current_fitness.argmin())
+        return {
+            "fitness": int(self._current_fitness[worst_index]),
+            "solution": self._current_generation[worst_index].tolist(),
+            "index": worst_index
+        }
+
+    def get_best_fitness(self):
+        """
+        Get the best fitness in the current generation.
+
+        Returns:
+            dict: A dictionary containing the best fitness, solution, and index.
+        """
+        best_index = int(self._current_fitness.argmax())
+        return {
+            "fitness": int(self._current_fitness[best_index]),
+            "solution": self._current_generation[best_index].tolist(),
+            "index": best_index
+        }
+
+    def get_generation_statistics(self):
+        """
+        Get the fitness statistics of the current generation without copying any solution.
+
+        Returns:
+            dict: The best, average, worst and variance of the fitness, and the indexes of the best and worst individuals.
+        """
+        best_index = int(self._current_fitness.argmax())
+        worst_index = int(self._current_fitness.argmin())
+        return {
+            "best": int(self._current_fitness[best_index]),
+            "best_index": best_index,
+            "average": float(self._current_fitness.mean()),
+            "worst": int(self._current_fitness[worst_index]),
+            "worst_index": worst_index,
+            "variance": float(self._current_fitness.var()),
+        }
+
+    def get_diversity_statistics(self):
+        """
+        Get the diversity statistics of the current generation from the column sums of its matrix,
+        which are the allele counts of the generation.
+
+        Returns:
+            dict: The bitwise diversity, the mean Hamming distance between individuals and the number of converged loci,
+                or None if the diversity statistics are off.
+        """
+        if not self._diversity_statistics:
+            return None
+        return diversity_from_counts(self._current_generation.sum(axis=0).tolist(), self._population_size)
+
+    def get_individual(self, index):
+        """
+        Get an individual of the current generation.
+
+        Args:
+            index (int): The index of the individual.
+
+        Returns:
+            Individual: A copy of the individual.
+        """
+        return Individual(
+            self._fitness_function, self._current_generation[index].tolist(), int(self._current_fitness[index])
+        )
+
+    def copy_genome(self, index):
+        """
+        Get a copy of the genome of an individual of the current generation.
+
+        Args:
+            index (int): The index of the individual.
+
+        Returns:
+            ListGenome: The genome, built from the row of the individual.
+        """
+        return make_genome(self._current_generation[index].tolist())
+
+    def tournament_selection(self, count):
+        """
+        Run count tournaments at once and return the row index of every winner.
+
+        Args:
+            count (int): The number of parents to select.
+
+        Returns:
+            numpy.ndarray: The row indexes of the selected parents.
+        """
+        contestants = self._rng.integers(
+            0, self._population_size, size=(count, self._tournament_selection_size)
+        )
+        # argmax returns the first contestant with the best fitness, like max() does
+        winners = self._current_fitness[contestants].argmax(axis=1)
+        return contestants[np.arange(count), winners]
+
+    def uniform_crossover(self, parents_a, parents_b):
+        """
+        Perform crossover on every pair of parent rows, with the operator of the crossoverOperator setting.
+
+        Args:
+            parents_a (numpy.ndarray): The first parent of every pair.
+            parents_b (numpy.ndarray): The second parent of every pair.
+
+        Returns:
+            numpy.ndarray: The children, two rows per pair.
+        """
+        pairs = parents_a.shape[0]
+        # Pairs that do not cross over get an all-zero mask, which clones the parents
+        apply_crossover = self._rng.random(pairs) < self._prob_apply_crossover
+        masks = self.crossover_masks(pairs)
+        masks &= apply_crossover[:, None]
+        children = np.empty((2 * pairs, self._string_size), dtype=np.uint8)
+        children[0::2] = np.where(masks, parents_b, parents_a)
+        children[1::2] = np.where(masks, parents_a, parents_b)
+        return children
+
+    def crossover_masks(self, pairs):
+        """
+        Draw the crossover mask of every pair, True meaning the first child takes the bit from the second parent.
+
+        Args:
+            pairs (int): The number of pairs of parents.
+
+        Returns:
+            numpy.ndarray: The masks, one row per pair.
+        """
+        string_size = self._string_size
+        if self._crossover_operator == UNIFORM_CROSSOVER:
+            return self._rng.integers(0, 2, size=(pairs, string_size), dtype=np.uint8).astype(bool)
+        if string_size < 2:
+            return np.zeros((pairs, string_size), dtype=bool)
+        positions = np.arange(string_size)
+        first = self._rng.integers(1, string_size, size=pairs)
+        if self._crossover_operator == ONE_POINT_CROSSOVER or string_size < 3:
+            return positions >= first[:, None]
+        # The second point is drawn from the remaining points so the two are always different
+        second = self._rng.integers(1, string_size - 1, size=pairs)
+        second += second >= first
+        low, high = np.minimum(first, second), np.maximum(first, second)
+        return (positions >= low[:, None]) & (positions < high[:, None])
+
+    def attempt_mutation(self, children):
+        """
+        Mutate the children in place, flipping each bit of a mutated child with the per-bit mutation rate.
+
+        Args:
+            children (numpy.ndarray): The children to mutate.
+        """
+        apply_mutation = np.flatnonzero(self._rng.random(children.shape[0]) < self._prob_apply_mutation)
+        rows_per_chunk = max(1, MUTATION_CHUNK_ELEMENTS // self._string_size)
+        for start in range(0, apply_mutation.size, rows_per_chunk):
+            rows = apply_mutation[start:start + rows_per_chunk]
+            flips = self._rng.random((rows.size, self._string_size), dtype=np.float32) < self._bit_mutation_rate
+            children[rows] ^= flips.view(np.uint8)
+
+    def replace_current_population(self):
+        """
+        Replace the current generation with the next generation.
+        """
+        self._current_generation, self._next_generation = self._next_generation, None
+        self._current_fitness, self._next_fitness = self._next_fitness, None
+
+    def select_mating_parents(self):
+        """
+        Select mating parents and produce offspring for the next generation.
+        """
+        if self._selection_method != 0:
+            raise ValueError(f"populationEngine 1 does not support selectionMethod {self._selection_method}")
+        # Every generation keeps populationSizeN - 1 children plus the best individual
+        children_needed = self._population_size - 1
+        pairs = (children_needed + 1) // 2
+        profiler = self._profiler
+        with profiler.phase("selection"):
+            parents = self.tournament_selection(2 * pairs)
+        with profiler.phase("crossover"):
+            children = self.uniform_crossover(
+                self._current_generation[parents[0::2]], self._current_generation[parents[1::2]]
+            )[:children_needed]
+        with profiler.phase("mutation"):
+            self.attempt_mutation(children)
+        best_index = self._current_fitness.argmax()
+        self._next_generation = np.concatenate((children, self._current_generation[best_index][None, :]))
+        with profiler.phase("fitness"):
+            children_fitness = self.evaluate_fitness(children)
+        self._next_fitness = np.append(children_fitness, self._current_fitness[best_index])
+
+    def get_current_generation(self):
+        """
+        Get the current generation as a list of Individuals.
+
+        Returns:
+            list: The current generation.
+        """
+        return [
+            Individual(self._fitness_function, row.tolist(), int(fitness))
+            for row, fitness in zip(self._current_generation, self._current_fitness)
+        ]
+
+    def set_profiler(self, profiler):
+        """
+        Set the profiler that times the phases of each generation.
+
+        Args:
+            profiler (PhaseProfiler or NullProfiler): The profiler.
+        """
+        self._profiler = profiler
+
+    def close(self):
+        """
+        Release any resources held by the population. The matrix engine holds none.
+        """
+
+    def get_fitness_function(self):
+        """
+        Get the fitness function value.
+
+        Returns:
+            int: The fitness function value.
+        """
+        return self._fitness_function
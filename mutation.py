@@ -0,0 +1,91 @@
+# Author: Daniel Glauber
+# File: mutation.py
+# Description: This file contains the samplers that choose which bits of a child are flipped by mutation.
+import math
+import random
+
+# Sampler values used by the mutationSampler setting
+DENSE_SAMPLER = 0
+GEOMETRIC_SAMPLER = 1
+
+
+def dense_flip_positions(string_size, rate, rng=random):
+    """
+    Choose the bits to flip by drawing one random number per bit.
+    This is the original sampler, kept so older runs can be reproduced.
+
+    Args:
+        string_size (int): The size of the solution string.
+        rate (float): The probability that a single bit is flipped.
+        rng (random.Random, optional): The random number generator to draw from.
+
+    Returns:
+        list: The indexes of the bits to flip in increasing order.
+    """
+    return [index for index in range(string_size) if rng.random() < rate]
+
+
+def geometric_flip_positions(string_size, rate, rng=random):
+    """
+    Choose the bits to flip by jumping straight from one flipped bit to the next.
+    The gap between flipped bits is geometrically distributed, so only one random
+    number is drawn per flipped bit instead of one per bit.
+
+    Args:
+        string_size (int): The size of the solution string.
+        rate (float): The probability that a single bit is flipped.
+        rng (random.Random, optional): The random number generator to draw from.
+
+    Returns:
+        list: The indexes of the bits to flip in increasing order.
+    """
+    if rate <= 0.0:
+        return []
+    if rate >= 1.0:
+        return list(range(string_size))
+    log_keep = math.log(1.0 - rate)
+    positions = []
+    index = -1
+    while True:
+        # 1.0 - random() is in (0, 1], so the logarithm is always defined
+        index += 1 + int(math.log(1.0 - rng.random()) / log_keep)
+        if index >= string_size:
+            return positions
+        positions.append(index)
+
+
+FLIP_POSITION_SAMPLERS = {
+    DENSE_SAMPLER: dense_flip_positions,
+    GEOMETRIC_SAMPLER: geometric_flip_positions,
+}
+
+
+def get_flip_position_sampler(mutation_sampler):
+    """
+    Get the sampler function for a mutationSampler setting value.
+
+    Args:
+        mutation_sampler (int): The mutationSampler setting value.
+
+    Returns:
+        function: The sampler function.
+    """
+    if mutation_sampler not in FLIP_POSITION_SAMPLERS:
+        raise ValueError(f"Unknown mutationSampler {mutation_sampler}")
+    return FLIP_POSITION_SAMPLERS[mutation_sampler]
+
+
+def get_bit_mutation_rate(bit_mutation_rate, string_size):
+    """
+    Get the per-bit mutation rate, where 0 means the default rate of 1/stringSizeN.
+
+    Args:
+        bit_mutation_rate (float): The bitMutationRate setting value.
+        string_size (int): The size of the solution string.
+
+    Returns:
+        float: The probability that a single bit is flipped.
+    """
+    if bit_mutation_rate < 0.0:
+        raise ValueError("bitMutationRate cannot be negative")
+    return bit_mutation_rate if bit_mutation_rate > 0.0 else 1 / string_size
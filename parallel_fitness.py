@@ -0,0 +1,136 @@
+# Author: Daniel Glauber
+# File: parallel_fitness.py
+# Description: This file contains the evaluator that computes the fitness of a batch of individuals in a process pool.
+import math
+from concurrent.futures import ProcessPoolExecutor
+from fitness import CachedFitnessFunction, get_fitness_function
+
+# The fitness function used by a worker process, set once by the pool initializer
+_worker_fitness_function = None
+
+
+def _initialize_worker(fitness_function_value):
+    """
+    Resolve the fitness function once in each worker process.
+
+    Args:
+        fitness_function_value (int, str or FitnessFunction): The fitnessFunction setting value.
+    """
+    global _worker_fitness_function
+    _worker_fitness_function = get_fitness_function(fitness_function_value)
+
+
+def _evaluate_in_worker(genome):
+    """
+    Evaluate the fitness of a single solution in a worker process.
+
+    Args:
+        genome (ListGenome or PackedGenome): The solution to evaluate.
+
+    Returns:
+        int: The fitness of the solution.
+    """
+    return _worker_fitness_function.evaluate(genome)
+
+
+class FitnessEvaluator:
+    """
+    Evaluates the fitness of every individual that still needs it, either in the
+    current process or spread over a pool of worker processes.
+    """
+    def __init__(self, fitness_function_value, fitness, workers=0, chunk_size=0):
+        """
+        Initialize the FitnessEvaluator.
+
+        Args:
+            fitness_function_value (int, str or FitnessFunction): The fitnessFunction setting value,
+                used to resolve the fitness function in the worker processes.
+            fitness (FitnessFunction): The fitness function used in the current process, possibly cached.
+            workers (int, optional): The number of worker processes, 0 evaluates in the current process.
+            chunk_size (int, optional): The number of solutions sent to a worker at a time, 0 picks one automatically.
+        """
+        if workers < 0:
+            raise ValueError("fitnessWorkers cannot be negative")
+        if chunk_size < 0:
+            raise ValueError("fitnessChunkSize cannot be negative")
+        self._fitness_function_value = fitness_function_value
+        self._fitness = fitness
+        self._workers = workers
+        self._chunk_size = chunk_size
+        self._executor = None
+
+    @property
+    def workers(self):
+        return self._workers
+
+    @property
+    def chunk_size(self):
+        return self._chunk_size
+
+    @property
+    def is_parallel(self):
+        return self._workers > 0
+
+    def _get_executor(self):
+        """
+        Get the process pool, starting it on first use.
+
+        Returns:
+            ProcessPoolExecutor: The process pool.
+        """
+        if self._executor is None:
+            worker_fitness = self._fitness_function_value
+            if isinstance(worker_fitness, CachedFitnessFunction):
+                worker_fitness = worker_fitness.fitness_function
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                initializer=_initialize_worker,
+                initargs=(worker_fitness,)
+            )
+        return self._executor
+
+    def evaluate(self, individuals):
+        """
+        Evaluate every individual whose fitness has not been evaluated yet and write the results back.
+
+        Args:
+            individuals (list): The individuals to evaluate.
+        """
+        pending = [individual for individual in individuals if not individual.fitness_evaluated]
+        if not pending:
+            return
+        if not self.is_parallel:
+            for individual in pending:
+                individual.evaluate_solution_fitness()
+            return
+        cache = self._fitness if isinstance(self._fitness, CachedFitnessFunction) else None
+        keys = []
+        if cache is not None:
+            # Answer what we can from the cache and only send the misses to the workers
+            uncached = []
+            for individual in pending:
+                key, fitness = cache.lookup(individual.genome)
+                if fitness is None:
+                    uncached.append(individual)
+                    keys.append(key)
+                else:
+                    individual.evaluate_solution_fitness(fitness)
+            pending = uncached
+            if not pending:
+                return
+        chunk_size = self._chunk_size or max(1, math.ceil(len(pending) / (self._workers * 4)))
+        results = self._get_executor().map(
+            _evaluate_in_worker, [individual.genome for individual in pending], chunksize=chunk_size
+        )
+        for index, (individual, fitness) in enumerate(zip(pending, results)):
+            individual.evaluate_solution_fitness(fitness)
+            if cache is not None:
+                cache.store(keys[index], fitness)
+
+    def close(self):
+        """
+        Shut down the process pool if it was started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
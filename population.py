@@ -1,27 +1,81 @@
 # Author: Daniel Glauber
 # File: population.py
 # Description: This file contains the class that represents the entire population of individual solutions.
-import copy
-import random
-import logging
+import heapq
 from operator import attrgetter
-from individual import Individual
+from individual import Individual, IndividualPool
+from fitness import CachedFitnessFunction, create_fitness_function
+from checkpoint import LazyGeneration, random_state_from_json, random_state_to_json
+from generation_statistics import GenerationStatistics
+from fitness_heap import FitnessHeap
+from diversity import DIVERSITY_STATISTICS_ON, create_allele_counts
+from selection import (
+    BATCHED_SELECTION, SINGLE_SELECTION, TOURNAMENT_SELECTION, get_selection_function, tournament_winners
+)
+from genome import PACKED_GENOME, genome_from_bytes, make_genome, popcount
+from parallel_fitness import FitnessEvaluator
+from profiling import NULL_PROFILER, ProfiledFitnessFunction
+from tracing import NULL_TRACE
+from mutation import get_bit_mutation_rate, get_flip_position_sampler
+from crossover import get_crossover_mask_function
+from rng import MAIN_STREAM, OPERATOR_STREAMS, SHARED_STREAMS, RandomStreams
 import settings_loader as sl
 
-logging.basicConfig(level=logging.INFO, format='%(message)s')
+# Values used by the replacementStrategy setting
+GENERATIONAL_REPLACEMENT = 0
+STEADY_STATE_REPLACEMENT = 1
 
 
 class Population:
     """
     Represents the entire population of individual solutions.
     """
-    def __init__(self):
+    def __init__(self, config=None):
         """
         Initialize the Population with settings and empty generations.
+        
+        Args:
+            config (SGAConfig, optional): The settings of the run (default: the settings loaded by the settings loader).
         """
-        self._fitness_function = sl.get_setting("fitnessFunction")
+        self._config = config if config is not None else sl.current_config()
+        self._fitness_function = self._config.fitnessFunction
+        self._fitness = create_fitness_function(self._fitness_function, self._config.fitnessCacheSize)
+        self._fitness_evaluator = FitnessEvaluator(
+            self._fitness_function,
+            self._fitness,
+            self._config.fitnessWorkers,
+            self._config.fitnessChunkSize
+        )
+        # Individuals evaluate with this fitness function, which also times the evaluations while profiling
+        self._individual_fitness = self._fitness
+        self._profiler = NULL_PROFILER
+        self._trace = NULL_TRACE
+        self._genome_representation = self._config.genomeRepresentation
         self._current_generation = []
         self._next_generation = []
+        self._spare_individual = None
+        # The individuals the children of a steady-state step are bred into
+        self._steady_state_children = []
+        # Individuals that left a generation wait here to be overwritten instead of new ones being created
+        self._individual_pool = IndividualPool(self._individual_fitness, self._genome_representation)
+        self._random_streams = None
+        self._initialization_random = None
+        self._crossover_random = None
+        self._mutation_random = None
+        self._tournament_random = None
+        self._selection_random = None
+        self._current_statistics = GenerationStatistics()
+        self._next_statistics = GenerationStatistics()
+        # Per-locus allele counts of each generation, kept up to date like the statistics when they are on
+        diversity_statistics = self._config.diversityStatistics
+        if self._config.minimumDiversity > 0:
+            diversity_statistics = DIVERSITY_STATISTICS_ON
+        self._current_alleles = create_allele_counts(diversity_statistics, self._config.stringSizeN)
+        self._next_alleles = create_allele_counts(diversity_statistics, self._config.stringSizeN)
+
+    @property
+    def config(self):
+        return self._config
 
     @property
     def current_generation(self):
@@ -30,6 +84,8 @@ class Population:
     @current_generation.setter
     def current_generation(self, value):
         self._current_generation = value
+        self._current_statistics.add_generation(value)
+        self._current_alleles.add_generation(value)
 
     @property
     def next_generation(self):
@@ -45,7 +101,40 @@ class Population:
 
     @fitness_function.setter
     def fitness_function(self, value):
-        self._fitness_function = value
+        self.set_fitness_function(value)
+
+    @property
+    def fitness(self):
+        return self._fitness
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, value):
+        self.set_profiler(value)
+
+    @property
+    def trace(self):
+        return self._trace
+
+    @trace.setter
+    def trace(self, value):
+        self._trace = value
+
+    @property
+    def fitness_evaluator(self):
+        return self._fitness_evaluator
+
+    @property
+    def genome_representation(self):
+        return self._genome_representation
+
+    @genome_representation.setter
+    def genome_representation(self, value):
+        self._genome_representation = value
+        self._individual_pool = IndividualPool(self._individual_fitness, value)
 
     @property
     def string_size(self):
@@ -87,6 +176,14 @@ class Population:
     def prob_apply_mutation(self, value):
         self._prob_apply_mutation = value
 
+    @property
+    def bit_mutation_rate(self):
+        return self._bit_mutation_rate
+
+    @bit_mutation_rate.setter
+    def bit_mutation_rate(self, value):
+        self._bit_mutation_rate = value
+
     @property
     def tournament_selection_size(self):
         return self._tournament_selection_size
@@ -130,35 +227,166 @@ class Population:
             Individual: A new individual with a random solution.
         """
         # Create a random binary solution of the given size
-        starting_solution = [random.randint(0, 1) for i in range(string_size)]
-        return Individual(self._fitness_function, starting_solution)
+        if self._random_streams_setting == OPERATOR_STREAMS:
+            # All the bits are drawn in one call
+            genome = genome_from_bytes(
+                self._initialization_random.getrandbits(string_size).to_bytes((string_size + 7) // 8, "little"),
+                string_size,
+                self._genome_representation
+            )
+        else:
+            starting_solution = [self._initialization_random.randint(0, 1) for i in range(string_size)]
+            genome = make_genome(starting_solution, self._genome_representation)
+        individual = self._individual_pool.acquire()
+        # With parallel evaluation the fitness is computed later for the whole population at once
+        individual.assign(genome, evaluate=not self._fitness_evaluator.is_parallel)
+        return individual
 
-    def initialize_random_starting_population(self):
+    def initialize_random_starting_population(self, seed=None):
         """
         Initialize the starting population with random individuals.
+        
+        Args:
+            seed (int or str, optional): The random seed to use instead of the randSeed setting.
         """
         # Set the random seed for reproducibility
-        random.seed(sl.get_setting("randSeed"))
-        # Load settings from the settings loader
-        self._full_debug = sl.get_setting("fullDebug")
-        self._limited_debug = sl.get_setting("limitedDebug")
-        self._string_size = sl.get_setting("stringSizeN")
-        self._population_size = sl.get_setting("populationSizeN")
-        self._selection_method = sl.get_setting("selectionMethod")
-        self._prob_apply_crossover = sl.get_setting("probApplyCrossover")
-        self._prob_apply_mutation = sl.get_setting("probApplyMutation")
-        self._tournament_selection_size = sl.get_setting("tournamentSizeK")
-        self._failures_before_termination = sl.get_setting("failuresBeforeTermination")
+        if seed is None:
+            seed = self._config.randSeed
+        self._load_run_settings()
+        self._set_random_streams(RandomStreams(seed))
+        self._retire_generation(self._current_generation)
         # Initialize the current generation with random individuals
         self._current_generation = [
             self.initialize_random_individual(self._string_size) for i in range(self._population_size)
         ]
-        # Log the initial population if debugging is enabled
-        if self._full_debug or self._limited_debug:
-            logging.debug("Initial Population")
-            temp_population = copy.deepcopy(self._current_generation)
-            for i in temp_population:
-                logging.debug(f"{i.solution_as_string()}")
+        with self._profiler.phase("fitness"):
+            self._fitness_evaluator.evaluate(self._current_generation)
+        with self._profiler.phase("statistics"):
+            self._current_statistics.add_generation(self._current_generation)
+            self._current_alleles.add_generation(self._current_generation)
+
+    def _load_run_settings(self):
+        """
+        Load the settings used while the population evolves from the configuration.
+        """
+        self._full_debug = self._config.fullDebug
+        self._limited_debug = self._config.limitedDebug
+        self._string_size = self._config.stringSizeN
+        self._population_size = self._config.populationSizeN
+        self._selection_method = self._config.selectionMethod
+        self._prob_apply_crossover = self._config.probApplyCrossover
+        self._prob_apply_mutation = self._config.probApplyMutation
+        self._tournament_selection_size = self._config.tournamentSizeK
+        self._truncation_size = self._config.truncationSizeT
+        if self._truncation_size > self._population_size:
+            raise ValueError(f"truncationSizeT {self._truncation_size} is larger than populationSizeN")
+        self._batched_selection = self._config.batchedSelection
+        if self._batched_selection not in (SINGLE_SELECTION, BATCHED_SELECTION):
+            raise ValueError(f"Unknown batchedSelection {self._batched_selection}")
+        self._bit_mutation_rate = get_bit_mutation_rate(self._config.bitMutationRate, self._string_size)
+        self._sample_flip_positions = get_flip_position_sampler(self._config.mutationSampler)
+        self._crossover_mask = get_crossover_mask_function(
+            self._config.crossoverOperator, self._config.crossoverMaskSampler
+        )
+        self._failures_before_termination = self._config.failuresBeforeTermination
+        self._random_streams_setting = self._config.randomStreams
+        self._replacement_strategy = self._config.replacementStrategy
+        if self._replacement_strategy not in (GENERATIONAL_REPLACEMENT, STEADY_STATE_REPLACEMENT):
+            raise ValueError(f"Unknown replacementStrategy {self._replacement_strategy}")
+        self._steady_state_children_count = self._config.steadyStateChildren
+        # Check the selection method before the run starts rather than when the first generation is bred
+        self._selection_function()
+        if self._replacement_strategy == STEADY_STATE_REPLACEMENT and self._selection_method != TOURNAMENT_SELECTION:
+            # Every other method builds an O(n) structure for its draws, which a steady-state step cannot afford
+            raise ValueError(f"replacementStrategy 1 does not support selectionMethod {self._selection_method}")
+        if self._random_streams_setting not in (SHARED_STREAMS, OPERATOR_STREAMS):
+            raise ValueError(f"Unknown randomStreams {self._random_streams_setting}")
+
+    def _set_random_streams(self, random_streams):
+        """
+        Take the random stream of every operator from the random number service of the population.
+        Batched selection always draws from its own stream so it does not shift the draws of the other operators.
+        
+        Args:
+            random_streams (RandomStreams): The random number service.
+        """
+        self._random_streams = random_streams
+        if self._random_streams_setting == OPERATOR_STREAMS:
+            self._initialization_random = random_streams.stream("initialization")
+            self._crossover_random = random_streams.stream("crossover")
+            self._mutation_random = random_streams.stream("mutation")
+            self._tournament_random = random_streams.stream("selection")
+        else:
+            shared_random = random_streams.stream(MAIN_STREAM)
+            self._initialization_random = shared_random
+            self._crossover_random = shared_random
+            self._mutation_random = shared_random
+            self._tournament_random = shared_random
+        self._selection_random = random_streams.stream("selection")
+
+    @property
+    def random_streams(self):
+        return self._random_streams
+
+    def get_checkpoint_state(self):
+        """
+        Get the state needed to continue evolving the current generation exactly as if the run never stopped.
+        
+        Returns:
+            dict: The random states, and the fitness values and genomes of the current generation.
+        """
+        return {
+            "random_states": {
+                name: random_state_to_json(state) for name, state in self._random_streams.getstate().items()
+            },
+            "fitness_values": self._current_fitness_values(),
+            "genomes": (individual.genome for individual in self._current_generation),
+        }
+
+    def resume_from_checkpoint(self, reader):
+        """
+        Continue from the state saved in a checkpoint. The individuals are read from the checkpoint
+        the first time they are needed, so even a very large population resumes quickly.
+        
+        Args:
+            reader (CheckpointReader): The checkpoint.
+        """
+        self._load_run_settings()
+        if reader.population_size != self._population_size or reader.string_size != self._string_size:
+            raise ValueError(f"Checkpoint {reader.path} does not match populationSizeN and stringSizeN")
+        random_streams = RandomStreams(reader.header["settings"]["randSeed"])
+        random_streams.setstate({
+            name: random_state_from_json(state) for name, state in reader.header["random_states"].items()
+        })
+        self._set_random_streams(random_streams)
+        genome_representation = self._genome_representation
+
+        def create_individual(checkpoint_reader, index, fitness):
+            return Individual.from_genome(
+                self._individual_fitness,
+                checkpoint_reader.genome(index, genome_representation),
+                fitness,
+                genome_representation=genome_representation
+            )
+
+        self._current_generation = LazyGeneration(reader, create_individual)
+        self._next_generation = []
+        self._current_statistics.add_fitness_values(self._current_generation.fitness_values())
+        # The genomes are read as packed genomes, without creating the individuals of the lazy generation
+        self._current_alleles.add_genomes(
+            reader.genome(index, PACKED_GENOME) for index in range(reader.population_size)
+        )
+
+    def _current_fitness_values(self):
+        """
+        Get the fitness of every individual of the current generation in index order.
+        
+        Returns:
+            list: The fitness values.
+        """
+        if isinstance(self._current_generation, LazyGeneration):
+            return self._current_generation.fitness_values()
+        return [individual.solution_fitness for individual in self._current_generation]
 
     def get_average_fitness(self):
         """
@@ -167,12 +395,7 @@ class Population:
         Returns:
             float: The average fitness of the current generation.
         """
-        # Calculate the average fitness of the current generation
-        self._current_average_fitness = (
-            sum(individual.get_solution_fitness() for individual in self._current_generation) /
-            sl.get_setting("populationSizeN")
-        )
-        return self._current_average_fitness
+        return self._current_statistics.mean
 
     def get_worst_fitness(self):
         """
@@ -181,15 +404,12 @@ class Population:
         Returns:
             dict: A dictionary containing the worst fitness, solution, and index.
         """
-        # Find the individual with the worst fitness
-        worst_individual = min(self._current_generation, key=attrgetter('_solution_fitness'))
-        worst_index = self._current_generation.index(worst_individual)
-        worst_data = {
-            "fitness": worst_individual.get_solution_fitness(),
-            "solution": worst_individual.get_solution(),
+        worst_index = self._current_statistics.worst_index
+        return {
+            "fitness": self._current_statistics.worst,
+            "solution": self._current_generation[worst_index].get_solution(),
             "index": worst_index
         }
-        return worst_data
 
     def get_best_fitness(self):
         """
@@ -198,15 +418,56 @@ class Population:
         Returns:
             dict: A dictionary containing the best fitness, solution, and index.
         """
-        # Find the individual with the best fitness
-        best_individual = max(self._current_generation, key=attrgetter('_solution_fitness'))
-        best_index = self._current_generation.index(best_individual)
-        best_data = {
-            "fitness": best_individual.get_solution_fitness(),
-            "solution": best_individual.get_solution(),
+        best_index = self._current_statistics.best_index
+        return {
+            "fitness": self._current_statistics.best,
+            "solution": self._current_generation[best_index].get_solution(),
             "index": best_index
         }
-        return best_data
+
+    def get_generation_statistics(self):
+        """
+        Get the fitness statistics of the current generation without copying any solution.
+        
+        Returns:
+            dict: The best, average, worst and variance of the fitness, and the indexes of the best and worst individuals.
+        """
+        return self._current_statistics.as_dict()
+
+    def get_diversity_statistics(self):
+        """
+        Get the diversity statistics of the current generation from its allele counts, in O(L).
+        
+        Returns:
+            dict: The bitwise diversity, the mean Hamming distance between individuals and the number of converged loci,
+                or None if the diversity statistics are off.
+        """
+        return self._current_alleles.as_dict()
+
+    def get_individual(self, index):
+        """
+        Get an individual of the current generation without copying it.
+        
+        Args:
+            index (int): The index of the individual.
+        
+        Returns:
+            Individual: The individual.
+        """
+        return self._current_generation[index]
+
+    def copy_genome(self, index):
+        """
+        Get a copy of the genome of an individual of the current generation,
+        which stays valid after the individual is overwritten by a later generation.
+        
+        Args:
+            index (int): The index of the individual.
+        
+        Returns:
+            ListGenome or PackedGenome: The copy of the genome.
+        """
+        return self._current_generation[index].genome.copy()
 
     def single_tournament_selection(self):
         """
@@ -226,36 +487,119 @@ class Population:
             Individual: The selected parent.
         """
         # Randomly select individuals for the tournament
-        selection = random.choices(self._current_generation, k=self._tournament_selection_size)
+        selection = self._tournament_random.choices(self._current_generation, k=self._tournament_selection_size)
         # Choose the best individual from the tournament
         best_parent = max(selection, key=attrgetter('_solution_fitness'))
-        # Log the selection process if full debugging is enabled
-        if self._full_debug:
-            logging.debug("Selecting parent")
-            logging.debug('\n'.join([
-                f"{parent.solution_as_string()}, Fitness: {parent.get_solution_fitness()}"
-                for parent in selection
-            ]))
-            logging.debug(f"Selected parent: {best_parent.solution_as_string()}\n")
+        # Trace the tournament if it is sampled
+        if self._trace.active and self._trace.sample("tournament"):
+            self._trace.record(
+                "tournament", [parent.solution_fitness for parent in selection], best_parent.solution_fitness
+            )
         return best_parent
 
-    def tournament_selection(self, empty):
+    def batched_tournament_selection(self, count, fitness=None):
+        """
+        Run the tournaments for count parents at once over the fitness of the current generation.
+        
+        Args:
+            count (int): The number of parents to select.
+            fitness (list, optional): The fitness of every individual by index, if it is already known.
+        
+        Returns:
+            list: The index of every selected parent in the current generation.
+        """
+        if fitness is None:
+            fitness = self._current_fitness_values()
+        winners = tournament_winners(
+            fitness,
+            count,
+            self._tournament_selection_size,
+            self._selection_random,
+            self._random_streams_setting == OPERATOR_STREAMS
+        )
+        if self._trace.active:
+            self._trace.record("selection", winners, TOURNAMENT_SELECTION, self._tournament_selection_size)
+        return winners
+
+    def _selection_function(self):
+        """
+        Get the batched selection function of the selection method of the population.
+
+        Returns:
+            function: The selection function.
+        """
+        return get_selection_function(
+            self._selection_method,
+            self._tournament_selection_size,
+            self._truncation_size,
+            self._random_streams_setting == OPERATOR_STREAMS
+        )
+
+    def batched_selection(self, count, fitness=None):
+        """
+        Select count parents at once over the fitness of the current generation with the selection method
+        of the population. Roulette and rank selection build their alias table once for the whole batch.
+        
+        Args:
+            count (int): The number of parents to select.
+            fitness (list, optional): The fitness of every individual by index, if it is already known.
+        
+        Returns:
+            list: The index of every selected parent in the current generation.
+        """
+        if self._selection_method == TOURNAMENT_SELECTION:
+            return self.batched_tournament_selection(count, fitness)
+        if fitness is None:
+            fitness = self._current_fitness_values()
+        winners = self._selection_function()(fitness, count, rng=self._selection_random)
+        if self._trace.active:
+            self._trace.record("selection", winners, self._selection_method, None)
+        return winners
+
+    def tournament_selection(self, empty, children=None, parents_tuple=None):
         """
         Perform tournament selection and crossover to produce children.
         
         Args:
             empty: Placeholder argument.
+            children (list, optional): Two individuals to overwrite with the children instead of creating new ones.
+            parents_tuple (tuple, optional): Two parents already selected, skipping the tournaments.
         
         Returns:
             list: A list of children produced from the selected parents.
         """
+        if self._profiler.enabled:
+            return self._profiled_tournament_selection(children, parents_tuple)
         # Select parents and perform crossover to produce children
-        parents_tuple = self.single_tournament_selection()
-        children = self.uniform_crossover(parents_tuple)
+        if parents_tuple is None:
+            parents_tuple = self.single_tournament_selection()
+        children = self.uniform_crossover(parents_tuple, children)
         # Attempt to mutate each child
         [self.attempt_mutation(child) for child in children]
         return children
 
+    def _profiled_tournament_selection(self, children, parents_tuple):
+        """
+        Perform tournament_selection with the selection, crossover and mutation phases timed by the profiler.
+        
+        Args:
+            children (list): Two individuals to overwrite with the children, or None to create new ones.
+            parents_tuple (tuple): Two parents already selected, or None to run the tournaments.
+        
+        Returns:
+            list: A list of children produced from the selected parents.
+        """
+        profiler = self._profiler
+        if parents_tuple is None:
+            with profiler.phase("selection"):
+                parents_tuple = self.single_tournament_selection()
+        with profiler.phase("crossover"):
+            children = self.uniform_crossover(parents_tuple, children)
+        with profiler.phase("mutation"):
+            for child in children:
+                self.attempt_mutation(child)
+        return children
+
     def attempt_mutation(self, child):
         """
         Attempt to mutate a child's solution.
@@ -264,91 +608,271 @@ class Population:
             child (Individual): The child to mutate.
         """
         # Mutate the child with a certain probability
-        if random.random() < self._prob_apply_mutation:
-            indexes_to_mutate_bool_list = [random.random() < 1 / self._string_size for i in range(self._string_size)]
-            if self._full_debug:
-                child.mutate_solution(indexes_to_mutate_bool_list, True)
+        if self._mutation_random.random() < self._prob_apply_mutation:
+            # Only the indexes of the bits that flip are sampled
+            positions = self._sample_flip_positions(
+                self._string_size, self._bit_mutation_rate, self._mutation_random
+            )
+            if self._trace.active and self._trace.sample("mutation"):
+                fitness_before = child.solution_fitness
+                child.mutate_positions(positions, not self._fitness_evaluator.is_parallel)
+                self._trace.record("mutation", positions, fitness_before, child.solution_fitness)
             else:
-                child.mutate_solution(indexes_to_mutate_bool_list)
+                child.mutate_positions(positions, not self._fitness_evaluator.is_parallel)
 
-    def uniform_crossover(self, parents_tuple):
+    def uniform_crossover(self, parents_tuple, children=None):
         """
-        Perform uniform crossover on a tuple of parents to produce children.
+        Perform crossover on a tuple of parents to produce children, with the operator of the crossoverOperator setting.
+        The children are merged from the parents' genomes through a mask, without copying the parents.
         
         Args:
             parents_tuple (tuple): A tuple containing two parent individuals.
+            children (list, optional): Two individuals to overwrite with the children instead of creating new ones.
         
         Returns:
             list: A list of two children produced from the parents.
         """
-        # Get the solutions of the parents
-        parents_solution_tuple = (
-            parents_tuple[0].get_solution(), parents_tuple[1].get_solution()
-        )
-        # Log the parents' solutions before crossover if full debugging is enabled
-        if self._full_debug:
-            logging.debug("Before Crossover")
-            logging.debug(f"p1: {parents_tuple[0].solution_as_string()}")
-            logging.debug(f"p2: {parents_tuple[1].solution_as_string()}")
-
+        if children is None:
+            children = [self._individual_pool.acquire() for parent in parents_tuple]
         # Perform crossover with a certain probability
-        if random.random() < self._prob_apply_crossover:
+        mask = None
+        if self._crossover_random.random() < self._prob_apply_crossover:
             # Create children by combining parents' solutions
-            res = [(i, i ^ 1) for i in (random.choice([0, 1]) for i in range(self._string_size))]
-            child_a = [parents_solution_tuple[parent[0]][index] for index, parent in enumerate(res)]
-            child_b = [parents_solution_tuple[parent[1]][index] for index, parent in enumerate(res)]
-            children = [
-                Individual(self._fitness_function, child_a),
-                Individual(self._fitness_function, child_b)
-            ]
-            # Log the children's solutions after crossover if full debugging is enabled
-            if self._full_debug:
-                logging.debug("After Crossover")
-                logging.debug(f"c1: {children[0].solution_as_string()}")
-                logging.debug(f"c2: {children[1].solution_as_string()}\n")
-            return children
+            mask = self._crossover_mask(self._string_size, self._crossover_random)
+            parent_a, parent_b = parents_tuple[0].genome, parents_tuple[1].genome
+            child_a, child_b = children[0].genome, children[1].genome
+            if type(child_a) is type(parent_a) is type(child_b) and \
+                    child_a is not parent_a and child_a is not parent_b and \
+                    child_b is not parent_a and child_b is not parent_b:
+                # The children's genomes are overwritten in place so no genome is created
+                parent_a.cross_into(parent_b, mask, child_a, child_b)
+            else:
+                child_a, child_b = parent_a.cross(parent_b, mask)
+            self._evaluate_children(parents_tuple, children, child_a, child_b, mask)
         else:
             # If no crossover, children are clones of parents
-            children = [
-                Individual(self._fitness_function, parents_tuple[0].get_solution(), parents_tuple[0].get_solution_fitness()),
-                Individual(self._fitness_function, parents_tuple[1].get_solution(), parents_tuple[1].get_solution_fitness())
-            ]
-            # Log the children's solutions after crossover if full debugging is enabled
-            if self._full_debug:
-                logging.debug("After Crossover")
-                logging.debug(f"c1: {children[0].solution_as_string()}")
-                logging.debug(f"c2: {children[1].solution_as_string()}\n")
-            return children
+            children[0].copy_from(parents_tuple[0])
+            children[1].copy_from(parents_tuple[1])
+        # Trace the crossover if it is sampled, the mask is only formatted when the generation is written
+        if self._trace.active and self._trace.sample("crossover"):
+            self._trace.record(
+                "crossover",
+                mask,
+                self._string_size,
+                [parents_tuple[0].solution_fitness, parents_tuple[1].solution_fitness],
+                [children[0].solution_fitness, children[1].solution_fitness]
+            )
+        return children
+
+    def _evaluate_children(self, parents_tuple, children, child_a, child_b, mask):
+        """
+        Assign the crossed genomes to the children and evaluate them, each from the parent it shares most of its bits with
+        when few enough bits were crossed for an incremental update.
+        Both children differ from their closest parent at the same positions, which are found from the mask
+        without comparing the whole genomes.
+
+        Args:
+            parents_tuple (tuple): The two parent individuals.
+            children (list): The two children to overwrite.
+            child_a (ListGenome or PackedGenome): The genome that takes the bits of the second parent where the mask is set.
+            child_b (ListGenome or PackedGenome): The genome that takes the bits of the first parent where the mask is set.
+            mask (int): The crossover mask.
+        """
+        evaluate = not self._fitness_evaluator.is_parallel
+        string_size = self._string_size
+        crossed_count = popcount(mask)
+        if not evaluate or not self._fitness.use_delta(min(crossed_count, string_size - crossed_count), string_size):
+            # At most the crossed bits differ, which are already too many for an incremental update
+            children[0].assign(child_a, evaluate=evaluate)
+            children[1].assign(child_b, evaluate=evaluate)
+            return
+        parent_a, parent_b = parents_tuple
+        if crossed_count <= string_size - crossed_count:
+            # The first child differs from the first parent where the mask is set
+            changed_positions = parent_a.genome.masked_differing_positions(parent_b.genome, mask)
+        else:
+            # Most bits were crossed, so the first child is closer to the second parent, where the mask is not set
+            changed_positions = parent_a.genome.masked_differing_positions(
+                parent_b.genome, ~mask & ((1 << string_size) - 1)
+            )
+            parent_a, parent_b = parent_b, parent_a
+        children[0].assign(child_a, parent=parent_a, changed_positions=changed_positions)
+        children[1].assign(child_b, parent=parent_b, changed_positions=changed_positions)
 
     def replace_current_population(self):
         """
         Replace the current generation with the next generation.
+        The two generation buffers swap roles, so the retired generation's individuals
+        are overwritten in place when the following generation is bred.
+        With steady-state replacement the children already replaced individuals of the current generation,
+        so there is nothing to swap.
+        """
+        if self._replacement_strategy == STEADY_STATE_REPLACEMENT:
+            return
+        self._current_generation, self._next_generation = self._next_generation, self._current_generation
+        self._current_statistics, self._next_statistics = self._next_statistics, self._current_statistics
+        self._current_alleles, self._next_alleles = self._next_alleles, self._current_alleles
+
+    def _prepare_next_generation_buffer(self):
+        """
+        Make sure the next generation buffer holds populationSizeN individuals that can be overwritten,
+        plus a spare individual that receives a child with no room left in the buffer.
+        """
+        if isinstance(self._next_generation, LazyGeneration):
+            # The generation read from a checkpoint is replaced by reusable individuals
+            self._next_generation.close()
+            self._next_generation = []
+        missing = self._population_size - len(self._next_generation)
+        if missing > 0:
+            self._next_generation.extend(self._individual_pool.acquire() for i in range(missing))
+        elif missing < 0:
+            self._individual_pool.release_all(self._next_generation[self._population_size:])
+            del self._next_generation[self._population_size:]
+        if self._spare_individual is None:
+            self._spare_individual = self._individual_pool.acquire()
+
+    def _retire_generation(self, generation, replacement=()):
+        """
+        Give the individuals of a generation that is being replaced back to the individual pool.
+        Individuals that are also part of the replacement generation are kept.
+        
+        Args:
+            generation (list or LazyGeneration): The generation being replaced.
+            replacement (list, optional): The generation that replaces it.
         """
-        # Clear the current generation and replace it with the next generation
-        self._current_generation = []
-        self._current_generation = copy.deepcopy(self._next_generation)
-        self._next_generation = []
+        if isinstance(generation, LazyGeneration):
+            # The individuals read from a checkpoint are released with the checkpoint
+            return
+        kept = set(map(id, replacement))
+        self._individual_pool.release_all(individual for individual in generation if id(individual) not in kept)
 
     def select_mating_parents(self):
         """
         Select mating parents and produce offspring for the next generation.
+        The children overwrite the individuals of the next generation buffer in place.
+        """
+        if self._replacement_strategy == STEADY_STATE_REPLACEMENT:
+            self.breed_steady_state()
+            return
+        self._prepare_next_generation_buffer()
+        next_generation = self._next_generation
+        next_statistics = self._next_statistics
+        next_statistics.reset()
+        next_alleles = self._next_alleles
+        next_alleles.reset()
+        # Children are added to the statistics as they are inserted, unless their evaluation is deferred
+        collect_statistics = not self._fitness_evaluator.is_parallel
+        # The last slot is kept for the best individual of the current generation
+        children_slots = self._population_size - 1
+        pairs = self._population_size // 2
+        current_generation = self._current_generation
+        parents = None
+        # Only tournaments can be run one at a time, the other selection methods always select in batches
+        batched = self._batched_selection == BATCHED_SELECTION or self._selection_method != TOURNAMENT_SELECTION
+        if batched:
+            with self._profiler.phase("selection"):
+                parents = self.batched_selection(2 * pairs)
+        # Perform selection and crossover to produce new offspring
+        for pair in range(pairs):
+            first_slot = 2 * pair
+            second_slot = first_slot + 1
+            self.tournament_selection(pair, [
+                next_generation[first_slot] if first_slot < children_slots else self._spare_individual,
+                next_generation[second_slot] if second_slot < children_slots else self._spare_individual
+            ], None if parents is None else (current_generation[parents[first_slot]], current_generation[parents[second_slot]]))
+            for slot in (first_slot, second_slot):
+                if slot < children_slots:
+                    next_alleles.add(next_generation[slot].genome)
+                    if collect_statistics:
+                        next_statistics.add(slot, next_generation[slot].solution_fitness)
+        # Ensure the best individual is included in the next generation
+        next_generation[children_slots].copy_from(self._current_generation[self._current_statistics.best_index])
+        next_alleles.add(next_generation[children_slots].genome)
+        if collect_statistics:
+            next_statistics.add(children_slots, next_generation[children_slots].solution_fitness)
+        else:
+            # Evaluate every child whose fitness was deferred before the generation is reported
+            with self._profiler.phase("fitness"):
+                self._fitness_evaluator.evaluate(next_generation)
+            with self._profiler.phase("statistics"):
+                next_statistics.add_generation(next_generation)
+
+    def breed_steady_state(self):
+        """
+        Breed populationSizeN children a few at a time. Every step breeds steadyStateChildren children and
+        replaces the worst individuals of the current generation with them, one child at a time, so a
+        generation reported by the controller covers as many fitness evaluations as a generational one.
+        The worst and the best individual are kept in a FitnessHeap, so each replacement costs O(log n).
+        """
+        if isinstance(self._current_generation, LazyGeneration):
+            # The individuals of a generation read from a checkpoint are swapped with the children
+            lazy_generation = self._current_generation
+            self._current_generation = lazy_generation.copy()
+            lazy_generation.close()
+        current_generation = self._current_generation
+        alleles = self._current_alleles
+        heap = FitnessHeap(self._current_fitness_values())
+        children_per_step = self._steady_state_children_count
+        children = self._steady_state_children
+        # Children are bred in pairs, so an odd number of children leaves one spare individual
+        missing = children_per_step + children_per_step % 2 - len(children)
+        if missing > 0:
+            children.extend(self._individual_pool.acquire() for i in range(missing))
+        evaluations = 0
+        while evaluations < self._population_size:
+            count = min(children_per_step, self._population_size - evaluations)
+            pairs = (count + 1) // 2
+            parents = None
+            if self._batched_selection == BATCHED_SELECTION:
+                with self._profiler.phase("selection"):
+                    parents = self.batched_tournament_selection(2 * pairs, heap.fitness_values)
+            for pair in range(pairs):
+                first_slot = 2 * pair
+                second_slot = first_slot + 1
+                self.tournament_selection(pair, children[first_slot:second_slot + 1], None if parents is None else (
+                    current_generation[parents[first_slot]], current_generation[parents[second_slot]]
+                ))
+            if self._fitness_evaluator.is_parallel:
+                with self._profiler.phase("fitness"):
+                    self._fitness_evaluator.evaluate(children[:count])
+            with self._profiler.phase("replace"):
+                for slot in range(count):
+                    # The replaced individual becomes the buffer of a child of the next step
+                    worst_index = heap.worst_index
+                    alleles.replace(current_generation[worst_index].genome, children[slot].genome)
+                    current_generation[worst_index], children[slot] = children[slot], current_generation[worst_index]
+                    heap.update(worst_index, current_generation[worst_index].solution_fitness)
+            evaluations += count
+        heap.fill_statistics(self._current_statistics)
+
+    def get_best_individuals(self, count):
+        """
+        Get the individuals with the best fitness in the current generation.
+        
+        Args:
+            count (int): The number of individuals to get.
+        
+        Returns:
+            list: Up to count individuals, best first.
         """
-        # Get the best individual from the current generation
-        best_individual_data = self.get_best_fitness()
-        best_individual = Individual(
-            self._fitness_function,
-            best_individual_data["solution"],
-            best_individual_data["fitness"]
+        return heapq.nlargest(count, self._current_generation, key=attrgetter('_solution_fitness'))
+
+    def replace_worst_individuals(self, genomes_and_fitness):
+        """
+        Replace the individuals with the worst fitness in the current generation.
+        
+        Args:
+            genomes_and_fitness (list): (genome, fitness) pairs for the new individuals.
+        """
+        worst_indexes = heapq.nsmallest(
+            len(genomes_and_fitness),
+            range(len(self._current_generation)),
+            key=lambda index: self._current_generation[index].solution_fitness
         )
-        # Perform selection and crossover to produce new offspring
-        if self._selection_method == 0:
-            new_offspring = map(self.tournament_selection, range(self._population_size // 2))
-            for items in new_offspring:
-                for child in items:
-                    if len(self._next_generation) < self._population_size - 1:
-                        self._next_generation.append(child)
-            # Ensure the best individual is included in the next generation
-            self._next_generation.append(best_individual)
+        for index, (genome, fitness) in zip(worst_indexes, genomes_and_fitness):
+            self._current_generation[index].assign(genome, fitness)
+        self._current_statistics.add_generation(self._current_generation)
+        self._current_alleles.add_generation(self._current_generation)
 
     def get_current_generation(self):
         """
@@ -366,7 +890,11 @@ class Population:
         Args:
             new_generation (list): The new generation to set.
         """
-        self._current_generation = new_generation.copy()
+        new_generation = new_generation.copy()
+        self._retire_generation(self._current_generation, new_generation)
+        self._current_generation = new_generation
+        self._current_statistics.add_generation(self._current_generation)
+        self._current_alleles.add_generation(self._current_generation)
 
     def get_next_generation(self):
         """
@@ -384,7 +912,9 @@ class Population:
         Args:
             new_generation (list): The new generation to set.
         """
-        self._next_generation = new_generation.copy()
+        new_generation = new_generation.copy()
+        self._retire_generation(self._next_generation, new_generation)
+        self._next_generation = new_generation
 
     def get_fitness_function(self):
         """
@@ -403,3 +933,74 @@ class Population:
             new_fitness_function (int): The new fitness function value.
         """
         self._fitness_function = new_fitness_function
+        self._fitness = create_fitness_function(new_fitness_function, self._config.fitnessCacheSize)
+        self._individual_fitness = self._profiled_fitness()
+        self._individual_pool.fitness_function = self._individual_fitness
+        self._fitness_evaluator.close()
+        self._fitness_evaluator = FitnessEvaluator(
+            new_fitness_function,
+            self._fitness,
+            self._fitness_evaluator.workers,
+            self._fitness_evaluator.chunk_size
+        )
+
+    def _profiled_fitness(self):
+        """
+        Get the fitness function individuals evaluate with.
+        
+        Returns:
+            FitnessFunction: The fitness function, timed by the profiler if profiling is on.
+        """
+        if self._profiler.enabled:
+            return ProfiledFitnessFunction(self._fitness, self._profiler)
+        return self._fitness
+
+    def set_profiler(self, profiler):
+        """
+        Set the profiler that times the phases of each generation.
+        It must be set before the starting population is initialized to time every fitness evaluation.
+        
+        Args:
+            profiler (PhaseProfiler or NullProfiler): The profiler.
+        """
+        self._profiler = profiler
+        self._individual_fitness = self._profiled_fitness()
+        self._individual_pool.fitness_function = self._individual_fitness
+
+    def set_trace(self, trace):
+        """
+        Set the trace sink that records the selection, crossover and mutation events.
+        
+        Args:
+            trace (TraceSink or NullTrace): The trace sink.
+        """
+        self._trace = trace
+
+    def close(self):
+        """
+        Release the worker processes used for parallel fitness evaluation and the checkpoint a run was resumed from.
+        """
+        self._fitness_evaluator.close()
+        for generation in (self._current_generation, self._next_generation):
+            if isinstance(generation, LazyGeneration):
+                generation.close()
+
+    def get_fitness_cache_info(self):
+        """
+        Get the statistics of the fitness cache.
+        
+        Returns:
+            dict: The cache statistics, or None if the fitness cache is disabled.
+        """
+        if isinstance(self._fitness, CachedFitnessFunction):
+            return self._fitness.cache_info()
+        return None
+
+    def get_individual_pool_info(self):
+        """
+        Get the statistics of the individual pool, which show how many individuals the run created.
+        
+        Returns:
+            dict: The number of individuals created and the number waiting to be recycled.
+        """
+        return self._individual_pool.info()
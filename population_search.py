@@ -0,0 +1,461 @@
+# Author: Daniel Glauber
+# File: population_search.py
+# Description: This file contains the experiment driver that searches for the minimum population size
+# that reaches SUCCESS for each string size. Every population size is tried with several random seeds
+# on a pool of worker processes, and the results are saved to a CSV table that a power law can be fitted to.
+import argparse
+import contextlib
+import csv
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+from benchmark import parse_setting_override
+from config import DEFAULT_CONFIG, SGAConfig
+
+# The smallest populationSizeN the settings loader accepts
+MINIMUM_POPULATION_SIZE = 2
+DEFAULT_MAXIMUM_POPULATION_SIZE = 1 << 20
+DEFAULT_SEED_COUNT = 5
+TABLE_COLUMNS = [
+    "stringSizeN",
+    "populationSizeN",
+    "seeds",
+    "required",
+    "runs",
+    "cancelled",
+    "seconds",
+    "tried",
+    "error",
+]
+
+
+def run_trial(string_size, population_size, seed, overrides, cancel_event=None):
+    """
+    Run the SGAController once with the default settings, the overrides, a size and a seed.
+    The run stops after the generation during which cancel_event is set.
+
+    Args:
+        string_size (int): The stringSizeN of the run.
+        population_size (int): The populationSizeN of the run.
+        seed (int): The randSeed of the run.
+        overrides (dict): Settings that replace the default values.
+        cancel_event (Event, optional): Set by the scheduler once the run can no longer change the answer.
+
+    Returns:
+        tuple: Whether the run reached SUCCESS, the number of generations it ran, and whether it was cancelled.
+    """
+    # Imported here because sga imports every population engine
+    from sga import SGAController
+    config = SGAConfig.from_dict(overrides).replace(stringSizeN=string_size, populationSizeN=population_size, randSeed=seed)
+    snapshot = None
+    with contextlib.closing(SGAController(config).generations()) as generations:
+        for snapshot in generations:
+            if cancel_event is not None and not snapshot.terminate and cancel_event.is_set():
+                return False, snapshot.generation, True
+    return snapshot is not None and snapshot.success, 0 if snapshot is None else snapshot.generation, False
+
+
+class PopulationSearch:
+    """
+    Searches for the smallest population size that reaches SUCCESS with at least `required` of the seeds,
+    assuming a population size that passes is never followed by a larger one that fails.
+    The population size doubles from `start` until one passes, then the gap between the largest size
+    that failed and the smallest size that passed is bisected.
+    A population size is decided as soon as enough runs have passed or failed, so the runs that are left
+    can no longer change the answer and are cancelled.
+    A run that raises an error ends the search, which keeps the error instead of a population size.
+    """
+    def __init__(self, string_size, seeds, required, start=MINIMUM_POPULATION_SIZE,
+                 maximum=DEFAULT_MAXIMUM_POPULATION_SIZE):
+        """
+        Initialize the PopulationSearch.
+
+        Args:
+            string_size (int): The stringSizeN to search for.
+            seeds (list): The randSeed of every run of a population size.
+            required (int): The number of runs that must reach SUCCESS for a population size to pass.
+            start (int, optional): The first population size to try.
+            maximum (int, optional): The largest population size to try.
+        """
+        if not 1 <= required <= len(seeds):
+            raise ValueError("The required number of successes must be between 1 and the number of seeds")
+        if not MINIMUM_POPULATION_SIZE <= start <= maximum:
+            raise ValueError(f"The search must start between {MINIMUM_POPULATION_SIZE} and {maximum}")
+        self._string_size = string_size
+        self._seeds = list(seeds)
+        self._required = required
+        self._maximum = maximum
+        # The largest population size that failed and the smallest one that passed
+        self._failed = start - 1
+        self._passed = None
+        self._candidate = start
+        self._successes = 0
+        self._failures = 0
+        # The number of seeds of the current population size that were handed out to run
+        self._started = 0
+        self._tried = []
+        self._runs = 0
+        self._cancelled = 0
+        self._error = None
+        self._start_time = time.perf_counter()
+        self._seconds = None
+
+    @property
+    def string_size(self):
+        return self._string_size
+
+    @property
+    def seeds(self):
+        return self._seeds
+
+    @property
+    def candidate(self):
+        return self._candidate
+
+    @property
+    def finished(self):
+        return self._candidate is None
+
+    @property
+    def minimum_population_size(self):
+        return self._passed
+
+    @property
+    def error(self):
+        return self._error
+
+    def next_run(self):
+        """
+        Hand out the next run of the population size being tried.
+
+        Returns:
+            tuple: The population size and the seed of the run, or None if every run was handed out.
+        """
+        if self._candidate is None or self._started == len(self._seeds):
+            return None
+        seed = self._seeds[self._started]
+        self._started += 1
+        return self._candidate, seed
+
+    def record(self, population_size, success):
+        """
+        Record the outcome of a run.
+
+        Args:
+            population_size (int): The population size of the run.
+            success (bool): Whether the run reached SUCCESS.
+
+        Returns:
+            bool: True if the run decided its population size and the search moved on, False otherwise.
+        """
+        if population_size != self._candidate:
+            # A run that was already running when its population size was decided
+            return False
+        self._runs += 1
+        if success:
+            self._successes += 1
+        else:
+            self._failures += 1
+        passed = self._successes >= self._required
+        if not passed and self._failures <= len(self._seeds) - self._required:
+            return False
+        self._tried.append((population_size, self._successes, self._successes + self._failures))
+        if passed:
+            self._passed = population_size
+        else:
+            self._failed = population_size
+        # Runs that were never handed out can no longer change the answer
+        self._cancelled += len(self._seeds) - self._started
+        self._successes = 0
+        self._failures = 0
+        self._started = 0
+        self._candidate = self._next_candidate()
+        if self._candidate is None:
+            self._seconds = time.perf_counter() - self._start_time
+        return True
+
+    def record_cancelled(self, count):
+        """
+        Count runs that were handed out but stopped early because their population size was already decided.
+
+        Args:
+            count (int): The number of cancelled runs.
+        """
+        self._cancelled += count
+
+    def record_error(self, population_size, error):
+        """
+        End the search because a run raised an error.
+
+        Args:
+            population_size (int): The population size of the run.
+            error (Exception): The error raised by the run.
+        """
+        self._error = f"populationSizeN {population_size}: {type(error).__name__}: {error}"
+        self._cancelled += len(self._seeds) - self._started
+        self._candidate = None
+        self._seconds = time.perf_counter() - self._start_time
+
+    def _next_candidate(self):
+        """
+        Choose the next population size to try.
+
+        Returns:
+            int: The next population size, or None when the search is finished.
+        """
+        if self._passed is None:
+            if self._failed >= self._maximum:
+                return None
+            return min(2 * self._failed, self._maximum)
+        if self._passed - self._failed <= 1:
+            return None
+        return (self._failed + self._passed) // 2
+
+    def as_row(self):
+        """
+        Get the result of the search as a row of the results table.
+
+        Returns:
+            dict: The value of every column of TABLE_COLUMNS.
+        """
+        return {
+            "stringSizeN": self._string_size,
+            "populationSizeN": "" if self._passed is None else self._passed,
+            "seeds": len(self._seeds),
+            "required": self._required,
+            "runs": self._runs,
+            "cancelled": self._cancelled,
+            "seconds": f"{self._seconds if self._seconds is not None else time.perf_counter() - self._start_time:.3f}",
+            "tried": " ".join(f"{size}:{successes}/{runs}" for size, successes, runs in self._tried),
+            "error": self._error or "",
+        }
+
+
+def search_minimum_population_sizes(searches, overrides, workers=None):
+    """
+    Run several searches at once on a pool of worker processes until every search is finished.
+    The pool is kept busy with one run per worker, taken from the searches in turn. Every population size
+    has a cancel event shared by its runs: when the population size is decided, or its search ends with
+    an error, the event is set and its runs that are still running stop after their current generation.
+
+    Args:
+        searches (list): The PopulationSearch of every string size.
+        overrides (dict): Settings that replace the default values in every run.
+        workers (int, optional): The number of worker processes (default: one per CPU).
+
+    Returns:
+        list: The searches, all finished.
+    """
+    workers = workers or os.cpu_count() or 1
+    with Manager() as manager, ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        # The cancel event of every population size that has runs, by search and population size
+        cancel_events = {}
+        turn = 0
+        while True:
+            # Hand out runs until every worker is busy or no search has a run left
+            idle_searches = 0
+            while len(running) < workers and idle_searches < len(searches):
+                search = searches[turn % len(searches)]
+                turn += 1
+                run = search.next_run()
+                if run is None:
+                    idle_searches += 1
+                    continue
+                idle_searches = 0
+                population_size, seed = run
+                key = (id(search), population_size)
+                if key not in cancel_events:
+                    cancel_events[key] = manager.Event()
+                future = pool.submit(
+                    run_trial, search.string_size, population_size, seed, overrides, cancel_events[key]
+                )
+                running[future] = (search, population_size)
+            if not running:
+                break
+            done, pending = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                search, population_size = running.pop(future)
+                key = (id(search), population_size)
+                try:
+                    success, generations, cancelled = future.result()
+                except Exception as e:
+                    if search.finished:
+                        continue
+                    search.record_error(population_size, e)
+                    print(f"stringSizeN {search.string_size}: run failed with {type(e).__name__}: {e}")
+                    # Stop every other run of the search, whatever its population size
+                    for (search_id, size), event in cancel_events.items():
+                        if search_id == id(search):
+                            event.set()
+                    continue
+                if cancelled:
+                    search.record_cancelled(1)
+                    continue
+                if not search.record(population_size, success):
+                    continue
+                cancel_events[key].set()
+                print(f"stringSizeN {search.string_size}: " + (
+                    f"minimum populationSizeN {search.minimum_population_size}" if search.finished
+                    else f"trying populationSizeN {search.candidate}"
+                ))
+            # Forget the events of population sizes that have no run left
+            in_use = {(id(search), size) for search, size in running.values()}
+            for key in [key for key, event in cancel_events.items() if key not in in_use and event.is_set()]:
+                del cancel_events[key]
+    return searches
+
+
+def save_table(path, searches):
+    """
+    Save the results of the searches as a CSV table.
+
+    Args:
+        path (str): The path of the CSV file.
+        searches (list): The finished searches.
+    """
+    with open(path, "w", newline="") as table_file:
+        writer = csv.DictWriter(table_file, fieldnames=TABLE_COLUMNS)
+        writer.writeheader()
+        for search in searches:
+            writer.writerow(search.as_row())
+
+
+def load_table(path):
+    """
+    Load the (stringSizeN, populationSizeN) points of a results table, skipping searches that found no size.
+
+    Args:
+        path (str): The path of the CSV file.
+
+    Returns:
+        list: The points of the table.
+    """
+    with open(path, newline="") as table_file:
+        return [
+            (int(row["stringSizeN"]), int(row["populationSizeN"]))
+            for row in csv.DictReader(table_file)
+            if row["populationSizeN"]
+        ]
+
+
+def fit_power_law(points):
+    """
+    Fit populationSizeN = coefficient * stringSizeN ^ exponent by least squares on the logarithms of the points,
+    the same trendline as the one in readme.txt.
+
+    Args:
+        points (list): The (stringSizeN, populationSizeN) points, at least two different string sizes.
+
+    Returns:
+        tuple: The coefficient, the exponent, and the R^2 of the fit on the logarithms.
+    """
+    xs = [math.log(string_size) for string_size, population_size in points]
+    ys = [math.log(population_size) for string_size, population_size in points]
+    count = len(points)
+    mean_x = sum(xs) / count if count else 0.0
+    mean_y = sum(ys) / count if count else 0.0
+    spread_x = sum((x - mean_x) ** 2 for x in xs)
+    if count < 2 or spread_x == 0:
+        raise ValueError("Fitting a power law needs at least two different string sizes")
+    exponent = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread_x
+    intercept = mean_y - exponent * mean_x
+    total = sum((y - mean_y) ** 2 for y in ys)
+    residual = sum((y - intercept - exponent * x) ** 2 for x, y in zip(xs, ys))
+    r_squared = 1.0 - residual / total if total > 0 else 1.0
+    return math.exp(intercept), exponent, r_squared
+
+
+def print_fit(points, predict):
+    """
+    Print the power law fitted to the points and the population sizes it predicts.
+
+    Args:
+        points (list): The (stringSizeN, populationSizeN) points.
+        predict (list): The string sizes to predict the minimum population size of.
+    """
+    coefficient, exponent, r_squared = fit_power_law(points)
+    print(f"f(min population size) = {coefficient:.4f}(string size)^{exponent:.4f}, R^2 = {r_squared:.4f}")
+    for string_size in predict:
+        print(f"Predicted minimum populationSizeN for stringSizeN {string_size}: "
+              f"{math.ceil(coefficient * string_size ** exponent)}")
+
+
+def main(argv=None):
+    """
+    Run the minimum population size search from the command line.
+
+    Args:
+        argv (list, optional): The command line arguments, without the program name.
+
+    Returns:
+        int: 0.
+    """
+    parser = argparse.ArgumentParser(
+        description="Search for the minimum population size that reaches SUCCESS for each string size."
+    )
+    parser.add_argument("--string-sizes", type=int, nargs="+", default=[],
+                        help="the stringSizeN values to search")
+    parser.add_argument("--seeds", type=int, default=DEFAULT_SEED_COUNT,
+                        help=f"the number of seeds each population size is run with (default: {DEFAULT_SEED_COUNT})")
+    parser.add_argument("--first-seed", type=int, default=DEFAULT_CONFIG.randSeed,
+                        help="the randSeed of the first run; the other runs use the following seeds")
+    parser.add_argument("--required", type=int,
+                        help="the number of seeds that must reach SUCCESS (default: all of them)")
+    parser.add_argument("--start", type=int, default=MINIMUM_POPULATION_SIZE,
+                        help="the first population size to try (default: 2)")
+    parser.add_argument("--max-population", type=int, default=DEFAULT_MAXIMUM_POPULATION_SIZE,
+                        help="the largest population size to try")
+    parser.add_argument("--workers", type=int, help="the number of worker processes (default: one per CPU)")
+    parser.add_argument("--set", type=parse_setting_override, action="append", default=[], metavar="KEY=VALUE",
+                        help="override a setting, for example --set genomeRepresentation=1")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a CSV table")
+    parser.add_argument("--fit", metavar="FILE", action="append", default=[],
+                        help="also fit the power law to the points of a saved CSV table")
+    parser.add_argument("--predict", type=int, nargs="+", default=[],
+                        help="string sizes to predict the minimum population size of from the fitted power law")
+    args = parser.parse_args(argv)
+    if args.seeds < 1:
+        parser.error("--seeds must be at least 1")
+    if not args.string_sizes and not args.fit:
+        parser.error("give --string-sizes to search or --fit to fit a saved table")
+
+    required = args.seeds if args.required is None else args.required
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    try:
+        SGAConfig.from_dict(dict(args.set))
+        searches = [
+            PopulationSearch(string_size, seeds, required, args.start, args.max_population)
+            for string_size in args.string_sizes
+        ]
+    except ValueError as e:
+        parser.error(str(e))
+    points = []
+    if searches:
+        search_minimum_population_sizes(searches, dict(args.set), args.workers)
+        print(f"{'stringSizeN':>12} {'populationSizeN':>16} {'Runs':>6} {'Cancelled':>10} {'Seconds':>10}  Tried")
+        for search in searches:
+            row = search.as_row()
+            print(f"{row['stringSizeN']:>12} {str(row['populationSizeN']) or 'not found':>16} {row['runs']:>6} "
+                  f"{row['cancelled']:>10} {row['seconds']:>10}  {row['tried']}")
+            if row["error"]:
+                print(f"{'':>12} Error: {row['error']}")
+        if args.save:
+            save_table(args.save, searches)
+            print(f"Saved results to {args.save}")
+        points.extend(
+            (search.string_size, search.minimum_population_size)
+            for search in searches if search.minimum_population_size is not None
+        )
+    for path in args.fit:
+        points.extend(load_table(path))
+    if len({string_size for string_size, population_size in points}) >= 2:
+        print_fit(points, args.predict)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+# Author: Daniel Glauber
+# File: profiling.py
+# Description: This file contains the opt-in profiler that times each phase of a run,
+# per generation and in total, and reports the timings as a table or as JSON.
+import contextlib
+import json
+import time
+from fitness import FitnessFunction
+
+# Values used by the profilePhases setting
+PROFILE_OFF = 0
+PROFILE_TABLE = 1
+PROFILE_TABLE_AND_JSON = 2
+
+# Indexes of the timings kept for every phase
+CALLS = 0
+WALL = 1
+CPU = 2
+SELF_WALL = 3
+SELF_CPU = 4
+
+
+def new_timings():
+    """
+    Create the timings of a phase that has not run yet.
+
+    Returns:
+        list: The call count, wall time, CPU time, and the wall and CPU time not spent in nested phases.
+    """
+    return [0, 0.0, 0.0, 0.0, 0.0]
+
+
+def timings_as_dict(timings):
+    """
+    Convert the timings of a phase into a dictionary.
+
+    Args:
+        timings (list): The timings of the phase.
+
+    Returns:
+        dict: The call count and the times of the phase in seconds.
+    """
+    return {
+        "calls": timings[CALLS],
+        "wall": timings[WALL],
+        "cpu": timings[CPU],
+        "self_wall": timings[SELF_WALL],
+        "self_cpu": timings[SELF_CPU],
+    }
+
+
+class PhaseTimer:
+    """
+    Context manager that times one call of a phase for a PhaseProfiler.
+    """
+    __slots__ = ("_profiler", "_name")
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+
+    def __enter__(self):
+        self._profiler.enter_phase(self._name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._profiler.exit_phase()
+        return False
+
+
+class PhaseProfiler:
+    """
+    Times named phases with wall clock and CPU time and counts their calls, per generation and in total.
+    Phases may be nested. The time of a phase includes its nested phases, while its self time does not,
+    so the self times of all phases add up to the time spent inside phases.
+    CPU time is the time of the current process only and does not include worker processes.
+    """
+    enabled = True
+
+    def __init__(self):
+        """
+        Initialize an empty PhaseProfiler.
+        """
+        self._totals = {}
+        self._generation_totals = {}
+        self._generations = []
+        self._generation_number = None
+        # Every running phase as [name, wall start, CPU start, nested wall, nested CPU]
+        self._stack = []
+        self._run_start = None
+        self._run_wall = 0.0
+        self._run_cpu = 0.0
+
+    def phase(self, name):
+        """
+        Time a phase with a with statement.
+
+        Args:
+            name (str): The name of the phase.
+
+        Returns:
+            PhaseTimer: The context manager that times the phase.
+        """
+        return PhaseTimer(self, name)
+
+    def enter_phase(self, name):
+        """
+        Start timing a phase.
+
+        Args:
+            name (str): The name of the phase.
+        """
+        self._stack.append([name, time.perf_counter(), time.process_time(), 0.0, 0.0])
+
+    def exit_phase(self):
+        """
+        Stop timing the most recently started phase.
+        """
+        wall_end = time.perf_counter()
+        cpu_end = time.process_time()
+        name, wall_start, cpu_start, nested_wall, nested_cpu = self._stack.pop()
+        wall = wall_end - wall_start
+        cpu = cpu_end - cpu_start
+        for totals in (self._totals, self._generation_totals):
+            timings = totals.get(name)
+            if timings is None:
+                timings = totals[name] = new_timings()
+            timings[CALLS] += 1
+            timings[WALL] += wall
+            timings[CPU] += cpu
+            timings[SELF_WALL] += wall - nested_wall
+            timings[SELF_CPU] += cpu - nested_cpu
+        if self._stack:
+            parent = self._stack[-1]
+            parent[3] += wall
+            parent[4] += cpu
+
+    def start_run(self):
+        """
+        Start timing the whole run.
+        """
+        self._run_start = (time.perf_counter(), time.process_time())
+
+    def end_run(self):
+        """
+        Stop timing the whole run.
+        """
+        if self._run_start is not None:
+            self._run_wall += time.perf_counter() - self._run_start[0]
+            self._run_cpu += time.process_time() - self._run_start[1]
+            self._run_start = None
+
+    def start_generation(self, generation_number):
+        """
+        Start collecting the timings of a generation.
+
+        Args:
+            generation_number (int): The number of the generation.
+        """
+        self._generation_number = generation_number
+        self._generation_totals = {}
+
+    def end_generation(self):
+        """
+        Save the timings of the current generation.
+        """
+        if self._generation_number is not None:
+            self._generations.append((self._generation_number, self._generation_totals))
+        self._generation_number = None
+        self._generation_totals = {}
+
+    def as_dict(self):
+        """
+        Get every timing collected so far.
+
+        Returns:
+            dict: The wall and CPU time of the run, the cumulative timings of every phase,
+                and the timings of every phase per generation.
+        """
+        return {
+            "wall": self._run_wall,
+            "cpu": self._run_cpu,
+            "generation_count": len(self._generations),
+            "phases": {name: timings_as_dict(timings) for name, timings in self._totals.items()},
+            "generations": [
+                {
+                    "generation": generation_number,
+                    "phases": {name: timings_as_dict(timings) for name, timings in totals.items()},
+                }
+                for generation_number, totals in self._generations
+            ],
+        }
+
+    def summary_table(self):
+        """
+        Format the cumulative timings of every phase as a table, slowest self time first.
+
+        Returns:
+            str: The table.
+        """
+        generation_count = max(1, len(self._generations))
+        lines = [
+            f"Phase timings over {len(self._generations)} generations "
+            f"(wall {self._run_wall:.6f}s, CPU {self._run_cpu:.6f}s)",
+            f"{'Phase':<14} {'Calls':>10} {'Wall (s)':>12} {'CPU (s)':>12} {'Self wall':>12} {'Self CPU':>12} "
+            f"{'% of run':>9} {'Wall/gen':>12}",
+        ]
+        for name, timings in sorted(self._totals.items(), key=lambda item: item[1][SELF_WALL], reverse=True):
+            share = timings[SELF_WALL] / self._run_wall if self._run_wall > 0 else 0.0
+            lines.append(' '.join([
+                f"{name:<14}",
+                f"{timings[CALLS]:>10}",
+                f"{timings[WALL]:>12.6f}",
+                f"{timings[CPU]:>12.6f}",
+                f"{timings[SELF_WALL]:>12.6f}",
+                f"{timings[SELF_CPU]:>12.6f}",
+                f"{share:>9.1%}",
+                f"{timings[WALL] / generation_count:>12.6f}",
+            ]))
+        return '\n'.join(lines)
+
+    def write_json(self, path):
+        """
+        Write every timing collected so far to a JSON file.
+
+        Args:
+            path (str): The path of the JSON file.
+        """
+        with open(path, "w") as profile_file:
+            json.dump(self.as_dict(), profile_file, indent=2)
+
+
+class NullProfiler:
+    """
+    Profiler used when profiling is off. Every method does nothing, and phase returns a shared
+    context manager that does nothing, so instrumented code costs next to nothing.
+    """
+    enabled = False
+    _null_phase = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._null_phase
+
+    def start_run(self):
+        pass
+
+    def end_run(self):
+        pass
+
+    def start_generation(self, generation_number):
+        pass
+
+    def end_generation(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class ProfiledFitnessFunction(FitnessFunction):
+    """
+    Wraps a fitness function so every evaluation is timed as the fitness phase of a profiler.
+    """
+    def __init__(self, fitness_function, profiler):
+        """
+        Initialize the ProfiledFitnessFunction.
+
+        Args:
+            fitness_function (FitnessFunction): The fitness function to time.
+            profiler (PhaseProfiler): The profiler that records the timings.
+        """
+        self._fitness_function = fitness_function
+        self._profiler = profiler
+        self.name = fitness_function.name
+        self.supports_delta = fitness_function.supports_delta
+        self.max_delta_fraction = fitness_function.max_delta_fraction
+
+    @property
+    def fitness_function(self):
+        return self._fitness_function
+
+    def evaluate(self, genome):
+        with self._profiler.phase("fitness"):
+            return self._fitness_function.evaluate(genome)
+
+    def delta(self, fitness, genome, changed_positions, old_values):
+        with self._profiler.phase("fitness"):
+            return self._fitness_function.delta(fitness, genome, changed_positions, old_values)
+
+    def use_delta(self, changed_count, string_size):
+        return self._fitness_function.use_delta(changed_count, string_size)
+
+
+def create_profiler(profile_phases):
+    """
+    Get the profiler for a profilePhases setting value.
+
+    Args:
+        profile_phases (int): The profilePhases setting value.
+
+    Returns:
+        PhaseProfiler or NullProfiler: A new PhaseProfiler, or the shared NullProfiler when profiling is off.
+    """
+    if profile_phases == PROFILE_OFF:
+        return NULL_PROFILER
+    if profile_phases in (PROFILE_TABLE, PROFILE_TABLE_AND_JSON):
+        return PhaseProfiler()
+    raise ValueError(f"Unknown profilePhases {profile_phases}")
@@ -0,0 +1,146 @@
+# Author: Daniel Glauber
+# File: rng.py
+# Description: This file contains the random number service of a run. Every operator, island and worker
+# draws from its own stream derived from the seed of the run, so a run never depends on the global random
+# module, on the other runs of the process, or on how many processes share the work.
+import random
+from array import array
+
+# Value used by the randomStreams setting for one stream shared by initialization, crossover and mutation
+SHARED_STREAMS = 0
+# Value used by the randomStreams setting for one stream per operator
+OPERATOR_STREAMS = 1
+
+# Name of the stream seeded with the seed itself, which draws like the random module seeded with it
+MAIN_STREAM = "main"
+WORD_BITS = 64
+
+
+class RandomStream(random.Random):
+    """
+    A random number generator that can also serve many values at once from a block of random words
+    drawn in a single call, which costs far less than one call per value.
+    """
+    def words(self, count):
+        """
+        Draw a block of random 64-bit words.
+
+        Args:
+            count (int): The number of words.
+
+        Returns:
+            array: The words as an array of unsigned 64-bit integers.
+        """
+        if count <= 0:
+            return array("Q")
+        return array("Q", self.getrandbits(WORD_BITS * count).to_bytes(8 * count, "little"))
+
+    def indexes(self, size, count):
+        """
+        Draw random indexes into a sequence from a block of random words.
+
+        Args:
+            size (int): The size of the sequence.
+            count (int): The number of indexes.
+
+        Returns:
+            list: count indexes from 0 to size - 1.
+        """
+        return [(word * size) >> WORD_BITS for word in self.words(count)]
+
+    def floats(self, count):
+        """
+        Draw random floats from a block of random words. The floats are the ones count calls
+        to random() would have returned, so an operator can take them in a block without changing a run.
+
+        Args:
+            count (int): The number of floats.
+
+        Returns:
+            list: count floats from 0.0 to 1.0, 1.0 excluded.
+        """
+        # random() builds a float from the top 27 bits of one 32-bit output and the top 26 bits of the next
+        return [
+            (((word & 0xFFFFFFFF) >> 5) * 67108864 + (word >> 38)) * (1.0 / 9007199254740992.0)
+            for word in self.words(count)
+        ]
+
+
+class RandomStreams:
+    """
+    Hands out independent random streams derived from the seed of a run by name, like one per operator,
+    and child services for the islands and workers of the run, whose streams are derived the same way.
+    """
+    def __init__(self, seed):
+        """
+        Initialize the RandomStreams.
+
+        Args:
+            seed (int or str): The seed of the run.
+        """
+        self._seed = seed
+        self._streams = {}
+
+    @property
+    def seed(self):
+        return self._seed
+
+    def stream_seed(self, name):
+        """
+        Get the seed of a stream.
+
+        Args:
+            name (str): The name of the stream.
+
+        Returns:
+            int or str: The seed of the run for the main stream, the seed followed by the name otherwise.
+        """
+        return self._seed if name == MAIN_STREAM else f"{self._seed}-{name}"
+
+    def stream(self, name=MAIN_STREAM):
+        """
+        Get a stream, creating it the first time it is asked for.
+
+        Args:
+            name (str, optional): The name of the stream (default: the main stream).
+
+        Returns:
+            RandomStream: The stream.
+        """
+        stream = self._streams.get(name)
+        if stream is None:
+            stream = RandomStream(self.stream_seed(name))
+            self._streams[name] = stream
+        return stream
+
+    def spawn(self, *names):
+        """
+        Get the service of an island or worker, whose seed is derived from this seed and the names.
+        The same names always give the same streams, whichever process asks for them and when.
+
+        Args:
+            *names: The names that identify the island or worker, like "island" and its index.
+
+        Returns:
+            RandomStreams: The child service.
+        """
+        return RandomStreams("-".join([str(self._seed), *map(str, names)]))
+
+    def getstate(self):
+        """
+        Get the state of every stream handed out so far.
+
+        Returns:
+            dict: The state returned by getstate for each stream name.
+        """
+        return {name: stream.getstate() for name, stream in self._streams.items()}
+
+    def setstate(self, states):
+        """
+        Restore the streams saved by getstate.
+
+        Args:
+            states (dict): The state of each stream name.
+        """
+        for name, state in states.items():
+            self.stream(name).setstate(state)
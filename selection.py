@@ -0,0 +1,217 @@
+# Author: Daniel Glauber
+# File: selection.py
+# Description: This file contains the batched parent selection operators, which pick the parents of a whole
+# generation at once from a flat list of fitness values.
+import heapq
+from functools import partial
+
+# Values used by the batchedSelection setting
+SINGLE_SELECTION = 0
+BATCHED_SELECTION = 1
+
+# Values used by the selectionMethod setting
+TOURNAMENT_SELECTION = 0
+ROULETTE_SELECTION = 1
+RANK_SELECTION = 2
+TRUNCATION_SELECTION = 3
+
+
+class AliasTable:
+    """
+    Walker's alias table, built with Vose's method, which draws an index with probability proportional
+    to its weight in O(1): one uniform index and one coin flip against the probability kept for that index.
+    Building the table costs O(n), so it is built once per generation for all the draws of the generation.
+    """
+    def __init__(self, weights):
+        """
+        Initialize the AliasTable.
+
+        Args:
+            weights (list): The weight of every index, 0 or more. If all weights are 0 every index is equally likely.
+        """
+        size = len(weights)
+        if size == 0:
+            raise ValueError("An alias table needs at least one weight")
+        total = sum(weights)
+        if min(weights) < 0:
+            raise ValueError("An alias table needs weights of 0 or more")
+        # Scale the weights so they average 1, the share of every column of the table
+        scaled = [weight * size / total for weight in weights] if total > 0 else [1.0] * size
+        # Every column starts out filled by its own index, which is what is left over at the end
+        # for the indexes whose scaled weight is 1 up to rounding errors
+        self._probability = [1.0] * size
+        self._alias = list(range(size))
+        small = [index for index, weight in enumerate(scaled) if weight < 1.0]
+        large = [index for index, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            # The column of a small index is filled up with a part of a large index
+            index = small.pop()
+            donor = large[-1]
+            self._probability[index] = scaled[index]
+            self._alias[index] = donor
+            scaled[donor] += scaled[index] - 1.0
+            if scaled[donor] < 1.0:
+                small.append(large.pop())
+
+    def __len__(self):
+        return len(self._probability)
+
+    def sample(self, count, rng):
+        """
+        Draw indexes with probability proportional to their weight.
+
+        Args:
+            count (int): The number of indexes.
+            rng (RandomStream): The random stream to draw from.
+
+        Returns:
+            list: count indexes.
+        """
+        probability = self._probability
+        alias = self._alias
+        return [
+            index if coin < probability[index] else alias[index]
+            for index, coin in zip(rng.indexes(len(probability), count), rng.floats(count))
+        ]
+
+
+def tournament_winners(fitness, count, tournament_size, rng, block_draws=False):
+    """
+    Run count tournaments at once and return the index of every winner.
+    All contestants are drawn in a single call, tournament after tournament, and the first
+    contestant with the best fitness wins each tournament, like max() does.
+
+    Args:
+        fitness (list): The fitness of every individual of the generation, by index.
+        count (int): The number of tournaments to run.
+        tournament_size (int): The number of contestants in each tournament.
+        rng (random.Random): The random number generator that draws the contestants.
+        block_draws (bool, optional): Whether the contestants are drawn from a block of random words
+            by a RandomStream, instead of one random number each like choices does.
+
+    Returns:
+        list: The index of the winner of every tournament.
+    """
+    if tournament_size < 1:
+        raise ValueError("tournamentSizeK must be at least 1")
+    if block_draws:
+        contestants = rng.indexes(len(fitness), count * tournament_size)
+    else:
+        contestants = rng.choices(range(len(fitness)), k=count * tournament_size)
+    if tournament_size == 1:
+        return contestants
+    if tournament_size == 2:
+        return [
+            first if fitness[first] >= fitness[second] else second
+            for first, second in zip(contestants[0::2], contestants[1::2])
+        ]
+    key = fitness.__getitem__
+    return [
+        max(contestants[start:start + tournament_size], key=key)
+        for start in range(0, len(contestants), tournament_size)
+    ]
+
+
+def roulette_winners(fitness, count, rng):
+    """
+    Select count parents with probability proportional to their fitness, from an alias table
+    built once for the whole batch.
+
+    Args:
+        fitness (list): The fitness of every individual of the generation, by index, 0 or more.
+        count (int): The number of parents to select.
+        rng (RandomStream): The random stream to draw from.
+
+    Returns:
+        list: The index of every selected parent.
+    """
+    if min(fitness) < 0:
+        raise ValueError("selectionMethod 1 needs fitness values of 0 or more")
+    return AliasTable(fitness).sample(count, rng)
+
+
+def rank_weights(fitness):
+    """
+    Get the linear ranking weight of every individual: its rank when the fitness values are sorted
+    from worst to best, starting at 1. Individuals with equal fitness share the average of their ranks.
+
+    Args:
+        fitness (list): The fitness of every individual of the generation, by index.
+
+    Returns:
+        list: The weight of every individual, by index.
+    """
+    order = sorted(range(len(fitness)), key=fitness.__getitem__)
+    weights = [0.0] * len(order)
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and fitness[order[end]] == fitness[order[start]]:
+            end += 1
+        # Ranks start + 1 to end average to (start + end + 1) / 2
+        average_rank = (start + end + 1) / 2
+        for index in order[start:end]:
+            weights[index] = average_rank
+        start = end
+    return weights
+
+
+def rank_winners(fitness, count, rng):
+    """
+    Select count parents with probability proportional to their rank, from an alias table
+    built once for the whole batch.
+
+    Args:
+        fitness (list): The fitness of every individual of the generation, by index.
+        count (int): The number of parents to select.
+        rng (RandomStream): The random stream to draw from.
+
+    Returns:
+        list: The index of every selected parent.
+    """
+    return AliasTable(rank_weights(fitness)).sample(count, rng)
+
+
+def truncation_winners(fitness, count, rng, truncation_size=0):
+    """
+    Select count parents uniformly among the truncation_size individuals with the best fitness.
+    The best individuals are found by partial selection, which costs O(n log truncation_size) instead of a full sort.
+
+    Args:
+        fitness (list): The fitness of every individual of the generation, by index.
+        count (int): The number of parents to select.
+        rng (RandomStream): The random stream to draw from.
+        truncation_size (int, optional): The number of individuals kept, 0 for half of the generation.
+
+    Returns:
+        list: The index of every selected parent.
+    """
+    if truncation_size <= 0:
+        truncation_size = max(1, len(fitness) // 2)
+    best = heapq.nlargest(truncation_size, range(len(fitness)), key=fitness.__getitem__)
+    return [best[index] for index in rng.indexes(len(best), count)]
+
+
+def get_selection_function(selection_method, tournament_size=2, truncation_size=0, block_draws=True):
+    """
+    Get the batched selection function for the selectionMethod setting value.
+
+    Args:
+        selection_method (int): The selectionMethod setting value.
+        tournament_size (int, optional): The tournamentSizeK setting value, used by tournament selection.
+        truncation_size (int, optional): The truncationSizeT setting value, used by truncation selection.
+        block_draws (bool, optional): Whether tournaments draw their contestants from blocks of random words.
+
+    Returns:
+        function: The selection function, called with the fitness values, the number of parents
+            and the random stream as rng, which returns the index of every selected parent.
+    """
+    if selection_method == TOURNAMENT_SELECTION:
+        return partial(tournament_winners, tournament_size=tournament_size, block_draws=block_draws)
+    if selection_method == ROULETTE_SELECTION:
+        return roulette_winners
+    if selection_method == RANK_SELECTION:
+        return rank_winners
+    if selection_method == TRUNCATION_SELECTION:
+        return partial(truncation_winners, truncation_size=truncation_size)
+    raise ValueError(f"Unknown selectionMethod {selection_method}")
@@ -4,28 +4,19 @@
 import re
 from os.path import exists
 from typing import Any, List
+from config import (
+    DEFAULT_CONFIG,
+    SETTINGS_THAT_MAY_BE_TEXT,
+    SETTINGS_THAT_MUST_BE_ONE_OR_LESS,
+    SETTINGS_THAT_MUST_BE_TWO_OR_MORE,
+    SGAConfig,
+    setting_names,
+)
 
 # Constants
-SETTINGS_THAT_MUST_BE_ONE_OR_LESS = [
-    "probApplyCrossover",
-    "probApplyMutation",
-]
-SETTINGS_THAT_MUST_BE_TWO_OR_MORE = [
-    "populationSizeN"
-]
 DEFAULT_SETTINGS_FILE = "gasettings.dat"
-DEFAULT_SETTINGS = {
-    "randSeed": 123,
-    "populationSizeN": 100,
-    "stringSizen": 50,
-    "probApplyCrossover": 0.6,
-    "probApplyMutation": 1.0,
-    "selectionMethod": 0,
-    "tournamentSizek": 2,
-    "fitnessFunction": 0,
-    "terminateOnFailure": 1,
-    "failuresBeforeTermination": 0
-}
+# The default value of every setting, in the order of the settings file
+DEFAULT_SETTINGS = {name: getattr(DEFAULT_CONFIG, name) for name in setting_names()}
 
 ga_settings = {}
 user_settings_file = DEFAULT_SETTINGS_FILE
@@ -40,6 +31,7 @@ def display_help_message() -> None:
     print("If you do not include a settings file the default settings file gasettings.dat is used.")
     print("To turn on limited debugging use command: python3 sga.py -g settings.dat")
     print("To turn on full debugging use command: python3 sga.py -G settings.dat")
+    print("To resume a run from its checkpoint file use command: python3 sga.py --resume settings.dat")
 
 def get_setting(key: str) -> Any:
     """
@@ -53,6 +45,15 @@ def get_setting(key: str) -> Any:
     """
     return ga_settings[key]
 
+def current_config() -> SGAConfig:
+    """
+    Build an immutable configuration from the loaded settings. Unknown settings are ignored.
+    
+    Returns:
+        SGAConfig: The configuration.
+    """
+    return SGAConfig.from_dict(ga_settings, strict=False)
+
 def ask_user_continue_question(question: str, default: str = "y") -> None:
     """
     Ask the user a yes/no question to continue.
@@ -122,6 +123,14 @@ def parse_settings_file(settings_file: str) -> None:
                                     raise ValueError("Value cannot be less than 2")
                                 if split_line[0] not in ga_settings:
                                     ga_settings[split_line[0]] = integer
+                            elif split_line[0] in SETTINGS_THAT_MAY_BE_TEXT:
+                                # Integers are kept as integers, anything else is kept as text
+                                try:
+                                    value = int(split_line[1])
+                                except ValueError:
+                                    value = split_line[1]
+                                if split_line[0] not in ga_settings:
+                                    ga_settings[split_line[0]] = value
                             else:
                                 error_reason = "an integer"
                                 integer = int(split_line[1])
@@ -161,6 +170,7 @@ def load_settings(argv: List[str]) -> None:
     global user_settings_file
     ga_settings["fullDebug"] = False
     ga_settings["limitedDebug"] = False
+    ga_settings["resume"] = False
     if len(argv) > 1:
         if "-h" in argv:
             display_help_message()
@@ -171,8 +181,10 @@ def load_settings(argv: List[str]) -> None:
             ga_settings["limitedDebug"] = True
         if "-G" in argv:
             ga_settings["fullDebug"] = True
+        if "--resume" in argv:
+            ga_settings["resume"] = True
 
-        if argv[-1] not in ["sga.py", "-h", "-g", "-G"]:
+        if argv[-1] not in ["sga.py", "-h", "-g", "-G", "--resume"]:
             user_settings_file = argv[-1]
     if not exists(DEFAULT_SETTINGS_FILE):
         create_default_settings_file()
@@ -184,3 +196,6 @@ def load_settings(argv: List[str]) -> None:
             user_question = (f"Do you want to use the default settings from {DEFAULT_SETTINGS_FILE} instead?")
             ask_user_continue_question(user_question)
     parse_settings_file(DEFAULT_SETTINGS_FILE)
+    # Settings added after the default settings file was created fall back to their default values
+    for key, value in DEFAULT_SETTINGS.items():
+        ga_settings.setdefault(key, value)
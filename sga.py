@@ -1,11 +1,19 @@
 # Author: Daniel Glauber
 # File: sga.py
 # Description: This file contains the controller for the simple genetic algorithm (SGA).
+import asyncio
+import contextlib
 import sys
 from population import Population
+from matrix_population import MatrixPopulation
+from island_population import IslandPopulation
+from checkpoint import CheckpointReader, write_checkpoint
+from profiling import PROFILE_TABLE_AND_JSON, create_profiler
+from history import GenerationWindow, create_history
+from tracing import TRACE_GENERATIONS, TRACE_OPERATORS, create_trace
 import settings_loader as sl
 import time
-from typing import Dict, List
+from typing import AsyncIterator, Dict, Iterator
 
 # Constants
 TERMINATE_ON_FAILURE = "terminateOnFailure"
@@ -13,127 +21,537 @@ FAILURES_BEFORE_TERMINATION = "failuresBeforeTermination"
 STRING_SIZE_N = "stringSizeN"
 FULL_DEBUG = "fullDebug"
 LIMITED_DEBUG = "limitedDebug"
+POPULATION_ENGINE = "populationEngine"
+PROFILE_PHASES = "profilePhases"
+PROFILE_FILE = "profileFile"
+PRINT_INTERVAL = "printInterval"
+WRITE_HISTORY = "writeHistory"
+HISTORY_FILE = "historyFile"
+TRACE_EVENTS = "traceEvents"
+TRACE_FILE = "traceFile"
+TRACE_GENERATION_INTERVAL = "traceGenerationInterval"
+TRACE_INDIVIDUAL_INTERVAL = "traceIndividualInterval"
+CHECKPOINT_INTERVAL = "checkpointInterval"
+CHECKPOINT_FILE = "checkpointFile"
+RESUME = "resume"
+GENOME_REPRESENTATION = "genomeRepresentation"
+DIVERSITY_STATISTICS = "diversityStatistics"
+MINIMUM_DIVERSITY = "minimumDiversity"
+# The stagnation check compares the last STAGNATION_WINDOW_SIZE generations
+STAGNATION_WINDOW_SIZE = 3
+STAGNATION_FAILED = "failed"
+STAGNATION_TERMINATE = "terminate"
+# The run also ends when the diversity of a generation falls below minimumDiversity
+STAGNATION_DIVERSITY_LOST = "diversity lost"
+POPULATION_ENGINES = {
+    0: Population,
+    1: MatrixPopulation,
+    2: IslandPopulation,
+}
 
 # This class is the controller for the simple ga algorithm
 class SGAController:
     """
     Controller for the simple genetic algorithm (SGA).
     """
-    def __init__(self):
+    def __init__(self, config=None):
         """
         Initialize the SGAController with settings and initial population.
+        
+        Args:
+            config (SGAConfig, optional): The settings of the run (default: the settings loaded by the settings loader).
         """
-        self.saved_generation_data: List[Dict] = []
-        self.population = Population()
-        self.terminate_on_failure = sl.get_setting(TERMINATE_ON_FAILURE) == 1
-        self.failures_remaining = sl.get_setting(FAILURES_BEFORE_TERMINATION)
-        self.string_size = sl.get_setting(STRING_SIZE_N)
+        self.config = config if config is not None else sl.current_config()
+        self.stagnation_window = GenerationWindow(STAGNATION_WINDOW_SIZE)
+        population_engine = self.config.get(POPULATION_ENGINE)
+        if population_engine not in POPULATION_ENGINES:
+            raise ValueError(f"Unknown populationEngine {population_engine}")
+        self.population = POPULATION_ENGINES[population_engine](self.config)
+        self.terminate_on_failure = self.config.get(TERMINATE_ON_FAILURE) == 1
+        self.failures_remaining = self.config.get(FAILURES_BEFORE_TERMINATION)
+        self.string_size = self.config.get(STRING_SIZE_N)
+        self.minimum_diversity = self.config.get(MINIMUM_DIVERSITY)
+        diversity_statistics = self.config.get(DIVERSITY_STATISTICS) or self.minimum_diversity
+        if diversity_statistics and not hasattr(self.population, "get_diversity_statistics"):
+            raise ValueError(f"Diversity statistics are not supported by populationEngine {population_engine}")
         self.generation_number = 1
-        self.full_debug = sl.get_setting(FULL_DEBUG)
-        self.limited_debug = sl.get_setting(LIMITED_DEBUG)
+        self.full_debug = self.config.get(FULL_DEBUG)
+        self.limited_debug = self.config.get(LIMITED_DEBUG)
         self.terminate_run = False
+        # Called with the snapshot of every generation to decide whether the run stops, see should_stop
+        self.stopping_rule = None
+        self.print_interval = self.config.get(PRINT_INTERVAL)
+        if self.print_interval < 1:
+            raise ValueError("printInterval must be at least 1")
+        self.checkpoint_interval = self.config.get(CHECKPOINT_INTERVAL)
+        if self.checkpoint_interval < 0:
+            raise ValueError("checkpointInterval cannot be negative")
+        self.checkpoint_file = self.config.get(CHECKPOINT_FILE)
+        # A resumed run reads its starting state from the checkpoint file
+        self.checkpoint = None
+        resume = self.config.get(RESUME)
+        if (self.checkpoint_interval or resume) and not hasattr(self.population, "resume_from_checkpoint"):
+            raise ValueError(f"Checkpoints are not supported by populationEngine {population_engine}")
+        if resume:
+            self.checkpoint = CheckpointReader(self.checkpoint_file)
+            try:
+                self.checkpoint.check_settings(self.config.as_dict())
+            except ValueError:
+                self.checkpoint.close()
+                raise
+        self.history = create_history(self.config.get(WRITE_HISTORY), self.config.get(HISTORY_FILE), append=resume)
+        self.profile_phases = self.config.get(PROFILE_PHASES)
+        self.profiler = create_profiler(self.profile_phases)
+        set_profiler = getattr(self.population, "set_profiler", None)
+        if set_profiler:
+            set_profiler(self.profiler)
+        # Limited debugging traces generation snapshots and full debugging also traces the genetic operators
+        trace_events = self.config.get(TRACE_EVENTS)
+        if self.limited_debug:
+            trace_events = max(trace_events, TRACE_GENERATIONS)
+        if self.full_debug:
+            trace_events = max(trace_events, TRACE_OPERATORS)
+        self.trace = create_trace(
+            trace_events,
+            self.config.get(TRACE_FILE),
+            self.config.get(TRACE_GENERATION_INTERVAL),
+            self.config.get(TRACE_INDIVIDUAL_INTERVAL),
+            append=resume
+        )
+        set_trace = getattr(self.population, "set_trace", None)
+        if set_trace:
+            set_trace(self.trace)
 
     def get_generation_data(self) -> None:
         """
         Collect data for the current generation including best, average, and worst fitness.
         """
+        statistics = self.population.get_generation_statistics()
         self.generation_data = {}
         self.generation_data["generation"] = self.generation_number
-        self.generation_data["best"] = self.population.get_best_fitness()
-        self.generation_data["average"] = self.population.get_average_fitness()
-        self.generation_data["worst"] = self.population.get_worst_fitness()
+        self.generation_data["best"] = self.get_individual_data(statistics["best"], statistics["best_index"])
+        self.generation_data["average"] = statistics["average"]
+        self.generation_data["worst"] = self.get_individual_data(statistics["worst"], statistics["worst_index"])
+        self.generation_data["variance"] = statistics["variance"]
+        get_diversity_statistics = getattr(self.population, "get_diversity_statistics", None)
+        diversity = get_diversity_statistics() if get_diversity_statistics else None
+        if diversity is not None:
+            self.generation_data["diversity"] = diversity
+        if isinstance(self.population, IslandPopulation):
+            self.generation_data["islands"] = self.population.get_island_statistics()
+
+    def get_individual_data(self, fitness, index) -> Dict:
+        """
+        Collect the data of one individual of the current generation.
+        The genome is copied so it stays valid after the population reuses the individual: the stagnation
+        window keeps the genomes of its generations for the termination report and the checkpoints,
+        and by then the individual has been overwritten.
+
+        Args:
+            fitness (int): The fitness of the individual.
+            index (int): The index of the individual.
+
+        Returns:
+            dict: A dictionary containing the fitness, genome, and index of the individual.
+        """
+        return {
+            "fitness": fitness,
+            "genome": self.population.copy_genome(index),
+            "index": index
+        }
+
+    def trace_generation(self) -> None:
+        """
+        Record a snapshot of the sampled individuals of the current generation if the generation is traced.
+        """
+        if not self.trace.snapshot_due:
+            return
+        statistics = {
+            key: value for key, value in self.generation_data.items()
+            if key in ("average", "variance", "islands", "diversity")
+        }
+        statistics["best"] = self.generation_data["best"]["fitness"]
+        statistics["best_index"] = self.generation_data["best"]["index"]
+        statistics["worst"] = self.generation_data["worst"]["fitness"]
+        statistics["worst_index"] = self.generation_data["worst"]["index"]
+        individuals = []
+        for index in self.trace.individual_indexes(self.population.population_size):
+            individual = self.population.get_individual(index)
+            individuals.append((index, individual.genome, individual.solution_fitness))
+        self.trace.record("generation", statistics, individuals)
 
-    def save_generation_data(self) -> bool:
+    def save_generation_data(self) -> "GenerationSnapshot":
         """
-        Save the data for the current generation and determine if termination is needed.
+        Save the data for the current generation and check whether the run succeeded or stagnated.
         
         Returns:
-            bool: True if the run needs to be terminated, False otherwise.
-        """
-        needs_termination = False
-        self.get_generation_data()
-        message_array = [
-            f"Generation {self.generation_number}: ",
-            f"(B: {self.generation_data['best']['fitness']},",
-            f"A: {self.generation_data['average']},",
-            f"W: {self.generation_data['worst']['fitness']})"
-        ]
-        message = ' '.join(message_array)
-        self.generation_data['message'] = message
-        print(message)
+            GenerationSnapshot: The snapshot of the current generation.
+        """
+        with self.profiler.phase("statistics"):
+            self.get_generation_data()
+            success = self.string_size == self.generation_data['best']['fitness']
+            stagnation = self.check_stagnation()
+            if stagnation is None and not success:
+                stagnation = self.check_diversity()
+        with self.profiler.phase("trace"):
+            self.trace_generation()
+        with self.profiler.phase("history"):
+            self.history.write(self.generation_data)
+        return GenerationSnapshot(self.generation_data, success, stagnation, self.failures_remaining)
+
+    def check_stagnation(self) -> str:
+        """
+        Add the current generation to the stagnation window and check whether the run has stagnated.
+        The run has stagnated when neither of the last two generations improved on both the best
+        and the average fitness of the generation before them, and the last one made both worse.
         
-        # Debugging information if enabled
-        if self.full_debug or self.limited_debug:
-            debug_array = [
-                "Current Population",
-                '\n'.join([i.solution_as_string() for i in self.population.get_current_generation()]),
-                ' '.join(["Best Solution =", ','.join([str(i) for i in self.generation_data['best']['solution']])]),
-                ' '.join(["Worst Solution =", ','.join([str(i) for i in self.generation_data['worst']['solution']]), '\n'])
-            ]
-            print('\n'.join(debug_array))
+        Returns:
+            str: STAGNATION_FAILED if the run stagnated and failures remain, STAGNATION_TERMINATE if it stagnated
+                with no failures remaining, or None if it did not stagnate.
+        """
+        window = self.stagnation_window
+        window.append(
+            self.generation_data['best']['fitness'],
+            self.generation_data['average'],
+            self.generation_data['worst']['fitness'],
+            self.generation_data['best']['genome'],
+            self.generation_data['worst']['genome']
+        )
+        # The first window is only checked once a generation has been pushed out of it
+        if window.generations_seen <= window.size:
+            return None
+        oldest_gen_best = window.best(0)
+        oldest_gen_average = window.average(0)
+        for index in range(1, len(window)):
+            if window.best(index) >= oldest_gen_best and window.average(index) > oldest_gen_average:
+                break
+            elif index == 2 and window.best(index) <= oldest_gen_best and window.average(index) < oldest_gen_average:
+                if self.failures_remaining == 0:
+                    return STAGNATION_TERMINATE
+                self.failures_remaining -= 1
+                return STAGNATION_FAILED
+        return None
+
+    def check_diversity(self) -> str:
+        """
+        Check whether the diversity of the current generation fell below minimumDiversity. A population that
+        has converged that far can only improve through mutation, so the run is stopped instead of
+        breeding copies of the same few solutions.
         
-        self.saved_generation_data.append(self.generation_data)
+        Returns:
+            str: STAGNATION_DIVERSITY_LOST if the diversity fell below minimumDiversity, or None otherwise.
+        """
+        if not self.minimum_diversity:
+            return None
+        if self.generation_data["diversity"]["diversity"] < self.minimum_diversity:
+            return STAGNATION_DIVERSITY_LOST
+        return None
+
+    def report_generation(self, snapshot: "GenerationSnapshot") -> None:
+        """
+        Print the data for a generation.
+        Generations are printed every printInterval generations, and whenever the run succeeds or fails.
+        
+        Args:
+            snapshot (GenerationSnapshot): The snapshot of the generation.
+        """
+        if snapshot.success or snapshot.stagnation is not None or (snapshot.generation - 1) % self.print_interval == 0:
+            message_array = [
+                f"Generation {snapshot.generation}: ",
+                f"(B: {snapshot.best},",
+                f"A: {snapshot.average},",
+                f"W: {snapshot.worst})"
+            ]
+            print(' '.join(message_array))
+            for island, statistics in enumerate(snapshot.islands or []):
+                print(f"    Island {island}: (B: {statistics['best']}, A: {statistics['average']}, W: {statistics['worst']})")
+            
+            # Debugging information if enabled
+            if self.full_debug or self.limited_debug:
+                debug_array = [
+                    ' '.join(["Best Solution =", snapshot.best_genome.as_string()]),
+                    ' '.join(["Worst Solution =", snapshot.worst_genome.as_string(), '\n'])
+                ]
+                print('\n'.join(debug_array))
 
         # Check if the best fitness matches the string size, indicating success
-        if self.string_size == self.generation_data['best']['fitness']:
+        if snapshot.success:
             success_array = [
-                ' '.join(["Global Best Fitness =", str(self.generation_data['best']['fitness'])]),
-                ' '.join(["Global Best Solution =", ','.join([str(i) for i in self.generation_data['best']['solution']])]),
-                ' '.join(["Global Best was at index", str(self.generation_data['best']['index']), "of", str(len(self.population.get_current_generation()))]),
-                ' '.join(["Average Fitness:", str(self.generation_data['average'])]),
-                ' '.join(["Worst Fitness:", str(self.generation_data['worst']['fitness'])]),
+                ' '.join(["Global Best Fitness =", str(snapshot.best)]),
+                ' '.join(["Global Best Solution =", snapshot.best_genome.as_string()]),
+                ' '.join(["Global Best was at index", str(snapshot.best_index), "of", str(self.population.population_size)]),
+                ' '.join(["Average Fitness:", str(snapshot.average)]),
+                ' '.join(["Worst Fitness:", str(snapshot.worst)]),
             ]
             print('\n'.join(success_array))
             print("SUCCESS\n")
-            needs_termination = True
-
-        if len(self.saved_generation_data) == 4:
-            self.saved_generation_data.pop(0)
-            oldest_gen_best = self.saved_generation_data[0]["best"]["fitness"]
-            oldest_gen_average = self.saved_generation_data[0]['average']
-            for index, data in enumerate(self.saved_generation_data[1:], start=1):
-                if data["best"]["fitness"] >= oldest_gen_best and data['average'] > oldest_gen_average:
-                    break
-                elif index == 2 and data["best"]["fitness"] <= oldest_gen_best and data['average'] < oldest_gen_average:
-                    if self.failures_remaining == 0:
-                        needs_termination = True
-                        best_generation = max(self.saved_generation_data, key=lambda x: x["best"]["fitness"])["best"]
-                        worst_generation = min(self.saved_generation_data, key=lambda x: x["worst"]["fitness"])["worst"]
-                        best_average = max(self.saved_generation_data, key=lambda x: x["average"])["average"]
-                        worst_average = min(self.saved_generation_data, key=lambda x: x["average"])["average"]
-                        failure_array = [
-                            f"Best Fitness in previous 3 generations = {best_generation['fitness']}",
-                            f"Best Solution in previous 3 generations = {','.join(map(str, best_generation['solution']))}",
-                            f"Worst Fitness in previous 3 generations = {worst_generation['fitness']}",
-                            f"Worst Solution in previous 3 generations = {','.join(map(str, worst_generation['solution']))}",
-                            f"Best Average Fitness in previous 3 generations: {best_average}",
-                            f"Worst Average Fitness in previous 3 generations: {worst_average}",
-                        ]
-                        print('\n'.join(failure_array))
-                        print("FAILED\n")
-                    else:
-                        self.failures_remaining -= 1
-                        print("Failed")
-                        print(f"Failures remaining before termination {self.failures_remaining}")
-        return needs_termination
+
+        if snapshot.stagnation == STAGNATION_TERMINATE:
+            window = self.stagnation_window
+            indexes = range(len(window))
+            # max and min keep the oldest generation on ties
+            best_generation = max(indexes, key=window.best)
+            worst_generation = min(indexes, key=window.worst)
+            best_average = max(window.average(index) for index in indexes)
+            worst_average = min(window.average(index) for index in indexes)
+            failure_array = [
+                f"Best Fitness in previous 3 generations = {window.best(best_generation)}",
+                f"Best Solution in previous 3 generations = {window.best_genome(best_generation).as_string()}",
+                f"Worst Fitness in previous 3 generations = {window.worst(worst_generation)}",
+                f"Worst Solution in previous 3 generations = {window.worst_genome(worst_generation).as_string()}",
+                f"Best Average Fitness in previous 3 generations: {best_average}",
+                f"Worst Average Fitness in previous 3 generations: {worst_average}",
+            ]
+            print('\n'.join(failure_array))
+            print("FAILED\n")
+        elif snapshot.stagnation == STAGNATION_DIVERSITY_LOST:
+            diversity = snapshot.diversity
+            print(' '.join([
+                f"Diversity {diversity['diversity']} fell below minimumDiversity {self.minimum_diversity}",
+                f"with {diversity['converged_loci']} of {self.string_size} loci converged"
+            ]))
+            print("FAILED\n")
+        elif snapshot.stagnation == STAGNATION_FAILED:
+            print("Failed")
+            print(f"Failures remaining before termination {snapshot.failures_remaining}")
+
+    def should_stop(self, snapshot: "GenerationSnapshot") -> bool:
+        """
+        Decide whether the run stops after a generation, using the stopping rule if one is set.
+        By default the run stops when it succeeds, when it stagnates with no failures remaining,
+        or when its diversity falls below minimumDiversity.
+        
+        Args:
+            snapshot (GenerationSnapshot): The snapshot of the generation.
+        
+        Returns:
+            bool: True if the run stops, False otherwise.
+        """
+        if self.stopping_rule is not None:
+            return bool(self.stopping_rule(snapshot))
+        return snapshot.success or snapshot.stagnation in (STAGNATION_TERMINATE, STAGNATION_DIVERSITY_LOST)
+
+    def best_individual(self):
+        """
+        Get the best individual of the current generation without copying it.
+        The individual belongs to the population and changes when the next generation is bred.
+        
+        Returns:
+            Individual: The best individual.
+        """
+        return self.population.get_individual(self.population.get_generation_statistics()["best_index"])
+
+    def save_checkpoint(self) -> None:
+        """
+        Save the state of the run to the checkpoint file if a checkpoint is due after the current generation.
+        """
+        if not self.checkpoint_interval or self.generation_number % self.checkpoint_interval != 0:
+            return
+        state = self.population.get_checkpoint_state()
+        window = self.stagnation_window
+        indexes = range(len(window))
+        header = {
+            "generation_number": self.generation_number,
+            "failures_remaining": self.failures_remaining,
+            "population_size": self.population.population_size,
+            "string_size": self.string_size,
+            "settings": {key: value for key, value in self.config.as_dict().items() if key != RESUME},
+            "random_states": state["random_states"],
+            "window": window.as_dict(),
+        }
+        window_genomes = [window.best_genome(index) for index in indexes]
+        window_genomes += [window.worst_genome(index) for index in indexes]
+        write_checkpoint(self.checkpoint_file, header, state["fitness_values"], state["genomes"], window_genomes)
+
+    def resume_from_checkpoint(self) -> None:
+        """
+        Restore the population, the generation number, the failures remaining and the stagnation window from
+        the checkpoint, so the run continues with the generation after the one that was saved.
+        """
+        checkpoint = self.checkpoint
+        header = checkpoint.header
+        self.population.resume_from_checkpoint(checkpoint)
+        self.generation_number = header["generation_number"] + 1
+        self.failures_remaining = header["failures_remaining"]
+        window = header["window"]
+        count = len(window["best"])
+        genome_representation = self.config.get(GENOME_REPRESENTATION)
+        self.stagnation_window.restore(
+            window["generations_seen"],
+            window["best"],
+            window["average"],
+            window["worst"],
+            [checkpoint.window_genome(index, genome_representation) for index in range(count)],
+            [checkpoint.window_genome(count + index, genome_representation) for index in range(count)]
+        )
+
+    def print_fitness_cache_info(self) -> None:
+        """
+        Print the fitness cache statistics if the fitness cache is enabled.
+        """
+        get_cache_info = getattr(self.population, "get_fitness_cache_info", None)
+        cache_info = get_cache_info() if get_cache_info else None
+        if cache_info is not None:
+            print(' '.join([
+                f"Fitness cache: {cache_info['hits']} hits,",
+                f"{cache_info['misses']} misses,",
+                f"{cache_info['evictions']} evictions,",
+                f"{cache_info['size']}/{cache_info['max_size']} entries"
+            ]))
+
+    def end_generation(self) -> None:
+        """
+        Write the trace events and save the phase timings of the current generation, then move to the next one.
+        """
+        with self.profiler.phase("trace"):
+            self.trace.end_generation()
+        self.profiler.end_generation()
+        self.generation_number += 1
+
+    def print_profile(self) -> None:
+        """
+        Print the phase timings if profiling is enabled, and write them to the profile file if requested.
+        """
+        if not self.profiler.enabled:
+            return
+        print(self.profiler.summary_table())
+        if self.profile_phases == PROFILE_TABLE_AND_JSON:
+            profile_file = self.config.get(PROFILE_FILE)
+            self.profiler.write_json(profile_file)
+            print(f"Phase timings written to {profile_file}")
+
+    def generations(self, stopping_rule=None) -> Iterator["GenerationSnapshot"]:
+        """
+        Run the genetic algorithm one generation at a time, yielding a snapshot of every generation.
+        Nothing is printed. The caller can stop the run early by leaving the loop, or change when it stops
+        by setting stopping_rule, which is checked after every generation. The files and worker processes
+        of the run are released when the generator finishes or is closed.
+        
+        Args:
+            stopping_rule (callable, optional): Called with the snapshot of every generation; the run stops
+                after the first generation for which it returns True. By default the run stops when it succeeds,
+                when it stagnates with no failures remaining, or when its diversity falls below minimumDiversity.
+        
+        Yields:
+            GenerationSnapshot: The snapshot of each generation, its terminate flag set on the last one.
+        """
+        if stopping_rule is not None:
+            self.stopping_rule = stopping_rule
+        profiler = self.profiler
+        try:
+            profiler.start_run()
+            if self.checkpoint is not None:
+                # The generation saved in the checkpoint was already reported by the original run
+                with profiler.phase("initialize"):
+                    self.resume_from_checkpoint()
+            while not self.terminate_run:
+                profiler.start_generation(self.generation_number)
+                self.trace.start_generation(self.generation_number)
+                if self.generation_number == 1:
+                    with profiler.phase("initialize"):
+                        self.population.initialize_random_starting_population()
+                else:
+                    with profiler.phase("breed"):
+                        self.population.select_mating_parents()
+                    with profiler.phase("replace"):
+                        self.population.replace_current_population()
+                snapshot = self.save_generation_data()
+                self.terminate_run = snapshot.terminate = self.should_stop(snapshot)
+                if not self.terminate_run:
+                    with profiler.phase("checkpoint"):
+                        self.save_checkpoint()
+                try:
+                    yield snapshot
+                finally:
+                    self.end_generation()
+        finally:
+            profiler.end_run()
+            self.trace.close()
+            self.history.close()
+            self.population.close()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+
+    async def async_generations(self, stopping_rule=None) -> AsyncIterator["GenerationSnapshot"]:
+        """
+        Asynchronous version of generations for asyncio services. Control returns to the event loop
+        after every generation, so other tasks keep running without threads.
+        
+        Args:
+            stopping_rule (callable, optional): The stopping rule, as for generations.
+        
+        Yields:
+            GenerationSnapshot: The snapshot of each generation.
+        """
+        with contextlib.closing(self.generations(stopping_rule)) as generations:
+            for snapshot in generations:
+                yield snapshot
+                await asyncio.sleep(0)
 
     def run(self) -> None:
         """
-        Execute the genetic algorithm until termination conditions are met.
+        Execute the genetic algorithm until termination conditions are met, printing every generation.
         """
         try:
-            terminate_run = False
-            self.population.initialize_random_starting_population()
-            terminate_run = self.save_generation_data()
-            self.generation_number += 1
-            while not terminate_run:
-                self.population.select_mating_parents()
-                self.population.replace_current_population()
-                terminate_run = self.save_generation_data()
-                self.generation_number += 1
+            with contextlib.closing(self.generations()) as generations:
+                for snapshot in generations:
+                    with self.profiler.phase("output"):
+                        self.report_generation(snapshot)
+            self.print_fitness_cache_info()
+            self.print_profile()
         except (ValueError, KeyError, IndexError) as e:
             print(f"An error occurred during the run: {e}")
 
+
+class GenerationSnapshot:
+    """
+    Lightweight summary of one generation yielded by SGAController.generations.
+    The best and worst genomes are the copies the controller already keeps for the stagnation check.
+    """
+    __slots__ = (
+        "generation", "best", "best_index", "best_genome", "average", "worst", "worst_index", "worst_genome",
+        "variance", "islands", "diversity", "success", "stagnation", "failures_remaining", "terminate",
+    )
+
+    def __init__(self, generation_data, success, stagnation, failures_remaining):
+        """
+        Initialize the GenerationSnapshot from the generation data collected by the SGAController.
+
+        Args:
+            generation_data (dict): The generation data.
+            success (bool): Whether the best individual solved the problem.
+            stagnation (str): STAGNATION_FAILED, STAGNATION_TERMINATE, STAGNATION_DIVERSITY_LOST,
+                or None if the run did not stagnate.
+            failures_remaining (int): The failures remaining before termination.
+        """
+        self.generation = generation_data["generation"]
+        self.best = generation_data["best"]["fitness"]
+        self.best_index = generation_data["best"]["index"]
+        self.best_genome = generation_data["best"]["genome"]
+        self.average = generation_data["average"]
+        self.worst = generation_data["worst"]["fitness"]
+        self.worst_index = generation_data["worst"]["index"]
+        self.worst_genome = generation_data["worst"]["genome"]
+        self.variance = generation_data["variance"]
+        self.islands = generation_data.get("islands")
+        self.diversity = generation_data.get("diversity")
+        self.success = success
+        self.stagnation = stagnation
+        self.failures_remaining = failures_remaining
+        self.terminate = False
+
+    def as_dict(self):
+        """
+        Get the snapshot as a dictionary without the genomes.
+
+        Returns:
+            dict: The statistics of the generation and the state of the run.
+        """
+        return {
+            name: getattr(self, name) for name in self.__slots__
+            if name not in ("best_genome", "worst_genome")
+        }
+
 if __name__ == "__main__":
     """
     Main entry point for the SGA program.
@@ -145,5 +563,5 @@ if __name__ == "__main__":
         sga_controller.run()
         end = time.time()
         print(f"Execution time: {end-start} seconds")
-    except (FileNotFoundError, ValueError, KeyError, IndexError) as e:
+    except (FileNotFoundError, ImportError, ValueError, KeyError, IndexError) as e:
         print(f"An error occurred: {e}")
@@ -0,0 +1,487 @@
+# Author: Daniel Glauber
+# File: sweep.py
+# Description: This file contains the parameter sweep runner, which runs the SGAController in worker processes
+# for every point of a grid or random parameter space with several seeds per point. Every run is cached on
+# disk under a hash of its settings and of the code, so an interrupted or extended sweep only runs new points.
+import argparse
+import csv
+import hashlib
+import importlib
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from benchmark import parse_setting_override
+from config import DEFAULT_CONFIG, SGAConfig, SettingsError
+
+DEFAULT_CACHE_DIRECTORY = ".sweep_cache"
+DEFAULT_SEED_COUNT = 3
+DEFAULT_SAMPLE_COUNT = 20
+CACHE_FORMAT_VERSION = 1
+
+
+def parse_grid_parameter(text):
+    """
+    Parse a key=value1,value2,... grid parameter given on the command line.
+
+    Args:
+        text (str): The parameter.
+
+    Returns:
+        tuple: The setting name and the list of its values, as ints or floats when possible.
+    """
+    key, separator, values = text.partition("=")
+    if not separator or not key or not values:
+        raise argparse.ArgumentTypeError(f"Grid parameter {text} must be given as key=value1,value2,...")
+    return key, [parse_setting_override(f"{key}={value}")[1] for value in values.split(",")]
+
+
+def parse_random_parameter(text):
+    """
+    Parse a key=low:high random parameter given on the command line.
+    The values are drawn as integers if both bounds are integers, and as floats otherwise.
+
+    Args:
+        text (str): The parameter.
+
+    Returns:
+        tuple: The setting name, and the low and high bound of its values.
+    """
+    key, separator, bounds = text.partition("=")
+    low, colon, high = bounds.partition(":")
+    if not separator or not key or not colon:
+        raise argparse.ArgumentTypeError(f"Random parameter {text} must be given as key=low:high")
+    low = parse_setting_override(f"{key}={low}")[1]
+    high = parse_setting_override(f"{key}={high}")[1]
+    if isinstance(low, str) or isinstance(high, str) or low > high:
+        raise argparse.ArgumentTypeError(f"Random parameter {text} must have numbers with low <= high")
+    return key, (low, high)
+
+
+def grid_space(grid_parameters):
+    """
+    Get every combination of the values of the grid parameters.
+
+    Args:
+        grid_parameters (list): The (setting name, values) of every grid parameter.
+
+    Returns:
+        list: One dictionary of settings per point.
+    """
+    keys = [key for key, values in grid_parameters]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*(values for key, values in grid_parameters))]
+
+
+def random_space(grid_parameters, random_parameters, samples, seed):
+    """
+    Draw points of a random parameter space. Grid parameters pick one of their values at random
+    and random parameters a value between their bounds.
+
+    Args:
+        grid_parameters (list): The (setting name, values) of every grid parameter.
+        random_parameters (list): The (setting name, (low, high)) of every random parameter.
+        samples (int): The number of points to draw.
+        seed (int): The seed of the draws, so the same sweep draws the same points.
+
+    Returns:
+        list: One dictionary of settings per point.
+    """
+    rng = random.Random(seed)
+    points = []
+    for sample in range(samples):
+        point = {key: rng.choice(values) for key, values in grid_parameters}
+        for key, (low, high) in random_parameters:
+            if isinstance(low, int) and isinstance(high, int):
+                point[key] = rng.randint(low, high)
+            else:
+                point[key] = rng.uniform(low, high)
+        points.append(point)
+    return points
+
+
+def code_version():
+    """
+    Hash the source of every module of this directory that a run of the SGAController uses,
+    so cached results are not reused after the code changes.
+
+    Returns:
+        str: The hash as hexadecimal.
+    """
+    # Imported here so every module a run uses is loaded
+    importlib.import_module("sga")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted({
+        os.path.abspath(module.__file__) for name, module in list(sys.modules.items())
+        if name not in ("__main__", __name__) and getattr(module, "__file__", None)
+        and os.path.dirname(os.path.abspath(module.__file__)) == directory
+    })
+    code_hash = hashlib.sha256()
+    for path in paths:
+        code_hash.update(os.path.basename(path).encode() + b"\0")
+        with open(path, "rb") as source_file:
+            code_hash.update(source_file.read())
+    return code_hash.hexdigest()
+
+
+def fitness_function_source(fitness_function_value):
+    """
+    Get the Python file of a fitnessFunction setting value given as module:callable. The file is only
+    found here, not imported, since the workers import it themselves.
+
+    Args:
+        fitness_function_value (int or str): The fitnessFunction setting value.
+
+    Returns:
+        str: The path of the file, or None if the value is not a module:callable path.
+    """
+    if not isinstance(fitness_function_value, str) or ":" not in fitness_function_value:
+        return None
+    module_name = fitness_function_value.rpartition(":")[0]
+    if module_name.endswith(".py"):
+        path = module_name
+    else:
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, ValueError):
+            spec = None
+        path = spec.origin if spec is not None else None
+    if path is None or not os.path.isfile(path):
+        raise SettingsError(f"Could not find fitness function module {module_name}")
+    return os.path.abspath(path)
+
+
+def run_version(settings, version):
+    """
+    Get the code version of a run: the code version of this directory, and the source of its fitness function
+    when it is given as module:callable, so editing that function does not reuse the cached results either.
+
+    Args:
+        settings (dict): The full settings of the run.
+        version (str): The code version.
+
+    Returns:
+        str: The code version of the run as hexadecimal.
+    """
+    path = fitness_function_source(settings["fitnessFunction"])
+    if path is None:
+        return version
+    code_hash = hashlib.sha256(version.encode() + b"\0")
+    with open(path, "rb") as source_file:
+        code_hash.update(source_file.read())
+    return code_hash.hexdigest()
+
+
+def cache_key(settings, version):
+    """
+    Get the cache key of a run.
+
+    Args:
+        settings (dict): The full settings of the run.
+        version (str): The code version.
+
+    Returns:
+        str: The hash of the settings and the code version as hexadecimal.
+    """
+    return hashlib.sha256(json.dumps([settings, version], sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Stores the result of every run as a JSON file named after its cache key.
+    """
+    def __init__(self, directory):
+        """
+        Initialize the ResultCache, creating its directory if needed.
+
+        Args:
+            directory (str): The directory of the cache.
+        """
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def _path(self, key):
+        return os.path.join(self._directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Get a cached result.
+
+        Args:
+            key (str): The cache key of the run.
+
+        Returns:
+            dict: The result, or None if the run is not cached.
+        """
+        try:
+            with open(self._path(key)) as result_file:
+                entry = json.load(result_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        return entry["result"] if entry.get("version") == CACHE_FORMAT_VERSION else None
+
+    def put(self, key, settings, result):
+        """
+        Cache a result, replacing the file only once it is complete so an interrupted sweep never leaves a broken entry.
+
+        Args:
+            key (str): The cache key of the run.
+            settings (dict): The full settings of the run.
+            result (dict): The result of the run.
+        """
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as result_file:
+            json.dump({"version": CACHE_FORMAT_VERSION, "settings": settings, "result": result}, result_file)
+        os.replace(temporary_path, path)
+
+
+def run_controller(settings):
+    """
+    Run the SGAController once with the given settings.
+
+    Args:
+        settings (dict): The full settings of the run.
+
+    Returns:
+        dict: Whether the run reached SUCCESS, the number of generations, the fitness of the last generation
+            and the run time in seconds.
+    """
+    # Imported here because sga imports every population engine
+    from sga import SGAController
+    start = time.perf_counter()
+    snapshot = None
+    for snapshot in SGAController(SGAConfig.from_dict(settings)).generations():
+        pass
+    seconds = time.perf_counter() - start
+    if snapshot is None:
+        return {"success": False, "generations": 0, "best": None, "average": None, "worst": None, "seconds": seconds}
+    return {
+        "success": snapshot.success,
+        "generations": snapshot.generation,
+        "best": snapshot.best,
+        "average": snapshot.average,
+        "worst": snapshot.worst,
+        "seconds": seconds,
+    }
+
+
+def full_settings(overrides, point, seed):
+    """
+    Get the full settings of a run: the defaults, the overrides, the point and the seed.
+
+    Args:
+        overrides (dict): Settings that replace the default values in every run.
+        point (dict): The settings of the point.
+        seed (int): The randSeed of the run.
+
+    Returns:
+        dict: The settings, validated by SGAConfig so a bad setting fails before any run starts.
+    """
+    return SGAConfig.from_dict(overrides).replace(**point, randSeed=seed).as_dict()
+
+
+def failed_result(error):
+    """
+    Get the result of a run that raised an error.
+
+    Args:
+        error (Exception): The error raised by the run.
+
+    Returns:
+        dict: A result that did not reach SUCCESS, with the error as text.
+    """
+    return {
+        "success": False,
+        "generations": 0,
+        "best": None,
+        "average": None,
+        "worst": None,
+        "seconds": 0.0,
+        "cached": False,
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def run_sweep(points, seeds, overrides, cache, workers=None):
+    """
+    Run every point with every seed, skipping the runs found in the cache and caching every new result
+    as soon as it arrives.
+
+    Args:
+        points (list): The settings of every point.
+        seeds (list): The randSeed of every run of a point.
+        overrides (dict): Settings that replace the default values in every run.
+        cache (ResultCache): The result cache.
+        workers (int, optional): The number of worker processes (default: one per CPU).
+
+    Returns:
+        list: One list of results per point, in seed order, each result with a cached flag
+            and the error of a run that raised one.
+    """
+    version = code_version()
+    # Every run of a sweep with a module:callable fitness function uses the same source, which is hashed once
+    versions = {}
+    results = [[None] * len(seeds) for point in points]
+    missing = []
+    for point_index, point in enumerate(points):
+        for seed_index, seed in enumerate(seeds):
+            settings = full_settings(overrides, point, seed)
+            fitness_function_value = settings["fitnessFunction"]
+            if fitness_function_value not in versions:
+                versions[fitness_function_value] = run_version(settings, version)
+            key = cache_key(settings, versions[fitness_function_value])
+            result = cache.get(key)
+            if result is not None:
+                results[point_index][seed_index] = dict(result, cached=True)
+            else:
+                missing.append((point_index, seed_index, key, settings))
+    print(f"{len(points) * len(seeds)} runs, {len(points) * len(seeds) - len(missing)} cached, {len(missing)} to run")
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_controller, settings): (point_index, seed_index, key, settings)
+                       for point_index, seed_index, key, settings in missing}
+            for completed, future in enumerate(as_completed(futures), 1):
+                point_index, seed_index, key, settings = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # A failed run is not cached, so it runs again once its settings or the code are fixed
+                    results[point_index][seed_index] = failed_result(e)
+                    print(f"[{completed}/{len(missing)}] {points[point_index]} seed {seeds[seed_index]}: "
+                          f"ERROR {type(e).__name__}: {e}")
+                    continue
+                cache.put(key, settings, result)
+                results[point_index][seed_index] = dict(result, cached=False)
+                print(f"[{completed}/{len(missing)}] {points[point_index]} seed {seeds[seed_index]}: "
+                      f"{'SUCCESS' if result['success'] else 'FAILED'} after {result['generations']} generations")
+    return results
+
+
+def summarize_point(point, results):
+    """
+    Summarize the runs of a point.
+
+    Args:
+        point (dict): The settings of the point.
+        results (list): The results of the runs of the point.
+
+    Returns:
+        dict: The settings of the point followed by the number of runs and successes, the success rate,
+            the mean number of generations, best fitness and run time of the runs that finished,
+            the number of cached runs and the number of runs that raised an error.
+    """
+    runs = len(results)
+    finished = [result for result in results if not result.get("error")]
+    best_values = [result["best"] for result in finished if result["best"] is not None]
+    row = dict(point)
+    row.update({
+        "runs": runs,
+        "successes": sum(result["success"] for result in results),
+        "success_rate": sum(result["success"] for result in results) / runs,
+        "mean_generations": sum(result["generations"] for result in finished) / len(finished) if finished else "",
+        "mean_best": sum(best_values) / len(best_values) if best_values else "",
+        "mean_seconds": sum(result["seconds"] for result in finished) / len(finished) if finished else "",
+        "cached": sum(result["cached"] for result in results),
+        "errors": runs - len(finished),
+    })
+    return row
+
+
+def print_table(rows):
+    """
+    Print the summary of every point as a table.
+
+    Args:
+        rows (list): The rows returned by summarize_point.
+    """
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(format_value(row[column])) for row in rows)) for column in columns]
+    print(' '.join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for row in rows:
+        print(' '.join(f"{format_value(row[column]):>{width}}" for column, width in zip(columns, widths)))
+
+
+def format_value(value):
+    """
+    Format a value of the summary table.
+
+    Args:
+        value: The value.
+
+    Returns:
+        str: Floats with 4 decimals, anything else as is.
+    """
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+
+def main(argv=None):
+    """
+    Run a parameter sweep from the command line.
+
+    Args:
+        argv (list, optional): The command line arguments, without the program name.
+
+    Returns:
+        int: 0.
+    """
+    parser = argparse.ArgumentParser(description="Sweep settings of the simple genetic algorithm over a grid or random space.")
+    parser.add_argument("--grid", type=parse_grid_parameter, action="append", default=[], metavar="KEY=V1,V2,...",
+                        help="a setting and its values, for example --grid tournamentSizeK=2,3,4")
+    parser.add_argument("--random", type=parse_random_parameter, action="append", default=[], metavar="KEY=LOW:HIGH",
+                        help="a setting drawn between two bounds, for example --random probApplyCrossover=0.2:1.0")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLE_COUNT,
+                        help=f"the number of random points when --random is given (default: {DEFAULT_SAMPLE_COUNT})")
+    parser.add_argument("--sample-seed", type=int, default=0, help="the seed of the random points (default: 0)")
+    parser.add_argument("--seeds", type=int, default=DEFAULT_SEED_COUNT,
+                        help=f"the number of seeds each point is run with (default: {DEFAULT_SEED_COUNT})")
+    parser.add_argument("--first-seed", type=int, default=DEFAULT_CONFIG.randSeed,
+                        help="the randSeed of the first run of a point; the other runs use the following seeds")
+    parser.add_argument("--workers", type=int, help="the number of worker processes (default: one per CPU)")
+    parser.add_argument("--set", type=parse_setting_override, action="append", default=[], metavar="KEY=VALUE",
+                        help="override a setting in every run, for example --set stringSizeN=100")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_DIRECTORY,
+                        help=f"the directory of the result cache (default: {DEFAULT_CACHE_DIRECTORY})")
+    parser.add_argument("--save", metavar="FILE", help="save the summary of every point as a CSV table")
+    args = parser.parse_args(argv)
+    if args.seeds < 1:
+        parser.error("--seeds must be at least 1")
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+
+    if args.random:
+        points = random_space(args.grid, args.random, args.samples, args.sample_seed)
+    else:
+        points = grid_space(args.grid)
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    try:
+        for point in points:
+            fitness_function_source(full_settings(dict(args.set), point, seeds[0])["fitnessFunction"])
+    except SettingsError as e:
+        parser.error(str(e))
+    results = run_sweep(points, seeds, dict(args.set), ResultCache(args.cache), args.workers)
+    rows = [summarize_point(point, point_results) for point, point_results in zip(points, results)]
+    print_table(rows)
+    for point, point_results in zip(points, results):
+        for error in dict.fromkeys(result["error"] for result in point_results if result.get("error")):
+            print(f"Error at {point}: {error}")
+    if args.save and rows:
+        with open(args.save, "w", newline="") as table_file:
+            writer = csv.DictWriter(table_file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Saved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
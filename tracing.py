@@ -0,0 +1,251 @@
+# Author: Daniel Glauber
+# File: tracing.py
+# Description: This file contains the trace sink, which records structured debugging events of a run
+# and writes them as JSON lines to a buffered file.
+import json
+from genome import PackedGenome
+
+# Values used by the traceEvents setting
+TRACE_OFF = 0
+TRACE_GENERATIONS = 1
+TRACE_OPERATORS = 2
+
+# Bytes buffered before the trace file is written to
+DEFAULT_TRACE_BUFFER_SIZE = 1 << 20
+
+
+def mask_to_hex(mask, size):
+    """
+    Pack a crossover mask into a hexadecimal string, bit i being bit i % 8 of byte i // 8.
+
+    Args:
+        mask (int): The mask.
+        size (int): The number of bits of the mask.
+
+    Returns:
+        str: The packed bits as hexadecimal.
+    """
+    return PackedGenome(size=size, value=mask).to_bytes().hex()
+
+
+def format_selection(payload, individual_interval):
+    winners, selection_method, tournament_size = payload
+    return {
+        "selection_method": selection_method,
+        "tournament_size": tournament_size,
+        "winners": winners[::individual_interval],
+    }
+
+
+def format_tournament(payload, individual_interval):
+    contestants_fitness, winner_fitness = payload
+    return {"contestants_fitness": contestants_fitness, "winner_fitness": winner_fitness}
+
+
+def format_crossover(payload, individual_interval):
+    mask, size, parents_fitness, children_fitness = payload
+    return {
+        "applied": mask is not None,
+        "mask": None if mask is None else mask_to_hex(mask, size),
+        "parents_fitness": parents_fitness,
+        "children_fitness": children_fitness,
+    }
+
+
+def format_mutation(payload, individual_interval):
+    positions, fitness_before, fitness_after = payload
+    return {"positions": positions, "fitness_before": fitness_before, "fitness_after": fitness_after}
+
+
+def format_generation(payload, individual_interval):
+    statistics, individuals = payload
+    return {
+        "statistics": statistics,
+        "individuals": [
+            {"index": index, "fitness": fitness, "genome": genome.to_bytes().hex(), "size": len(genome)}
+            for index, genome, fitness in individuals
+        ],
+    }
+
+
+# How the payload of every kind of event is turned into JSON
+EVENT_FORMATTERS = {
+    "selection": format_selection,
+    "tournament": format_tournament,
+    "crossover": format_crossover,
+    "mutation": format_mutation,
+    "generation": format_generation,
+}
+
+
+class TraceSink:
+    """
+    Records structured events of a run and writes them to a file as JSON lines.
+    Only every generation_interval-th generation is traced, and within a traced generation only every
+    individual_interval-th event of each kind and every individual_interval-th individual of the snapshot.
+    Events are kept unformatted until the end of their generation, when they are formatted and written
+    through a large buffer, so untraced generations and unsampled events cost a single attribute check.
+    """
+    enabled = True
+
+    def __init__(self, path, level=TRACE_OPERATORS, generation_interval=1, individual_interval=1,
+                 buffer_size=DEFAULT_TRACE_BUFFER_SIZE, append=False):
+        """
+        Initialize the TraceSink and open its file.
+
+        Args:
+            path (str): The path of the trace file.
+            level (int, optional): TRACE_GENERATIONS for generation snapshots only, TRACE_OPERATORS to also
+                trace selection, crossover and mutation.
+            generation_interval (int, optional): Trace every generation_interval-th generation.
+            individual_interval (int, optional): Trace every individual_interval-th event and individual.
+            buffer_size (int, optional): The number of bytes buffered before the file is written to.
+            append (bool, optional): Whether to add to an existing file, as when a run is resumed.
+        """
+        if level not in (TRACE_GENERATIONS, TRACE_OPERATORS):
+            raise ValueError(f"Unknown traceEvents {level}")
+        if generation_interval < 1 or individual_interval < 1:
+            raise ValueError("traceGenerationInterval and traceIndividualInterval must be at least 1")
+        self._path = path
+        self._level = level
+        self._generation_interval = generation_interval
+        self._individual_interval = individual_interval
+        self._file = open(path, "ab" if append else "wb", buffering=buffer_size)
+        self._events = []
+        self._counters = {}
+        self._generation_number = None
+        # Whether operator events of the current generation are recorded
+        self.active = False
+        # Whether the current generation gets a snapshot
+        self.snapshot_due = False
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def level(self):
+        return self._level
+
+    @property
+    def generation_interval(self):
+        return self._generation_interval
+
+    @property
+    def individual_interval(self):
+        return self._individual_interval
+
+    def start_generation(self, generation_number):
+        """
+        Start recording the events of a generation, if it is sampled.
+
+        Args:
+            generation_number (int): The number of the generation.
+        """
+        self._generation_number = generation_number
+        self._counters = {}
+        self.snapshot_due = (generation_number - 1) % self._generation_interval == 0
+        self.active = self.snapshot_due and self._level >= TRACE_OPERATORS
+
+    def sample(self, kind):
+        """
+        Count an event and check whether it is one of the sampled events of its kind.
+
+        Args:
+            kind (str): The kind of the event.
+
+        Returns:
+            bool: True if the event should be recorded.
+        """
+        count = self._counters.get(kind, 0)
+        self._counters[kind] = count + 1
+        return count % self._individual_interval == 0
+
+    def record(self, kind, *payload):
+        """
+        Record an event of the current generation. The payload is formatted when the generation ends,
+        so it must not be changed in place before then.
+
+        Args:
+            kind (str): The kind of the event.
+            *payload: The data of the event.
+        """
+        self._events.append((kind, self._generation_number, payload))
+
+    def individual_indexes(self, population_size):
+        """
+        Get the indexes of the individuals included in a generation snapshot.
+
+        Args:
+            population_size (int): The number of individuals in the generation.
+
+        Returns:
+            range: The sampled indexes.
+        """
+        return range(0, population_size, self._individual_interval)
+
+    def end_generation(self):
+        """
+        Format the events of the current generation and write them to the trace file.
+        """
+        if self._events:
+            individual_interval = self._individual_interval
+            lines = []
+            for kind, generation_number, payload in self._events:
+                event = {"event": kind, "generation": generation_number}
+                event.update(EVENT_FORMATTERS[kind](payload, individual_interval))
+                lines.append(json.dumps(event, separators=(",", ":")))
+            lines.append("")
+            self._file.write("\n".join(lines).encode())
+            self._events = []
+        self.active = False
+        self.snapshot_due = False
+
+    def close(self):
+        """
+        Write any remaining events and close the trace file.
+        """
+        if self._file is not None:
+            self.end_generation()
+            self._file.close()
+            self._file = None
+
+
+class NullTrace:
+    """
+    Trace sink used when tracing is off. It never samples a generation, so nothing is recorded.
+    """
+    enabled = False
+    active = False
+    snapshot_due = False
+
+    def start_generation(self, generation_number):
+        pass
+
+    def end_generation(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def create_trace(level, path, generation_interval=1, individual_interval=1, append=False):
+    """
+    Get the trace sink for a traceEvents setting value.
+
+    Args:
+        level (int): The traceEvents setting value.
+        path (str): The path of the trace file.
+        generation_interval (int, optional): Trace every generation_interval-th generation.
+        individual_interval (int, optional): Trace every individual_interval-th event and individual.
+        append (bool, optional): Whether to add to an existing trace file.
+
+    Returns:
+        TraceSink or NullTrace: A new TraceSink, or the shared NullTrace when tracing is off.
+    """
+    if level == TRACE_OFF:
+        return NULL_TRACE
+    return TraceSink(path, level, generation_interval, individual_interval, append=append)